@@ -0,0 +1,297 @@
+"""
+Replays traffic against the application, with the STAC API replaced by a local
+stub, and reports the throughput and latency percentiles of every endpoint.
+
+    python -m benchmarks.load --requests 2000 --concurrency 32 --features 50
+    python -m benchmarks.load --stac-latency 0.5 --stac-failure-rate 0.05
+    python -m benchmarks.load --compare benchmarks/results/<earlier run>.json
+
+The application runs in-process, with its lifespan, against the `--database`
+database, whose tables are created for the run and dropped afterwards. The
+results are written to `benchmarks/results/` as JSON, named after the commit
+they were measured at, so runs can be compared across commits.
+"""
+
+import argparse
+import asyncio
+import json
+import numpy as np
+import subprocess
+import time
+
+from collections import defaultdict
+from datetime import datetime, timezone
+from httpx import ASGITransport, AsyncClient, HTTPError
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from benchmarks.stac_stub import StacStubServer
+from benchmarks.traffic import TrafficGenerator, load_traffic
+
+RESULTS_DIR = Path(__file__).parent / "results"
+DEFAULT_TRAFFIC = Path(__file__).parent / "traffic.jsonl"
+
+# Name, status (0 if no response was received) and seconds of every request
+Sample = Tuple[str, int, float]
+
+
+def latency_stats(latencies: Sequence[float]) -> Dict[str, float]:
+    """
+    Returns the mean, percentiles and maximum of latencies, in milliseconds.
+    """
+    if not latencies:
+        return {"mean": 0.0, "p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+    milliseconds = np.asarray(latencies) * 1000
+    p50, p95, p99 = np.percentile(milliseconds, [50, 95, 99])
+    return {
+        "mean": round(float(milliseconds.mean()), 3),
+        "p50": round(float(p50), 3),
+        "p95": round(float(p95), 3),
+        "p99": round(float(p99), 3),
+        "max": round(float(milliseconds.max()), 3),
+    }
+
+
+def summarize(samples: Sequence[Sample], elapsed: float) -> Dict[str, Dict[str, Any]]:
+    """
+    Summarizes the samples of a run per request name, and in total.
+
+    Requests that got no response or an error status are counted as errors,
+    and are left out of the latency statistics.
+    """
+    by_name: Dict[str, List[Sample]] = defaultdict(list)
+    for sample in samples:
+        by_name[sample[0]].append(sample)
+        by_name["total"].append(sample)
+
+    summary = {}
+    for name, items in sorted(by_name.items(), key=lambda item: item[0] == "total"):
+        succeeded = [seconds for _, status, seconds in items if 0 < status < 400]
+        statuses: Dict[str, int] = defaultdict(int)
+        for _, status, _ in items:
+            statuses[str(status)] += 1
+        summary[name] = {
+            "requests": len(items),
+            "errors": len(items) - len(succeeded),
+            "throughput": round(len(items) / elapsed, 3) if elapsed else 0.0,
+            "statuses": dict(sorted(statuses.items())),
+            "latency_ms": latency_stats(succeeded),
+        }
+    return summary
+
+
+async def replay(
+    client: AsyncClient,
+    traffic: TrafficGenerator,
+    requests: int,
+    concurrency: int,
+    duration: Optional[float] = None,
+) -> Tuple[List[Sample], float]:
+    """
+    Sends `requests` requests of the traffic, `concurrency` at a time.
+
+    Args:
+        client (AsyncClient): The client of the application.
+        traffic (TrafficGenerator): The requests to send, in order.
+        requests (int): The number of requests to send.
+        concurrency (int): The number of requests in flight at a time.
+        duration (float, optional): Stop sending requests after these seconds.
+
+    Returns:
+        Tuple[List[Sample], float]: The samples, and the seconds the run took.
+    """
+    samples: List[Sample] = []
+    remaining = requests
+    started_at = time.perf_counter()
+    deadline = started_at + duration if duration else None
+
+    async def _worker() -> None:
+        nonlocal remaining
+        while remaining > 0 and (deadline is None or time.perf_counter() < deadline):
+            remaining -= 1
+            request = next(traffic)
+            name = request.pop("name")
+            sent_at = time.perf_counter()
+            try:
+                status = (await client.request(**request)).status_code
+            except HTTPError:
+                status = 0
+            samples.append((name, status, time.perf_counter() - sent_at))
+
+    await asyncio.gather(*(_worker() for _ in range(concurrency)))
+    return samples, time.perf_counter() - started_at
+
+
+def git_commit() -> str:
+    """
+    Returns the short hash of the checked out commit, marked if the tree is dirty.
+    """
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return f"{commit}-dirty" if dirty else commit
+
+
+async def run(arguments: argparse.Namespace) -> Dict[str, Any]:
+    """
+    Runs the benchmark described by the command line arguments.
+
+    Returns:
+        Dict[str, Any]: The results, as written to the results file.
+    """
+    # Imported here, as the application reads the settings patched below
+    from src.config.base import settings
+    from src.main import app
+    from src.services.stac_service import STAC
+
+    stub = StacStubServer(
+        latency=arguments.stac_latency,
+        jitter=arguments.stac_jitter,
+        failure_rate=arguments.stac_failure_rate,
+        seed=arguments.seed,
+    )
+    stub.start()
+    settings.stac_api_url = stub.url
+    settings.stac_catalog_path = None
+    settings.postgres_database = arguments.database
+    settings.postgres_migrate_on_startup = True
+    STAC._client = None
+
+    traffic = TrafficGenerator(
+        load_traffic(arguments.traffic), arguments.features, seed=arguments.seed
+    )
+    try:
+        async with app.router.lifespan_context(app):
+            database = app.state.database
+            try:
+                async with AsyncClient(
+                    transport=ASGITransport(app=app, raise_app_exceptions=False),  # type: ignore[arg-type]
+                    base_url="http://benchmark",
+                    timeout=None,
+                ) as client:
+                    if arguments.warmup:
+                        await replay(
+                            client, traffic, arguments.warmup, arguments.concurrency
+                        )
+                    samples, elapsed = await replay(
+                        client,
+                        traffic,
+                        arguments.requests,
+                        arguments.concurrency,
+                        arguments.duration,
+                    )
+                caches = {
+                    "stac": database.stac_cache.stats(),
+                    "stac_tiers": dict(database.stac_cache_stats),
+                    "tiles": database.tile_cache.stats(),
+                    "responses": database.response_cache.stats(),
+                }
+            finally:
+                if not arguments.keep_data:
+                    await database.drop_tables()
+    finally:
+        stub.stop()
+
+    return {
+        "commit": git_commit(),
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "config": {
+            key: value for key, value in vars(arguments).items() if key != "compare"
+        },
+        "elapsed": round(elapsed, 3),
+        "endpoints": summarize(samples, elapsed),
+        "stac_stub": stub.stats(),
+        "caches": caches,
+    }
+
+
+def print_report(results: Dict[str, Any]) -> None:
+    print(
+        f"{'endpoint':<32}{'requests':>10}{'errors':>8}{'req/s':>10}"
+        f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    )
+    for name, endpoint in results["endpoints"].items():
+        latency = endpoint["latency_ms"]
+        print(
+            f"{name:<32}{endpoint['requests']:>10}{endpoint['errors']:>8}"
+            f"{endpoint['throughput']:>10.1f}{latency['p50']:>10.1f}"
+            f"{latency['p95']:>10.1f}{latency['p99']:>10.1f}"
+        )
+
+
+def print_comparison(previous: Dict[str, Any], results: Dict[str, Any]) -> None:
+    """
+    Prints the change of throughput and latency percentiles between two runs.
+    """
+    print(f"\nChange since {previous['commit']} ({previous['created_at']}):")
+    print(f"{'endpoint':<32}{'req/s':>10}{'p50':>10}{'p95':>10}{'p99':>10}")
+    for name, endpoint in results["endpoints"].items():
+        if (before := previous["endpoints"].get(name)) is None:
+            continue
+        changes = [
+            _change(before["throughput"], endpoint["throughput"]),
+            *(
+                _change(before["latency_ms"][key], endpoint["latency_ms"][key])
+                for key in ("p50", "p95", "p99")
+            ),
+        ]
+        print(f"{name:<32}" + "".join(f"{change:>10}" for change in changes))
+
+
+def _change(before: float, after: float) -> str:
+    return f"{(after - before) / before:+.0%}" if before else "n/a"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Replay traffic against the application and report latencies."
+    )
+    parser.add_argument("--traffic", default=str(DEFAULT_TRAFFIC))
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--duration", type=float, help="stop after these seconds")
+    parser.add_argument("--warmup", type=int, default=0, help="unrecorded requests")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument(
+        "--features", type=int, default=20, help="features per FeatureCollection"
+    )
+    parser.add_argument("--stac-latency", type=float, default=0.2, help="seconds")
+    parser.add_argument("--stac-jitter", type=float, default=0.25)
+    parser.add_argument("--stac-failure-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--database", default="test_geo_stac_db")
+    parser.add_argument(
+        "--keep-data", action="store_true", help="keep the tables after the run"
+    )
+    parser.add_argument("--output", help="results file, see RESULTS_DIR by default")
+    parser.add_argument("--compare", help="results file of an earlier run")
+    arguments = parser.parse_args()
+
+    results = asyncio.run(run(arguments))
+    output = Path(
+        arguments.output
+        or RESULTS_DIR
+        / f"load-{results['created_at'].replace(':', '')}-{results['commit']}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2))
+
+    print_report(results)
+    if arguments.compare:
+        print_comparison(json.loads(Path(arguments.compare).read_text()), results)
+    print(f"\nResults written to {output}")
+
+
+if __name__ == "__main__":
+    main()
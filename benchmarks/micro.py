@@ -0,0 +1,316 @@
+"""
+Micro-benchmarks of the CPU-bound steps of every request, with regression
+thresholds.
+
+    python -m benchmarks.micro                  # compare with the baselines
+    python -m benchmarks.micro --save-baseline  # record the baselines again
+    python -m benchmarks.micro --filter wkt --quick
+
+Every case is timed with `timeit`, as the median of `--repeat` rounds, and one
+call is traced with `tracemalloc` for its peak memory and the memory its result
+holds. Only allocations made through Python (numpy included) are traced, not
+those of GEOS. A case slower than its baseline by more than `--tolerance`, or
+peaking higher by more than `--memory-tolerance`, is a regression, and the
+command exits with status 1.
+
+Timings are only comparable on the machine the baselines were recorded on, so
+record them again there (e.g. on the CI runner) before relying on them.
+"""
+
+import argparse
+import json
+import numpy as np
+import platform
+import shapely
+import statistics
+import sys
+import timeit
+import tracemalloc
+
+from datetime import datetime, timezone
+from functools import partial
+from geoalchemy2.elements import WKBElement
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks.load import git_commit
+from src.api.v1.schemas.geo_schemas import GeoFieldResponseSchema, GeoJSONSchema
+from src.models.geo_models import SRID, GeoField
+from src.utils.geo_utils import geojson_to_geometries, geometries_to_ewkb
+
+BASELINE_PATH = Path(__file__).parent / "baselines" / "micro.json"
+
+# Vertices of a single polygon, and features of a collection
+VERTICES = (10, 1_000, 100_000)
+FEATURES = (1, 100, 10_000)
+# Vertices of every feature of a collection
+FEATURE_VERTICES = 20
+# Peak memory growth always tolerated, as small peaks vary by a few blocks
+_MEMORY_SLACK = 4096
+
+# Returns the function timed by a case, so inputs are only built when it runs
+Setup = Callable[[], Callable[[], Any]]
+
+
+def polygon_coordinates(vertices: int, index: int = 0) -> List[List[List[float]]]:
+    """
+    Returns the GeoJSON coordinates of a polygon with `vertices` vertices.
+    """
+    angles = np.linspace(0, 2 * np.pi, vertices, endpoint=False)
+    ring = np.column_stack([np.cos(angles), np.sin(angles)]) * 0.001
+    ring += (4.3 + (index % 1000) * 0.003, 51.8 + (index // 1000) * 0.003)
+    return [np.vstack([ring, ring[:1]]).tolist()]
+
+
+def feature(vertices: int, index: int = 0) -> Dict[str, Any]:
+    return {
+        "type": "Feature",
+        "properties": {"name": f"Field {index}"},
+        "geometry": {
+            "type": "Polygon",
+            "coordinates": polygon_coordinates(vertices, index),
+        },
+    }
+
+
+def feature_collection(features: int, vertices: int) -> Dict[str, Any]:
+    return {
+        "type": "FeatureCollection",
+        "features": [feature(vertices, index) for index in range(features)],
+    }
+
+
+def geo_field(vertices: int, index: int = 0) -> GeoField:
+    """
+    Returns a GeoField as read by the write paths, with a WKB geometry.
+    """
+    polygon = shapely.Polygon(polygon_coordinates(vertices, index)[0])
+    return GeoField(
+        id=index + 1,
+        name=f"Field {index}",
+        geom=WKBElement(shapely.to_wkb(polygon), srid=SRID),
+        image_url=None,
+        image_date=None,
+    )
+
+
+def _serialize(fields: List[GeoField]) -> List[GeoFieldResponseSchema]:
+    return [GeoFieldResponseSchema.model_validate(field) for field in fields]
+
+
+def _polygons(vertices: int) -> np.ndarray:
+    return geojson_to_geometries([feature(vertices)["geometry"]])
+
+
+def _geo_fields(count: int, vertices: int) -> List[GeoField]:
+    return [geo_field(vertices, index) for index in range(count)]
+
+
+def _geometries(count: int, vertices: int) -> List[Dict[str, Any]]:
+    return [
+        item["geometry"] for item in feature_collection(count, vertices)["features"]
+    ]
+
+
+def _case(
+    function: Callable[[Any], Any], build: Callable[..., Any], *args: Any
+) -> Setup:
+    # The input is built from `args` when the case runs, not when it is listed
+    return lambda: partial(function, build(*args))
+
+
+def cases(quick: bool = False) -> Dict[str, Setup]:
+    """
+    Returns the benchmark cases by name.
+
+    Args:
+        quick (bool, optional): Leave out the largest polygon and collection.
+    """
+    vertices = VERTICES[:-1] if quick else VERTICES
+    features = FEATURES[:-1] if quick else FEATURES
+    result: Dict[str, Setup] = {}
+    for count in vertices:
+        result[f"geojson_to_geometries[{count} vertices]"] = _case(
+            geojson_to_geometries, _geometries, 1, count
+        )
+        result[f"geometries_to_ewkb[{count} vertices]"] = _case(
+            geometries_to_ewkb, _polygons, count
+        )
+        result[f"GeoJSONSchema validation[{count} vertices]"] = _case(
+            GeoJSONSchema.model_validate, feature_collection, 1, count
+        )
+        result[f"GeoFieldSchema serialization[{count} vertices]"] = _case(
+            _serialize, _geo_fields, 1, count
+        )
+    for count in features:
+        result[f"GeoJSONSchema validation[{count} features]"] = _case(
+            GeoJSONSchema.model_validate, feature_collection, count, FEATURE_VERTICES
+        )
+        result[f"GeoFieldSchema serialization[{count} features]"] = _case(
+            _serialize, _geo_fields, count, FEATURE_VERTICES
+        )
+        result[f"geojson_to_geometries[{count} features]"] = _case(
+            geojson_to_geometries, _geometries, count, FEATURE_VERTICES
+        )
+    return result
+
+
+def measure(function: Callable[[], Any], repeat: int = 5) -> Dict[str, Any]:
+    """
+    Times a function, and traces the memory of one call.
+
+    Returns:
+        Dict[str, Any]: The median and minimum `seconds` per call, the `peak_bytes`
+            allocated during a call and the `result_bytes` held by its result.
+    """
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    timings = [total / number for total in timer.repeat(repeat=repeat, number=number)]
+
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        result = function()
+        current, peak = tracemalloc.get_traced_memory()
+        del result
+    finally:
+        tracemalloc.stop()
+    return {
+        "seconds": statistics.median(timings),
+        "min_seconds": min(timings),
+        "calls": number * repeat,
+        "peak_bytes": peak - before,
+        "result_bytes": current - before,
+    }
+
+
+def run(
+    names: Optional[List[str]] = None, quick: bool = False, repeat: int = 5
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Runs the cases whose name contains any of `names`, or every case.
+    """
+    results = {}
+    for name, setup in cases(quick).items():
+        if names and not any(item in name for item in names):
+            continue
+        results[name] = measure(setup(), repeat)
+        print(_format(name, results[name]), flush=True)
+    return results
+
+
+def find_regressions(
+    results: Dict[str, Dict[str, Any]],
+    baselines: Dict[str, Dict[str, Any]],
+    tolerance: float,
+    memory_tolerance: float,
+) -> List[str]:
+    """
+    Compares results with their baselines.
+
+    Args:
+        results (Dict[str, Dict[str, Any]]): The results of `run`, by case.
+        baselines (Dict[str, Dict[str, Any]]): The baseline results, by case.
+        tolerance (float): The share a case may be slower than its baseline.
+        memory_tolerance (float): The share the peak memory of a case may grow by.
+
+    Returns:
+        List[str]: A description of every regression.
+    """
+    regressions = []
+    for name, result in results.items():
+        if (baseline := baselines.get(name)) is None:
+            continue
+        if result["seconds"] > baseline["seconds"] * (1 + tolerance):
+            regressions.append(
+                f"{name}: {_duration(result['seconds'])} per call, "
+                f"{result['seconds'] / baseline['seconds'] - 1:+.0%} on the "
+                f"baseline of {_duration(baseline['seconds'])}"
+            )
+        memory_limit = max(
+            baseline["peak_bytes"] * (1 + memory_tolerance),
+            baseline["peak_bytes"] + _MEMORY_SLACK,
+        )
+        if result["peak_bytes"] > memory_limit:
+            regressions.append(
+                f"{name}: peaks at {result['peak_bytes']} bytes, up from "
+                f"{baseline['peak_bytes']} bytes"
+            )
+    return regressions
+
+
+def _duration(seconds: float) -> str:
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f}{unit}"
+    return f"{seconds / 1e-9:.0f}ns"
+
+
+def _format(name: str, result: Dict[str, Any]) -> str:
+    return (
+        f"{name:<52}{_duration(result['seconds']):>10}"
+        f"{result['peak_bytes'] / 1024:>12.1f} KiB peak"
+        f"{result['result_bytes'] / 1024:>12.1f} KiB held"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Run the micro-benchmarks and compare them with the baselines."
+    )
+    parser.add_argument(
+        "--filter", action="append", help="only run cases whose name contains it"
+    )
+    parser.add_argument("--quick", action="store_true", help="skip the largest sizes")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--memory-tolerance", type=float, default=0.10)
+    parser.add_argument("--baseline", default=str(BASELINE_PATH))
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="store the results as baselines, keeping those of cases not run",
+    )
+    arguments = parser.parse_args()
+
+    results = run(arguments.filter, arguments.quick, arguments.repeat)
+    baseline_path = Path(arguments.baseline)
+    stored = (
+        json.loads(baseline_path.read_text())
+        if baseline_path.exists()
+        else {"cases": {}}
+    )
+
+    if arguments.save_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(
+            json.dumps(
+                {
+                    "commit": git_commit(),
+                    "created_at": datetime.now(timezone.utc).isoformat(
+                        timespec="seconds"
+                    ),
+                    "python": platform.python_version(),
+                    "machine": platform.machine(),
+                    "cases": {**stored["cases"], **results},
+                },
+                indent=2,
+            )
+            + "\n"
+        )
+        print(f"\nBaselines written to {baseline_path}")
+        return
+
+    regressions = find_regressions(
+        results, stored["cases"], arguments.tolerance, arguments.memory_tolerance
+    )
+    if missing := [name for name in results if name not in stored["cases"]]:
+        print(f"\nNo baseline for: {', '.join(missing)}")
+    if regressions:
+        print("\nRegressions:\n" + "\n".join(f"  {item}" for item in regressions))
+        sys.exit(1)
+    print(f"\nNo regression against the baselines of {stored.get('commit')}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""
+A local stand-in for the STAC API, so benchmarks do not depend on the
+Planetary Computer.
+
+It answers the landing page and `/search` of a STAC API with scenes covering
+the searched area, after a configurable latency, and fails a configurable share
+of the searches with a retryable status.
+"""
+
+import hashlib
+import json
+import random
+import threading
+import time
+
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from shapely.geometry import mapping, shape
+from typing import Any, Dict, Optional
+
+# Capture datetime of the newest scene, older scenes are a day apart
+_NEWEST_SCENE = datetime(2024, 1, 10, 10, 54, 21, tzinfo=timezone.utc)
+# Degrees the footprint of a scene extends beyond the searched area
+_FOOTPRINT_MARGIN = 0.5
+
+_CONFORMANCE = [
+    "https://api.stacspec.org/v1.0.0/core",
+    "https://api.stacspec.org/v1.0.0/item-search",
+    "https://api.stacspec.org/v1.0.0/item-search#query",
+    "https://api.stacspec.org/v1.0.0/item-search#sort",
+]
+
+
+class StacStubServer:
+    """
+    A STAC API stub served by a thread, on a free local port.
+
+    Attributes:
+        latency (float): The mean seconds a search takes.
+        jitter (float): The share of `latency` a search randomly deviates by.
+        failure_rate (float): The share of searches answered with `failure_status`.
+        failure_status (int): The status of failed searches.
+        items (int): The scenes returned per search, at most.
+        searches (int): The number of searches received.
+        failures (int): The number of searches failed on purpose.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.2,
+        jitter: float = 0.25,
+        failure_rate: float = 0.0,
+        failure_status: int = 503,
+        items: int = 3,
+        seed: Optional[int] = None,
+    ) -> None:
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.failure_status = failure_status
+        self.items = items
+        self.searches = 0
+        self.failures = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        port = self._server.server_port  # type: ignore[union-attr]
+        return f"http://127.0.0.1:{port}"
+
+    def start(self) -> None:
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _handler(self))
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="stac-stub", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "StacStubServer":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "latency": self.latency,
+            "jitter": self.jitter,
+            "failure_rate": self.failure_rate,
+            "searches": self.searches,
+            "failures": self.failures,
+        }
+
+    def landing_page(self) -> Dict[str, Any]:
+        return {
+            "type": "Catalog",
+            "id": "stac-stub",
+            "stac_version": "1.0.0",
+            "description": "A local stand-in for the STAC API",
+            "conformsTo": _CONFORMANCE,
+            "links": [
+                {"rel": "self", "href": self.url, "type": "application/json"},
+                {"rel": "root", "href": self.url, "type": "application/json"},
+                {
+                    "rel": "search",
+                    "href": f"{self.url}/search",
+                    "type": "application/geo+json",
+                    "method": "POST",
+                },
+            ],
+        }
+
+    def search(self, body: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Answers a search after the configured latency.
+
+        Returns:
+            Optional[Dict[str, Any]]: The ItemCollection, newest scene first, or
+                None if the search fails on purpose.
+        """
+        with self._lock:
+            self.searches += 1
+            delay = self.latency * (1 + self.jitter * self._random.uniform(-1, 1))
+            failed = self._random.random() < self.failure_rate
+            self.failures += failed
+        time.sleep(max(delay, 0.0))
+        if failed:
+            return None
+
+        footprint = shape(body["intersects"]).envelope.buffer(
+            _FOOTPRINT_MARGIN, join_style="mitre"
+        )
+        digest = hashlib.sha1(footprint.wkb).hexdigest()[:12]
+        count = min(self.items, body.get("limit") or self.items)
+        collection = (body.get("collections") or ["stub"])[0]
+        return {
+            "type": "FeatureCollection",
+            "features": [
+                _item(f"{digest}-{index}", collection, mapping(footprint), index)
+                for index in range(count)
+            ],
+            "links": [],
+        }
+
+
+def _item(
+    item_id: str, collection: str, geometry: Dict[str, Any], age: int
+) -> Dict[str, Any]:
+    captured_at = _NEWEST_SCENE - timedelta(days=age)
+    return {
+        "type": "Feature",
+        "stac_version": "1.0.0",
+        "id": item_id,
+        "collection": collection,
+        "geometry": geometry,
+        "bbox": list(shape(geometry).bounds),
+        "properties": {
+            "datetime": captured_at.isoformat().replace("+00:00", "Z"),
+            "eo:cloud_cover": 1.0,
+        },
+        "assets": {
+            "rendered_preview": {
+                "href": f"https://stac-stub.invalid/previews/{item_id}.png",
+                "type": "image/png",
+            }
+        },
+        "links": [],
+    }
+
+
+def _handler(stub: StacStubServer) -> type:
+    class _StacStubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self) -> None:
+            if self.path.rstrip("/") in ("", "/conformance"):
+                self._send(200, stub.landing_page())
+            else:
+                self._send(404, {"detail": "Not Found"})
+
+        def do_POST(self) -> None:
+            length = int(self.headers.get("Content-Length", 0))
+            body = json.loads(self.rfile.read(length) or b"{}")
+            if self.path.rstrip("/") != "/search":
+                self._send(404, {"detail": "Not Found"})
+            elif (result := stub.search(body)) is None:
+                self._send(stub.failure_status, {"detail": "Injected failure"})
+            else:
+                self._send(200, result)
+
+        def _send(self, status: int, payload: Dict[str, Any]) -> None:
+            data = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format: str, *args: Any) -> None:
+            # Every search would be logged to stderr otherwise
+            pass
+
+    return _StacStubHandler
@@ -0,0 +1,120 @@
+"""
+The traffic replayed by the load benchmark, read from a JSON Lines file.
+
+Every line describes one kind of request, e.g.
+
+    {"name": "intersect", "method": "POST", "path": "/api/v1/geo/fields-intersect",
+     "body": "$features", "weight": 2}
+
+A body of `$features` is replaced by a synthetic
+FeatureCollection shared by the whole run, so repeated requests hit the caches,
+and `$new_features` by a FeatureCollection of fields never sent before.
+"""
+
+import itertools
+import random
+
+from pydantic import BaseModel
+from typing import Any, Dict, Iterator, List, Optional
+
+# South-west corner of the synthetic fields, and their spacing, in degrees
+ORIGIN = (4.30, 51.85)
+CELL_SIZE = 0.002
+FIELD_SIZE = 0.0015
+FIELDS_PER_ROW = 100
+
+
+class TrafficEntry(BaseModel):
+    name: str
+    method: str = "GET"
+    path: str
+    params: Dict[str, Any] = {}
+    body: Optional[Any] = None
+    # Share of the requests of this kind, relative to the other entries
+    weight: int = 1
+
+
+def synthetic_field(index: int, prefix: str = "bench") -> Dict[str, Any]:
+    """
+    Returns the `index`-th synthetic field, a square laid out on a grid.
+    """
+    row, column = divmod(index, FIELDS_PER_ROW)
+    minx = ORIGIN[0] + column * CELL_SIZE
+    miny = ORIGIN[1] + row * CELL_SIZE
+    maxx, maxy = minx + FIELD_SIZE, miny + FIELD_SIZE
+    return {
+        "type": "Feature",
+        "properties": {"name": f"{prefix}-{index}"},
+        "geometry": {
+            "type": "Polygon",
+            "coordinates": [
+                [[minx, miny], [maxx, miny], [maxx, maxy], [minx, maxy], [minx, miny]]
+            ],
+        },
+    }
+
+
+def synthetic_feature_collection(
+    start: int, count: int, prefix: str = "bench"
+) -> Dict[str, Any]:
+    """
+    Returns a FeatureCollection of the synthetic fields `start` to `start + count`.
+    """
+    return {
+        "type": "FeatureCollection",
+        "features": [
+            synthetic_field(index, prefix) for index in range(start, start + count)
+        ],
+    }
+
+
+def load_traffic(path: str) -> List[TrafficEntry]:
+    with open(path) as file:
+        return [TrafficEntry.model_validate_json(line) for line in file if line.strip()]
+
+
+class TrafficGenerator:
+    """
+    Yields the requests of a run, mixing the entries by weight.
+
+    Attributes:
+        features (int): The number of features of every synthetic FeatureCollection.
+    """
+
+    def __init__(
+        self, entries: List[TrafficEntry], features: int, seed: Optional[int] = None
+    ) -> None:
+        self.features = features
+        schedule = [entry for entry in entries for _ in range(entry.weight)]
+        random.Random(seed).shuffle(schedule)
+        self._schedule = itertools.cycle(schedule)
+        # Fields of `$features` come first, `$new_features` continue after them
+        self._prefix = f"bench-{random.Random(seed).getrandbits(32):08x}"
+        self._shared = synthetic_feature_collection(0, features, self._prefix)
+        self._next_field = features
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return self
+
+    def __next__(self) -> Dict[str, Any]:
+        entry = next(self._schedule)
+        request: Dict[str, Any] = {
+            "name": entry.name,
+            "method": entry.method,
+            "url": entry.path,
+            "params": entry.params,
+        }
+        if entry.body is not None:
+            request["json"] = self._expand(entry.body)
+        return request
+
+    def _expand(self, value: Any) -> Any:
+        if value == "$features":
+            return self._shared
+        if value == "$new_features":
+            collection = synthetic_feature_collection(
+                self._next_field, self.features, self._prefix
+            )
+            self._next_field += self.features
+            return collection
+        return value
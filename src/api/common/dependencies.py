@@ -1,11 +1,20 @@
+from fastapi import Request
+
 from src.database.postgres.handler import PostgreSQLHandler as DatabaseHandler
 
 
-async def get_database_dependency() -> DatabaseHandler:
+async def get_database_dependency(request: Request) -> DatabaseHandler:
     """
     Provides a database handler dependency for use in FastAPI routes or other dependency-injection contexts.
 
+    The handler is created once by the application lifespan, so every request
+    shares the same engine and connection pool.
+
+    Args:
+        request (Request): The incoming request, used to reach the application state.
+
     Returns:
-        DatabaseHandler: An instance of `DatabaseHandler` for interacting with the database.
+        DatabaseHandler: The application-wide `DatabaseHandler` for interacting with the database.
     """
-    return DatabaseHandler()
+    database: DatabaseHandler = request.app.state.database
+    return database
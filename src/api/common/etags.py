@@ -0,0 +1,23 @@
+from typing import Optional
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Checks an `If-None-Match` request header against the current ETag.
+
+    Weak validators (`W/"..."`), lists of ETags and `*` are supported, as
+    described by RFC 9110 for conditional GET requests.
+
+    Args:
+        if_none_match (str, optional): The `If-None-Match` header of the request.
+        etag (str): The quoted ETag of the current representation.
+
+    Returns:
+        bool: True if the client already holds the current representation.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+    return etag.removeprefix("W/") in candidates
@@ -0,0 +1,144 @@
+import functools
+import time
+
+from fastapi.routing import APIRoute
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from sqlalchemy.pool import QueuePool
+from typing import Any, Callable, Coroutine, Dict, cast
+
+from src.database.postgres.handler import PostgreSQLHandler
+from src.utils.metrics_utils import (
+    CACHE_ENTRIES,
+    CACHE_HIT_RATIO,
+    CACHE_HITS,
+    CACHE_MISSES,
+    DB_POOL_CONNECTIONS,
+    HTTP_REQUEST_SECONDS,
+    STAC_CACHE_LOOKUPS,
+    add_stage_time,
+    stage_timings,
+)
+
+# Stages reported in the `Server-Timing` header, in order
+SERVER_TIMING_STAGES = ("pool", "db", "stac", "serialize")
+
+
+def server_timing(timings: Dict[str, float], total: float) -> str:
+    """
+    Formats stage timings, in seconds, as a `Server-Timing` header value.
+    """
+    metrics = [
+        f"{name};dur={timings.get(name, 0.0) * 1000:.1f}"
+        for name in SERVER_TIMING_STAGES
+    ]
+    return ", ".join(metrics + [f"total;dur={total * 1000:.1f}"])
+
+
+class MetricsMiddleware:
+    """
+    Records the latency of every HTTP request by route template, and reports
+    the time spent in each stage in a `Server-Timing` response header.
+
+    The header is sent with the response start, so the body of a streaming
+    response is not accounted for in it, only in the latency histogram.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started_at = time.perf_counter()
+        status = 500
+
+        with stage_timings() as timings:
+
+            async def send_with_timing(message: Message) -> None:
+                nonlocal status
+                if message["type"] == "http.response.start":
+                    status = message["status"]
+                    value = server_timing(timings, time.perf_counter() - started_at)
+                    message["headers"] = [
+                        *message.get("headers", []),
+                        (b"server-timing", value.encode("latin-1")),
+                    ]
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_timing)
+            finally:
+                route = scope.get("route")
+                HTTP_REQUEST_SECONDS.observe(
+                    time.perf_counter() - started_at,
+                    method=scope["method"],
+                    route=getattr(route, "path", "unmatched"),
+                    status=str(status),
+                )
+
+
+class TimedRoute(APIRoute):
+    """
+    An APIRoute that reports the time spent outside of its endpoint as the
+    `serialize` stage: validating the request and serializing the response.
+    """
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any):
+        super().__init__(path, endpoint, **kwargs)
+        self.dependant.call = _timed_endpoint(self.dependant.call)
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        handler = super().get_route_handler()
+
+        async def timed_handler(request: Request) -> Response:
+            started_at = time.perf_counter()
+            try:
+                return await handler(request)
+            finally:
+                add_stage_time("serialize", time.perf_counter() - started_at)
+
+        return timed_handler
+
+
+def _timed_endpoint(endpoint: Callable[..., Any]) -> Callable[..., Any]:
+    # Every endpoint of the application is a coroutine function. Its time is
+    # taken back from the `serialize` stage the route handler adds up.
+    @functools.wraps(endpoint)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        started_at = time.perf_counter()
+        try:
+            return await endpoint(*args, **kwargs)
+        finally:
+            add_stage_time("serialize", started_at - time.perf_counter())
+
+    return wrapper
+
+
+def collect_database_metrics(database: PostgreSQLHandler) -> None:
+    """
+    Updates the gauges and counters kept by the database handler: the state of
+    its connection pool and the hit rates of its caches.
+    """
+    pool = cast(QueuePool, database.engine.pool)
+    DB_POOL_CONNECTIONS.set(pool.size(), state="size")
+    DB_POOL_CONNECTIONS.set(pool.checkedout(), state="in_use")
+    DB_POOL_CONNECTIONS.set(pool.checkedin(), state="idle")
+    DB_POOL_CONNECTIONS.set(max(pool.overflow(), 0), state="overflow")
+
+    caches = {
+        "stac": database.stac_cache,
+        "tiles": database.tile_cache,
+        "responses": database.response_cache,
+    }
+    for name, cache in caches.items():
+        stats = cache.stats()
+        CACHE_ENTRIES.set(stats["size"], cache=name)
+        CACHE_HITS.set(stats["hits"], cache=name)
+        CACHE_MISSES.set(stats["misses"], cache=name)
+        CACHE_HIT_RATIO.set(stats["hit_rate"], cache=name)
+    for result, count in database.stac_cache_stats.items():
+        STAC_CACHE_LOOKUPS.set(count, result=result)
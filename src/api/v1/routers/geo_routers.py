@@ -1,48 +1,208 @@
-from fastapi import APIRouter, Depends, HTTPException
-from typing import List
+import hashlib
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Literal,
+    Optional,
+    Union,
+)
+from urllib.parse import urlencode
 
 from src.api.common.dependencies import get_database_dependency
+from src.api.common.etags import etag_matches
+from src.api.common.metrics import TimedRoute
 from src.api.v1.schemas.geo_schemas import (
+    GeoFieldImportResponseSchema,
+    GeoFieldInsertResponseSchema,
+    GeoFieldIntersectResponseSchema,
+    GeoFieldPageSchema,
     GeoFieldResponseSchema,
     GeoJSONSchema,
+    GeometryFormat,
 )
+from src.api.v1.schemas.job_schemas import SatelliteImageJobSchema
 from src.database.common.exceptions import DatabaseIntegrityError
+from src.config.base import settings
 from src.database.postgres.handler import PostgreSQLHandler
+from src.utils.geo_utils import geojson_feature
+from src.utils.metrics_utils import stage
+from src.utils.pagination_utils import decode_cursor, encode_cursor
+from src.utils.stream_utils import read_feature_batches
+from src.utils.tile_utils import is_valid_tile
 
 router = APIRouter(
     prefix="/geo",
     tags=["geo APIs"],
+    route_class=TimedRoute,
 )
 
 
-@router.post("/satellite-image", response_model=List[GeoFieldResponseSchema])
+def _decode_cursor(cursor: Optional[str]) -> Optional[int]:
+    """
+    Decodes the `cursor` query parameter of a paginated endpoint.
+
+    Raises:
+        HTTPException: If the cursor is invalid.
+    """
+    try:
+        return decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _check_simplification(zoom: Optional[int], tolerance: Optional[float]) -> None:
+    """
+    Checks that at most one of the `zoom` and `tolerance` query parameters is set.
+
+    Raises:
+        HTTPException: If both are set.
+    """
+    if zoom is not None and tolerance is not None:
+        raise HTTPException(
+            status_code=400, detail="Only one of zoom and tolerance may be given"
+        )
+
+
+def _build_page(items: List[Dict[str, Any]], limit: int) -> GeoFieldPageSchema:
+    """
+    Builds a page from up to `limit + 1` rows, the extra row signalling a next page.
+    """
+    next_cursor = None
+    if len(items) > limit:
+        next_cursor = encode_cursor(items[limit - 1]["id"])
+    return GeoFieldPageSchema(items=items[:limit], next=next_cursor)  # type: ignore[arg-type]
+
+
+async def _conditional_response(
+    http_request: Request,
+    if_none_match: Optional[str],
+    database: PostgreSQLHandler,
+    build: Callable[[], Awaitable[BaseModel]],
+    body_key: str = "",
+) -> Response:
+    """
+    Answers a read of GeoFields conditionally on the version of `geo_fields` it
+    is answered at (see `PostgreSQLHandler.geo_fields_read_version`).
+
+    The ETag combines the version with a digest of the request, so it changes
+    with every write of GeoFields and differs between queries. A request whose
+    `If-None-Match` holds it gets `304 Not Modified` without any GeoField being
+    read. Otherwise the body is served from the `response_cache` if it was built
+    at the current version, or built and cached unless it is larger than
+    `response_cache_max_body_bytes`.
+
+    Args:
+        http_request (Request): The request, whose path and query identify it.
+        if_none_match (str, optional): The `If-None-Match` header of the request.
+        database (PostgreSQLHandler): The handler holding the version and cache.
+        build (Callable[[], Awaitable[BaseModel]]): Builds the response model.
+        body_key (str, optional): Identifies the request body, if any.
+
+    Returns:
+        Response: The JSON response, or `304 Not Modified`, with its ETag.
+    """
+    version = await database.geo_fields_read_version()
+    query = urlencode(sorted(http_request.query_params.multi_items()))
+    key = hashlib.sha1(
+        f"{http_request.url.path}?{query}|{body_key}".encode()
+    ).hexdigest()
+    headers = {"ETag": f'"{version}-{key[:16]}"'}
+    if etag_matches(if_none_match, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+
+    cached = database.response_cache.get(key)
+    if cached is None or cached[0] != version:
+        model = await build()
+        with stage("serialize"):
+            cached = version, model.model_dump_json().encode()
+        if len(cached[1]) <= settings.response_cache_max_body_bytes:
+            database.response_cache.set(key, cached, size=len(cached[1]))
+    return Response(content=cached[1], media_type="application/json", headers=headers)
+
+
+@router.post(
+    "/satellite-image",
+    response_model=List[GeoFieldResponseSchema],
+    responses={202: {"model": SatelliteImageJobSchema}},
+)
 async def retrieve_satellite_image(
     request: GeoJSONSchema,
+    http_request: Request,
+    run_async: bool = Query(False, alias="async"),
     database: PostgreSQLHandler = Depends(get_database_dependency),
-) -> List[GeoFieldResponseSchema]:
+) -> Union[List[GeoFieldResponseSchema], JSONResponse]:
     """
     Handle POST requests to retrieve satellite images based on GeoJSON data.
 
     Args:
         request (GeoJSONSchema): A GeoJSON object containing the geographic area of interest.
+        run_async (bool): Queue the features for the background workers instead,
+            and answer at once with `202 Accepted` and the job to poll.
 
     Returns:
-        List[GeoFieldResponseSchema]: A list of satellite image data conforming to the GeoFieldResponseSchema.
+        List[GeoFieldResponseSchema]: A list of satellite image data conforming to the GeoFieldResponseSchema,
+            or the queued job, with its URL in the `Location` header.
 
     Raises:
         HTTPException: If a database integrity error occurs.
     """
+    if run_async:
+        job = await database.create_satellite_image_job(request)
+        if job_workers := getattr(http_request.app.state, "job_workers", None):
+            job_workers.notify()
+        return JSONResponse(
+            status_code=202,
+            content=jsonable_encoder(SatelliteImageJobSchema.model_validate(job)),
+            headers={
+                "Location": str(
+                    http_request.url_for("retrieve_satellite_image_job", job_id=job.id)
+                )
+            },
+        )
+
     try:
         return await database.retrieve_satellite_image(request)  # type: ignore[return-value]
     except DatabaseIntegrityError as e:
         raise HTTPException(status_code=409, detail=str(e))
 
 
-@router.post("/fields", response_model=List[GeoFieldResponseSchema])
+@router.get("/jobs/{job_id}", response_model=SatelliteImageJobSchema)
+async def retrieve_satellite_image_job(
+    job_id: int,
+    database: PostgreSQLHandler = Depends(get_database_dependency),
+) -> SatelliteImageJobSchema:
+    """
+    Retrieve the progress and per-feature results of a satellite image job.
+
+    Args:
+        job_id (int): The id returned when the job was queued.
+
+    Returns:
+        SatelliteImageJobSchema: The job, with one result per processed feature.
+
+    Raises:
+        HTTPException: If the job does not exist.
+    """
+    job = await database.get_satellite_image_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job  # type: ignore[return-value]
+
+
+@router.post("/fields", response_model=GeoFieldInsertResponseSchema)
 async def insert_geo_fields(
     request: GeoJSONSchema,
     database: PostgreSQLHandler = Depends(get_database_dependency),
-) -> List[GeoFieldResponseSchema]:
+) -> GeoFieldInsertResponseSchema:
     """
     Inserts a new geo field into the database from a GeoJSON request.
 
@@ -50,49 +210,295 @@ async def insert_geo_fields(
         request (GeoJSONSchema): A GeoJSON object containing the geographic area of interest.
 
     Returns:
-        List[GeoFieldResponseSchema]: A list of GeoFieldResponseSchema instances reflecting the inserted geo fields.
+        GeoFieldInsertResponseSchema: The inserted geo fields, and the features skipped
+            as duplicates together with their index in the request.
 
     Raises:
         HTTPException: If a database integrity error occurs.
     """
     try:
-        return await database.insert_geo_fields(request)  # type: ignore[return-value]
+        inserted, skipped = await database.insert_geo_fields(request)
+        return GeoFieldInsertResponseSchema(inserted=inserted, skipped=skipped)  # type: ignore[arg-type]
     except DatabaseIntegrityError as e:
         raise HTTPException(status_code=409, detail=str(e))
 
 
-@router.get("/fields", response_model=List[GeoFieldResponseSchema])
+@router.post("/fields/import", response_model=GeoFieldImportResponseSchema)
+async def import_geo_fields(
+    http_request: Request,
+    database: PostgreSQLHandler = Depends(get_database_dependency),
+) -> GeoFieldImportResponseSchema:
+    """
+    Imports a large GeoJSON file streamed as the request body.
+
+    The body holds a FeatureCollection, or one Feature per line as written by
+    `/fields/export`, and may be sent with chunked transfer encoding. Features
+    are parsed while the body is received, and written in batches of
+    `import_batch_size`, so memory stays flat regardless of the file size.
+    Every batch is committed once written, so the batches before an error in
+    the body are kept.
+
+    Returns:
+        GeoFieldImportResponseSchema: The number of features received, inserted
+            and skipped as duplicates, and the features with an invalid geometry.
+
+    Raises:
+        HTTPException: If the body is not valid GeoJSON.
+    """
+    batches = read_feature_batches(
+        http_request.stream(),
+        batch_size=settings.import_batch_size,
+        max_value_size=settings.import_max_feature_size,
+    )
+    try:
+        return await database.import_geo_fields(batches)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/fields", response_model=GeoFieldPageSchema)
 async def retrieve_geo_fields(
+    http_request: Request,
+    limit: int = Query(settings.page_size_default, ge=1, le=settings.page_size_max),
+    cursor: Optional[str] = None,
+    name_prefix: Optional[str] = None,
+    has_image: Optional[bool] = None,
+    geometry_format: GeometryFormat = "wkt",
+    zoom: Optional[int] = Query(None, ge=0, le=30),
+    tolerance: Optional[float] = Query(None, gt=0),
+    if_none_match: Optional[str] = Header(None),
+    database: PostgreSQLHandler = Depends(get_database_dependency),
+) -> Response:
+    """
+    Retrieve one page of GeoField entries from the database.
+
+    Args:
+        limit (int): The maximum number of GeoFields in the page.
+        cursor (str, optional): The `next` cursor of the previous page.
+        name_prefix (str, optional): Only return GeoFields whose name starts with it.
+        has_image (bool, optional): Only return GeoFields with or without a satellite image.
+        geometry_format (GeometryFormat): Return geometries as WKT text or GeoJSON objects.
+        zoom (int, optional): Simplify geometries for display at this zoom level.
+        tolerance (float, optional): Simplify geometries with this tolerance, in degrees.
+        if_none_match (str, optional): The ETag of a page the client already holds.
+
+    Returns:
+        Response: The GeoFields of the page, and the cursor of the next page or
+            None if this is the last one, or `304 Not Modified` if the client's
+            copy is current.
+
+    Raises:
+        HTTPException: If the cursor is invalid, or both zoom and tolerance are given.
+    """
+    _check_simplification(zoom, tolerance)
+    after_id = _decode_cursor(cursor)
+
+    async def _page() -> GeoFieldPageSchema:
+        # Fetch one extra row to know whether another page follows
+        items = await database.retrieve_geo_fields(
+            limit=limit + 1,
+            after_id=after_id,
+            name_prefix=name_prefix,
+            has_image=has_image,
+            geometry_format=geometry_format,
+            zoom=zoom,
+            tolerance=tolerance,
+        )
+        return _build_page(items, limit)
+
+    return await _conditional_response(http_request, if_none_match, database, _page)
+
+
+@router.get("/fields/bbox", response_model=GeoFieldPageSchema)
+async def retrieve_geo_fields_in_bbox(
+    minx: float,
+    miny: float,
+    maxx: float,
+    maxy: float,
+    http_request: Request,
+    limit: int = Query(settings.page_size_default, ge=1, le=settings.page_size_max),
+    cursor: Optional[str] = None,
+    exact: bool = True,
+    geometry_format: GeometryFormat = "wkt",
+    zoom: Optional[int] = Query(None, ge=0, le=30),
+    tolerance: Optional[float] = Query(None, gt=0),
+    if_none_match: Optional[str] = Header(None),
+    database: PostgreSQLHandler = Depends(get_database_dependency),
+) -> Response:
+    """
+    Retrieve one page of GeoField entries inside a bounding box, such as a map viewport.
+
+    Args:
+        minx (float): The minimum longitude of the bounding box.
+        miny (float): The minimum latitude of the bounding box.
+        maxx (float): The maximum longitude of the bounding box.
+        maxy (float): The maximum latitude of the bounding box.
+        limit (int): The maximum number of GeoFields in the page.
+        cursor (str, optional): The `next` cursor of the previous page.
+        exact (bool): If False, only the bounding boxes of the GeoFields are
+            compared, which is faster but may return fields just outside the box.
+        geometry_format (GeometryFormat): Return geometries as WKT text or GeoJSON objects.
+        zoom (int, optional): Simplify geometries for display at this zoom level.
+        tolerance (float, optional): Simplify geometries with this tolerance, in degrees.
+        if_none_match (str, optional): The ETag of a page the client already holds.
+
+    Returns:
+        Response: The GeoFields of the page, and the cursor of the next page or
+            None if this is the last one, or `304 Not Modified` if the client's
+            copy is current.
+
+    Raises:
+        HTTPException: If the bounding box or the cursor is invalid, or both zoom
+            and tolerance are given.
+    """
+    _check_simplification(zoom, tolerance)
+    if minx > maxx or miny > maxy:
+        raise HTTPException(
+            status_code=400, detail="Invalid bounding box: min must not exceed max"
+        )
+
+    after_id = _decode_cursor(cursor)
+
+    async def _page() -> GeoFieldPageSchema:
+        items = await database.retrieve_geo_fields_in_bbox(
+            (minx, miny, maxx, maxy),
+            limit=limit + 1,
+            after_id=after_id,
+            exact=exact,
+            geometry_format=geometry_format,
+            zoom=zoom,
+            tolerance=tolerance,
+        )
+        return _build_page(items, limit)
+
+    return await _conditional_response(http_request, if_none_match, database, _page)
+
+
+@router.get("/fields/export", response_class=StreamingResponse)
+async def export_geo_fields(
+    export_format: Literal["ndjson", "geojson"] = Query("ndjson", alias="format"),
     database: PostgreSQLHandler = Depends(get_database_dependency),
-) -> List[GeoFieldResponseSchema]:
+) -> StreamingResponse:
     """
-    Retrieve all GeoField entries from the database.
+    Stream every GeoField as GeoJSON Features.
+
+    Rows are read through a server-side cursor and written out batch by batch,
+    so memory stays flat regardless of the table size.
+
+    Args:
+        export_format (str): `ndjson` for one Feature per line, or `geojson` for a
+            single FeatureCollection.
 
     Returns:
-        List[GeoFieldResponseSchema]: A list of GeoFieldResponseSchema objects
-            representing the GeoFields.
+        StreamingResponse: The streamed export.
     """
-    return await database.retrieve_geo_fields()  # type: ignore[return-value]
+    batches = database.stream_geo_fields(batch_size=settings.export_batch_size)
 
+    async def _ndjson() -> AsyncIterator[str]:
+        async for batch in batches:
+            yield "".join(f"{geojson_feature(row)}\n" for row in batch)
+
+    async def _feature_collection() -> AsyncIterator[str]:
+        separator = ""
+        yield '{"type":"FeatureCollection","features":['
+        async for batch in batches:
+            yield separator + ",".join(geojson_feature(row) for row in batch)
+            separator = ","
+        yield "]}"
+
+    if export_format == "geojson":
+        return StreamingResponse(
+            _feature_collection(), media_type="application/geo+json"
+        )
+    return StreamingResponse(_ndjson(), media_type="application/x-ndjson")
+
+
+@router.get("/tiles/{z}/{x}/{y}.mvt", response_class=Response)
+async def retrieve_tile(
+    z: int,
+    x: int,
+    y: int,
+    if_none_match: Optional[str] = Header(None),
+    database: PostgreSQLHandler = Depends(get_database_dependency),
+) -> Response:
+    """
+    Retrieve a Mapbox Vector Tile of the GeoFields.
 
-@router.post("/fields-intersect", response_model=List[GeoFieldResponseSchema])
+    Args:
+        z (int): The zoom level.
+        x (int): The tile column.
+        y (int): The tile row, counted from the north.
+        if_none_match (str, optional): The ETag of a tile the client already holds.
+
+    Returns:
+        Response: The tile, or `304 Not Modified` if the client's copy is current.
+
+    Raises:
+        HTTPException: If the tile does not exist.
+    """
+    if not is_valid_tile(z, x, y):
+        raise HTTPException(status_code=404, detail="Tile not found")
+
+    tile, etag = await database.get_tile(z, x, y)
+    # Tiles change with every write, so clients revalidate them with the ETag
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(
+        content=tile, media_type="application/vnd.mapbox-vector-tile", headers=headers
+    )
+
+
+@router.post("/fields-intersect", response_model=GeoFieldIntersectResponseSchema)
 async def find_intersecting_fields(
     request: GeoJSONSchema,
+    http_request: Request,
+    geometry_format: GeometryFormat = "wkt",
+    zoom: Optional[int] = Query(None, ge=0, le=30),
+    tolerance: Optional[float] = Query(None, gt=0),
+    measure: bool = False,
+    if_none_match: Optional[str] = Header(None),
     database: PostgreSQLHandler = Depends(get_database_dependency),
-) -> List[GeoFieldResponseSchema]:
+) -> Response:
     """
-    Retrieve a list of fields that intersect with the given GeoJSON polygon.
+    Retrieve the fields that intersect with each Polygon or MultiPolygon of a GeoJSON object.
 
     Args:
-        request: The GeoJSON request containing the polygon data.
+        request: The GeoJSON request containing the query features.
+        geometry_format: Return geometries as WKT text or GeoJSON objects.
+        zoom: Simplify geometries for display at this zoom level.
+        tolerance: Simplify geometries with this tolerance, in degrees.
+        measure: Also return the area of every intersection, in square meters, and
+            the share of the field it covers.
+        if_none_match: The ETag of a response the client already holds for this query.
 
     Returns:
-        List[GeoFieldResponseSchema]: A list of GeoFieldResponseSchema instances intersecting with the GeoJSON polygon.
+        The fields intersecting any feature, and for each feature the ids of the
+        fields it intersects, or `304 Not Modified` if the client's copy is current.
 
     Raises:
-        HTTPException: If any errors occur during the database operation.
+        HTTPException: If both zoom and tolerance are given, or any errors occur
+            during the database operation.
     """
-    try:
-        return await database.get_intersecting_fields(request)  # type: ignore[return-value]
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    _check_simplification(zoom, tolerance)
+
+    async def _intersections() -> GeoFieldIntersectResponseSchema:
+        try:
+            fields, features = await database.get_intersecting_fields(
+                request,
+                geometry_format,
+                zoom=zoom,
+                tolerance=tolerance,
+                measure=measure,
+            )
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+        return GeoFieldIntersectResponseSchema(fields=fields, features=features)  # type: ignore[arg-type]
+
+    return await _conditional_response(
+        http_request,
+        if_none_match,
+        database,
+        _intersections,
+        body_key=request.model_dump_json(),
+    )
@@ -1,14 +1,37 @@
+from datetime import datetime
 from geoalchemy2.elements import WKBElement
 from geoalchemy2.shape import to_shape
-from pydantic import BaseModel, ConfigDict, model_validator
-from typing import List, Optional
+from pydantic import BaseModel, ConfigDict, Field, model_validator
+from typing import Annotated, Any, Dict, List, Literal, Optional, Union
 
 from src.models.geo_models import GeoField
 
+# How read endpoints encode geometries: WKT text or GeoJSON objects
+GeometryFormat = Literal["wkt", "geojson"]
+
+
+# GeoJSON coordinates, sized as a valid Polygon needs them. The sizes are checked
+# by pydantic itself, as walking every ring in Python would slow down large payloads.
+Position = Annotated[List[float], Field(min_length=2)]
+Ring = Annotated[List[Position], Field(min_length=4)]
+PolygonCoordinates = Annotated[List[Ring], Field(min_length=1)]
+MultiPolygonCoordinates = Annotated[List[PolygonCoordinates], Field(min_length=1)]
+
 
 class GeometrySchema(BaseModel):
     type: str
-    coordinates: List[List[List[float]]]
+    # The rings of a Polygon, or the polygons of a MultiPolygon
+    coordinates: Union[PolygonCoordinates, MultiPolygonCoordinates]
+
+    @model_validator(mode="after")
+    def check_nesting(self):
+        if self.type not in ("Polygon", "MultiPolygon"):
+            raise ValueError("Only Polygon and MultiPolygon geometries are supported")
+        # Coordinates are nested alike throughout, and never empty
+        multi = isinstance(self.coordinates[0][0][0], list)
+        if multi != (self.type == "MultiPolygon"):
+            raise ValueError(f"Coordinates do not match the {self.type} geometry type")
+        return self
 
 
 class FeatureSchema(BaseModel):
@@ -50,18 +73,70 @@ class GeoJSONSchema(BaseModel):
 
 class GeoFieldSchema(BaseModel):
     name: str
-    geom: str
+    geom: Union[str, Dict[str, Any]]
     image_url: Optional[str]
-    image_date: Optional[str]
+    image_date: Optional[datetime]
 
     model_config = ConfigDict(from_attributes=True)
 
     @model_validator(mode="before")
     def serializer(cls, values):
+        # Read paths already return WKT or GeoJSON rows, only ORM instances
+        # returned by write paths need their geometry converted.
         if isinstance(values, GeoField) and isinstance(values.geom, WKBElement):
-            values.geom = str(to_shape(values.geom))
+            values = {
+                field: getattr(values, field)
+                for field in cls.model_fields
+                if hasattr(values, field)
+            }
+            values["geom"] = str(to_shape(values["geom"]))
         return values
 
 
 class GeoFieldResponseSchema(GeoFieldSchema):
     id: int
+
+
+class GeoFieldPageSchema(BaseModel):
+    items: List[GeoFieldResponseSchema]
+    next: Optional[str]
+
+
+class SkippedFeatureSchema(BaseModel):
+    index: int
+    name: str
+    reason: str
+
+
+class GeoFieldInsertResponseSchema(BaseModel):
+    inserted: List[GeoFieldResponseSchema]
+    skipped: List[SkippedFeatureSchema]
+
+
+class GeoFieldImportResponseSchema(BaseModel):
+    received: int
+    inserted: int
+    # Features whose name or geometry fingerprint already exists
+    skipped: int
+    # Features whose geometry could not be read, the first `import_max_reported_invalid`
+    invalid: List[SkippedFeatureSchema]
+
+
+class FieldIntersectionSchema(BaseModel):
+    field_id: int
+    # Area of the intersection in square meters, and its share of the field area
+    area: float
+    overlap_ratio: Optional[float]
+
+
+class FeatureIntersectionsSchema(BaseModel):
+    index: int
+    # The name property of the query feature, echoed as sent
+    name: Optional[Any]
+    field_ids: List[int]
+    intersections: Optional[List[FieldIntersectionSchema]] = None
+
+
+class GeoFieldIntersectResponseSchema(BaseModel):
+    fields: List[GeoFieldResponseSchema]
+    features: List[FeatureIntersectionsSchema]
@@ -0,0 +1,29 @@
+from datetime import datetime
+from pydantic import BaseModel, ConfigDict
+from typing import List, Literal, Optional
+
+
+class JobFeatureResultSchema(BaseModel):
+    index: int
+    name: str
+    # done: the field has been stored, with the newest image found if any
+    # skipped: the feature conflicts with a stored field of the same name
+    # failed: the search or the write raised an error
+    status: Literal["done", "skipped", "failed"]
+    field_id: Optional[int] = None
+    image_url: Optional[str] = None
+    image_date: Optional[datetime] = None
+    error: Optional[str] = None
+
+
+class SatelliteImageJobSchema(BaseModel):
+    id: int
+    status: Literal["pending", "running", "completed", "failed"]
+    total: int
+    processed: int
+    results: List[JobFeatureResultSchema]
+    error: Optional[str]
+    created_at: datetime
+    updated_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
@@ -17,5 +17,88 @@ class Settings(BaseSettings):
     postgres_host: Optional[str] = None
     postgres_port: Optional[str] = None
 
+    # Connection pool shared by the whole application (see `src.main.lifespan`)
+    postgres_pool_size: int = 10
+    postgres_max_overflow: int = 20
+    postgres_pool_recycle: int = 1800  # seconds, -1 disables recycling
+    postgres_pool_pre_ping: bool = True
+    postgres_statement_timeout: int = 30000  # milliseconds, 0 disables the timeout
+    bulk_insert_chunk_size: int = 1000  # rows per multi-row INSERT statement
+
+    # Create the tables and apply the migrations when the application starts,
+    # instead of running `python -m src.database.postgres.migrate` before deploying
+    postgres_migrate_on_startup: bool = False
+
+    # Pagination of list endpoints
+    page_size_default: int = 100
+    page_size_max: int = 1000
+    export_batch_size: int = 1000  # rows fetched per server-side cursor round trip
+
+    # Streaming imports of GeoJSON files, through the API or the CLI
+    # (`python -m src.database.postgres.import_fields`)
+    import_batch_size: int = 5000  # features converted and copied per batch
+    import_max_feature_size: int = 16 * 1024 * 1024  # characters buffered per feature
+    import_max_reported_invalid: int = 100  # invalid features listed in the response
+
+    # Mapbox Vector Tile cache, invalidated for the tiles touched by every write
+    tile_cache_ttl: int = 300  # seconds
+    tile_cache_max_entries: int = 5000
+
+    # Serialized list, bbox and intersect responses, cached per geo_fields version
+    response_cache_ttl: int = 300  # seconds
+    response_cache_max_entries: int = 1000
+    response_cache_max_bytes: int = 64 * 1024 * 1024  # total size of the bodies
+    response_cache_max_body_bytes: int = 1024 * 1024  # larger bodies are not cached
+
+    # STAC API client
+    stac_api_url: str = "https://planetarycomputer.microsoft.com/api/stac/v1"
+    stac_catalog_path: Optional[str] = None  # local copy of the root catalog JSON
+    stac_collection: str = "sentinel-2-l2a"
+    stac_max_cloud_cover: float = 10.0
+    stac_timeout: float = 30.0  # seconds
+    stac_max_retries: int = 3
+    stac_max_concurrency: int = 16  # pooled HTTP connections / worker threads
+    stac_request_concurrency: int = 8  # concurrent searches fanned out per request
+
+    # Batched searches: nearby features share one search over their envelope
+    stac_batch_search: bool = True
+    stac_batch_cluster_distance: float = 0.05  # degrees between features of a cluster
+    # Degrees, larger clusters are searched per feature
+    stac_batch_max_extent: float = 0.5
+    stac_batch_max_items: int = 20  # newest scenes read per batched search
+
+    # STAC search result cache (in-process LRU in front of the shared table)
+    stac_cache_ttl: int = 86400  # seconds
+    stac_cache_negative_ttl: int = 3600  # seconds, for searches without an image
+    stac_cache_grid_size: float = 1e-6  # degrees, near-identical polygons share a key
+    stac_cache_max_entries: int = 10000
+    stac_cache_table_max_entries: int = 1000000  # trimmed by the image refresher
+
+    # Per-route latency histograms and the Server-Timing header of responses
+    # (the other metrics are still served at /metrics)
+    metrics_enabled: bool = True
+
+    # In-process spatial index of geo_fields answering intersect and bbox queries,
+    # kept up to date through LISTEN/NOTIFY (see `src.services.field_index_service`)
+    field_index_enabled: bool = False
+    field_index_retry_interval: float = 5.0  # seconds before listening again
+
+    # Requests for the same fields are coalesced across workers with advisory
+    # locks, each taking a slot of the shared lock table (max_locks_per_transaction)
+    field_lock_max_keys: int = 64  # larger requests rely on ON CONFLICT instead
+
+    # Background workers of asynchronous satellite image jobs
+    job_workers: int = 2  # 0 leaves queued jobs to other application instances
+    job_chunk_size: int = 50  # features processed and reported at a time
+    job_poll_interval: float = 2.0  # seconds between checks for new jobs
+    job_stale_after: int = 600  # seconds without progress before a job is retried
+
+    # Background refresh of satellite images older than `image_refresh_max_age`
+    image_refresh_interval: float = 60.0  # seconds between batches, 0 disables it
+    image_refresh_batch_size: int = 100
+    image_refresh_concurrency: int = 4  # concurrent STAC searches of the refresher
+    image_refresh_max_age: int = 604800  # seconds
+    image_refresh_recheck_after: int = 86400  # seconds before a field is searched again
+
 
 settings = Settings()
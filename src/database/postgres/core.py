@@ -1,10 +1,15 @@
+import asyncpg
 import logging
+import re
+import time
 
-from typing import Optional
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional
 
-from sqlalchemy import text
+from sqlalchemy import event, text
 from sqlalchemy.engine.url import URL
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from sqlalchemy.ext.asyncio import (
     AsyncSession,
     async_sessionmaker,
@@ -13,15 +18,88 @@ from sqlalchemy.ext.asyncio import (
 )
 
 from src.database.common.dependencies import BaseSQL
+from src.database.postgres.migrations import MIGRATIONS
 from src.config.base import settings
+from src.utils.metrics_utils import (
+    DB_POOL_CHECKOUT_SECONDS,
+    DB_STATEMENT_ERRORS,
+    DB_STATEMENT_SECONDS,
+    add_stage_time,
+)
 
 logger = logging.getLogger(__name__)
 
+# The first table a statement reads or writes, to label its latency
+_STATEMENT_TABLE = re.compile(r"\b(?:FROM|INTO|UPDATE|JOIN)\s+\"?(\w+)", re.IGNORECASE)
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """
+    The default pool of async engines, timing how long connections are waited for.
+    """
+
+    def _do_get(self) -> Any:
+        started_at = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            elapsed = time.perf_counter() - started_at
+            DB_POOL_CHECKOUT_SECONDS.observe(elapsed)
+            add_stage_time("pool", elapsed)
+
+
+@lru_cache(maxsize=1024)
+def _statement_labels(statement: str) -> Dict[str, str]:
+    """
+    Labels a statement with its operation and the first table it names.
+    """
+    words = statement.split(None, 1)
+    match = _STATEMENT_TABLE.search(statement)
+    return {
+        "operation": words[0].upper() if words else "",
+        "table": match.group(1) if match else "",
+    }
+
+
+def _before_cursor_execute(
+    conn, cursor, statement, parameters, context, executemany
+) -> None:
+    if context is not None:
+        context._started_at = time.perf_counter()
+
+
+def _after_cursor_execute(
+    conn, cursor, statement, parameters, context, executemany
+) -> None:
+    _observe_statement(statement, context)
+
+
+def _handle_error(exception_context) -> None:
+    statement = exception_context.statement
+    if statement is not None:
+        # The error may be raised before any execution context was created
+        if exception_context.execution_context is not None:
+            _observe_statement(statement, exception_context.execution_context)
+        DB_STATEMENT_ERRORS.inc(1.0, **_statement_labels(statement))
+
+
+def _observe_statement(statement: str, context: Any) -> None:
+    started_at = getattr(context, "_started_at", None)
+    if started_at is None:
+        return
+    context._started_at = None
+    elapsed = time.perf_counter() - started_at
+    DB_STATEMENT_SECONDS.observe(elapsed, **_statement_labels(statement))
+    add_stage_time("db", elapsed)
+
 
 class PostgreSQLCore:
     """
     A class to handle core PostgreSQL operations using SQLAlchemy.
 
+    Each instance owns an engine and its connection pool, so the application
+    should create a single instance and share it (see `src.main.lifespan`).
+
     Attributes:
         db_url (str): The database URL.
         engine: The SQLAlchemy engine.
@@ -44,14 +122,40 @@ class PostgreSQLCore:
             else self.build_db_url(database or settings.postgres_database)
         )
         self.base_model = BaseSQL
-        self.engine = create_async_engine(self.db_url)
+        self.engine = create_async_engine(
+            self.db_url,
+            pool_size=settings.postgres_pool_size,
+            max_overflow=settings.postgres_max_overflow,
+            pool_recycle=settings.postgres_pool_recycle,
+            pool_pre_ping=settings.postgres_pool_pre_ping,
+            poolclass=TimedQueuePool,
+            connect_args={
+                "server_settings": {
+                    "statement_timeout": str(settings.postgres_statement_timeout)
+                }
+            },
+        )
         self.session_factory = async_sessionmaker(
             bind=self.engine, expire_on_commit=False, class_=AsyncSession
         )
+        # Statement latencies, see `src.utils.metrics_utils.DB_STATEMENT_SECONDS`
+        event.listen(
+            self.engine.sync_engine, "before_cursor_execute", _before_cursor_execute
+        )
+        event.listen(
+            self.engine.sync_engine, "after_cursor_execute", _after_cursor_execute
+        )
+        event.listen(self.engine.sync_engine, "handle_error", _handle_error)
 
     async def initialize(self) -> None:
         await self.create_tables()
 
+    async def dispose(self) -> None:
+        """
+        Closes every pooled connection held by the engine.
+        """
+        await self.engine.dispose()
+
     @staticmethod
     def build_db_url(database: str) -> URL:
         """
@@ -74,10 +178,13 @@ class PostgreSQLCore:
 
     async def create_tables(self) -> None:
         """
-        Creates all tables in the database based on the SQLAlchemy models.
+        Creates all tables in the database based on the SQLAlchemy models,
+        then applies the schema migrations to tables that already existed.
         """
         async with self.engine.begin() as connection:
             await connection.run_sync(self.base_model.metadata.create_all)
+            for migration in MIGRATIONS:
+                await connection.execute(text(migration))
 
     async def drop_tables(self) -> None:
         """
@@ -87,6 +194,37 @@ class PostgreSQLCore:
         async with self.engine.begin() as connection:
             await connection.run_sync(self.base_model.metadata.drop_all)
 
+    async def listen(
+        self, channel: str, callback: Callable[[Optional[str]], None]
+    ) -> asyncpg.Connection:
+        """
+        Opens a connection listening to a notification channel.
+
+        The connection is dedicated to the channel, outside of the pool, and is
+        to be closed by the caller.
+
+        Args:
+            channel (str): The channel to LISTEN to.
+            callback (Callable[[Optional[str]], None]): Called with the payload of
+                every notification, and with None once the connection is lost,
+                as notifications may have been missed from then on.
+
+        Returns:
+            asyncpg.Connection: The listening connection.
+        """
+        connection = await asyncpg.connect(
+            host=self.db_url.host,
+            port=self.db_url.port,
+            user=self.db_url.username,
+            password=self.db_url.password,
+            database=self.db_url.database,
+        )
+        connection.add_termination_listener(lambda _: callback(None))
+        await connection.add_listener(
+            channel, lambda _connection, _pid, _channel, payload: callback(payload)
+        )
+        return connection
+
     async def health_check(self) -> bool:
         """
         Performs a health check on the database.
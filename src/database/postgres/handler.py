@@ -1,32 +1,241 @@
+import asyncio
+import hashlib
 import logging
+import numpy as np
+import secrets
+import shapely
 
-from geoalchemy2 import WKTElement
-from sqlalchemy import and_
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from geoalchemy2 import Geography
+from shapely import wkb
+from shapely.errors import ShapelyError
+from shapely.geometry import shape
+from sqlalchemy import (
+    JSON,
+    BigInteger,
+    Float,
+    Integer,
+    LargeBinary,
+    String,
+    and_,
+    cast,
+    column,
+    delete,
+    func,
+    literal,
+    table,
+    text,
+    update,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB, insert
 from sqlalchemy.engine.url import URL
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from typing import List
+from sqlalchemy.orm import defer
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Dict,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+)
 
-from src.api.v1.schemas.geo_schemas import GeoJSONSchema
+from src.api.v1.schemas.geo_schemas import (
+    GeoFieldImportResponseSchema,
+    GeoJSONSchema,
+    GeometryFormat,
+    SkippedFeatureSchema,
+)
+from src.config.base import settings
 from src.database.postgres.core import PostgreSQLCore
-from src.models.geo_models import GeoField
+from src.models.geo_models import LOD_ZOOMS, SRID, GeoField
+from src.models.job_models import SatelliteImageJob
+from src.models.stac_models import StacSearchCache
+from src.models.version_models import TableVersion
 from src.services.stac_service import STAC
-from src.utils.geo_utils import extract_info_geojson
+from src.utils.cache_utils import SingleFlight, TTLCache
+from src.utils.index_utils import GeometryIndex
+from src.utils.geo_utils import (
+    geojson_to_geometries,
+    geometries_to_ewkb,
+    geometry_fingerprint,
+    geometry_fingerprints,
+)
+from src.utils.tile_utils import (
+    TILE_BUFFER,
+    TILE_EXTENT,
+    bounds_intersect,
+    tile_bounds,
+    zoom_tolerance,
+)
 
 logger = logging.getLogger(__name__)
 
+_MISSING = object()
+
+# ST_AsGeoJSON rounds to 9 decimals by default, keep the precision of ST_AsText
+_GEOJSON_DECIMAL_DIGITS = 15
+
+# Advisory lock taken to claim a batch of stale images, see `refresh_stale_images`.
+# Its two-key form cannot collide with the field locks of `_lock_fields`.
+_REFRESH_LOCK_KEYS = (0x67656F, 1)
+
+# Channel notified with the ids of the GeoFields written, see `_record_field_changes`
+GEO_FIELDS_CHANNEL = "geo_fields"
+# Ids per notification, whose payload is limited to 8000 bytes
+_NOTIFY_CHUNK_SIZE = 500
+
+# Staging table the features of an import are copied into, see `import_geo_fields`
+_IMPORT_TABLE = table(
+    "geo_fields_import",
+    column("position", BigInteger),
+    column("name", String),
+    column("geom", LargeBinary),
+    column("fingerprint", String),
+)
+_CREATE_IMPORT_TABLE = text(
+    f"CREATE TEMPORARY TABLE {_IMPORT_TABLE.name} (position bigint, name text, "
+    "geom bytea, fingerprint varchar(64)) ON COMMIT DROP"
+)
+# Raised when a GeoJSON geometry of an imported feature cannot be read
+_INVALID_GEOMETRY_ERRORS = (LookupError, TypeError, ValueError, ShapelyError)
+
+
+def _parse_image_date(value: Optional[str]) -> Optional[datetime]:
+    """
+    Parses the ISO 8601 capture datetime of a STAC item.
+    """
+    return datetime.fromisoformat(value.replace("Z", "+00:00")) if value else None
+
 
 class PostgreSQLHandler(PostgreSQLCore):
     """
     A subclass of PostgreSQLHandler to handle database queries.
+
+    Attributes:
+        stac_cache (TTLCache): In-process cache of STAC search results, in front
+            of the `stac_search_cache` table shared by every worker.
+        stac_cache_stats (Counter): Hit and miss counters of the STAC cache tiers,
+            and the number of searches shared with an identical in-flight search.
+        tile_cache (TTLCache): In-process cache of vector tiles, keyed by (z, x, y),
+            invalidated for the tiles touched by every write, of any worker.
+        response_cache (TTLCache): In-process cache of serialized responses built
+            from GeoFields, with the `geo_fields_version` they were built at.
+        field_index (GeometryIndex, optional): In-process spatial index of every
+            GeoField answering intersect and bounding box queries, if
+            `field_index_enabled`. It is loaded and kept up to date by
+            `GeoFieldIndexListener`, as is the `tile_cache`.
     """
 
+    def __init__(
+        self, db_url: Optional[URL] = None, database: Optional[str] = None
+    ) -> None:
+        super().__init__(db_url=db_url, database=database)
+        self.stac_cache = TTLCache(
+            maxsize=settings.stac_cache_max_entries, ttl=settings.stac_cache_ttl
+        )
+        self.stac_cache_stats: Counter = Counter()
+        # In-flight STAC searches by cache key, and fields being written by fingerprint
+        self._stac_flights: SingleFlight[str] = SingleFlight()
+        self._field_flights: SingleFlight[str] = SingleFlight()
+        self.tile_cache = TTLCache(
+            maxsize=settings.tile_cache_max_entries, ttl=settings.tile_cache_ttl
+        )
+        self._tile_generation = 0
+        self.response_cache = TTLCache(
+            maxsize=settings.response_cache_max_entries,
+            ttl=settings.response_cache_ttl,
+            maxbytes=settings.response_cache_max_bytes,
+        )
+        self.field_index = GeometryIndex() if settings.field_index_enabled else None
+        self._field_index_lock = asyncio.Lock()
+        # Tells the notifications of this handler apart from those of other workers
+        self._instance_id = secrets.token_hex(8)
+
+    async def initialize(self) -> None:
+        await super().initialize()
+        await self.backfill_fingerprints()
+
+    async def backfill_fingerprints(self, batch_size: int = 1000) -> int:
+        """
+        Computes the missing fingerprints of existing GeoFields.
+
+        Rows whose geometry duplicates a row that already has the fingerprint
+        keep a NULL fingerprint, so the unique index still holds.
+
+        Args:
+            batch_size (int, optional): The number of rows updated per statement.
+
+        Returns:
+            int: The number of rows that received a fingerprint.
+        """
+        filled, last_id = 0, 0
+        async with self.session_factory() as session:
+            while True:
+                rows = (
+                    await session.execute(
+                        select(GeoField.id, func.ST_AsBinary(GeoField.geom))
+                        .where(GeoField.fingerprint.is_(None), GeoField.id > last_id)
+                        .order_by(GeoField.id)
+                        .limit(batch_size)
+                    )
+                ).all()
+                if not rows:
+                    break
+                last_id = rows[-1][0]
+
+                fingerprints: Dict[str, int] = {}
+                for field_id, geom in rows:
+                    fingerprints.setdefault(
+                        geometry_fingerprint(wkb.loads(bytes(geom))), field_id
+                    )
+                taken = await session.scalars(
+                    select(GeoField.fingerprint).where(
+                        GeoField.fingerprint.in_(fingerprints)
+                    )
+                )
+                for fingerprint in taken:
+                    fingerprints.pop(fingerprint, None)
+
+                if fingerprints:
+                    await session.execute(
+                        update(GeoField),
+                        [
+                            {"id": field_id, "fingerprint": fingerprint}
+                            for fingerprint, field_id in fingerprints.items()
+                        ],
+                    )
+                    filled += len(fingerprints)
+            await session.commit()
+
+        if filled:
+            logger.info(f"Backfilled {filled} GeoField fingerprints")
+        return filled
+
     async def retrieve_satellite_image(self, geojson: GeoJSONSchema) -> List[GeoField]:
         """
         Retrieves satellite images for the given GeoJSON.
 
         Processes each feature in the GeoJSON, checks for existing satellite
-        images in the database, and fetches new images if necessary.
+        images in the database, and fetches new images if necessary. The
+        missing images are searched concurrently.
+
+        All features are matched against `geo_fields` in one set-based query, and
+        every update and insert is persisted in a single transaction. New fields
+        that conflict with an existing row are skipped without aborting the rest.
+
+        Concurrent requests for the same fields are coalesced: a request first
+        waits for the requests of this worker processing any of its fields, and
+        finds the images they stored. No connection is held while the images
+        are searched, as a search can outlast any statement. The fields are then
+        written in a short transaction, which waits for other workers writing
+        the same fields through advisory locks (see `_lock_fields`) and keeps the
+        images they stored in the meantime.
 
         Args:
             geojson (GeoJSONSchema): The GeoJSON containing features to process.
@@ -35,109 +244,1521 @@ class PostgreSQLHandler(PostgreSQLCore):
             List[GeoField]: A list of GeoField objects, either retrieved from the database or
                 newly fetched.
         """
-        result: List[GeoField] = []
+        names, geoms, ewkbs, fingerprints = self._encode_features(geojson)
+        while in_flight := self._field_flights.in_flight(fingerprints):
+            await asyncio.wait(in_flight)
+        led, _ = self._field_flights.claim(fingerprints)
+        try:
+            return await self._retrieve_satellite_image(
+                names, geoms, ewkbs, fingerprints
+            )
+        finally:
+            self._field_flights.finish(dict.fromkeys(led))
+
+    async def _retrieve_satellite_image(
+        self,
+        names: List[str],
+        geoms: List[Dict[str, Any]],
+        ewkbs: List[bytes],
+        fingerprints: List[str],
+    ) -> List[GeoField]:
+        chunk_size = settings.bulk_insert_chunk_size
+        # Match all features against the existing GeoFields with the same geometry
         async with self.session_factory() as session:
-            for feature in geojson.features:
-                name, geom, ewkt_polygon = extract_info_geojson(feature)
+            existing = await self._fields_by_fingerprint(session, fingerprints)
 
-                # Check for existing GeoField with the same geometry
-                query = await session.execute(
-                    select(GeoField).where(
-                        GeoField.geom.ST_Equals(WKTElement(ewkt_polygon))
+        pending: List[Tuple[str, Dict[str, Any], bytes, str]] = []
+        seen = set()
+        for name, geom, ewkb, fingerprint in zip(names, geoms, ewkbs, fingerprints):
+            geofield_item = existing.get(fingerprint)
+            if geofield_item and geofield_item.image_url:
+                continue  # Skip if image_url already exists
+
+            # Process every field once, even if the request repeats a geometry
+            if fingerprint in seen:
+                continue
+            seen.add(fingerprint)
+            pending.append((name, geom, ewkb, fingerprint))
+        if not pending:
+            return []
+
+        # Search the newest satellite images for all features concurrently
+        images = await self.newest_satellite_images([item[1] for item in pending])
+
+        searched = [item[3] for item in pending]
+        async with self.session_factory() as session:
+            # Wait for other workers writing the same fields, and read them again
+            await self._lock_fields(session, searched)
+            current = await self._fields_by_fingerprint(session, searched)
+
+            updated: Dict[str, GeoField] = {}
+            new_rows: List[Dict[str, Any]] = []
+            written_geoms = []
+            for (name, geom, ewkb, fingerprint), image in zip(pending, images):
+                geofield_item = current.get(fingerprint)
+                if geofield_item and geofield_item.image_url:
+                    continue  # Stored by a concurrent request while searching
+
+                new_image_url, image_date = image or (None, None)
+                written_geoms.append(geom)
+                if geofield_item:
+                    geofield_item.image_url = new_image_url  # type: ignore[assignment]
+                    parsed_date = _parse_image_date(image_date)
+                    geofield_item.image_date = parsed_date  # type: ignore[assignment]
+                    updated[fingerprint] = geofield_item
+                else:
+                    new_rows.append(
+                        {
+                            "name": name,
+                            "geom": func.ST_GeomFromEWKB(ewkb),
+                            "fingerprint": fingerprint,
+                            "image_url": new_image_url,
+                            "image_date": _parse_image_date(image_date),
+                        }
                     )
+
+            # Updates are flushed as one batch, inserts skip conflicting rows
+            await session.flush()
+            inserted: Dict[str, GeoField] = {}
+            for offset in range(0, len(new_rows), chunk_size):
+                statement = (
+                    insert(GeoField)
+                    .values(new_rows[offset : offset + chunk_size])
+                    .on_conflict_do_nothing()
+                    .returning(GeoField)
                 )
-                geofield_item = query.scalar_one_or_none()
+                for item in await session.scalars(statement):
+                    inserted[item.fingerprint] = item  # type: ignore[index]
 
-                if geofield_item:
-                    if geofield_item.image_url:  # Skip if image_url already exists
-                        continue
+            # Fields inserted meanwhile by a request that was not locked out
+            if conflicting := [
+                str(row["fingerprint"])
+                for row in new_rows
+                if row["fingerprint"] not in inserted
+            ]:
+                inserted.update(await self._fields_by_fingerprint(session, conflicting))
+            written_ids = [item.id for item in updated.values()] + [
+                item.id for item in inserted.values()
+            ]
+            await self._record_field_changes(session, written_ids)
+            await session.commit()
 
-                    # Update existing GeoField's image URL and date
-                    new_image_url, datetime = await STAC.newest_satellite_image(geom)  # type: ignore[arg-type]
-                    geofield_item.image_url = new_image_url  # type: ignore[assignment]
-                    geofield_item.image_date = datetime  # type: ignore[assignment]
-
-                elif not geofield_item:
-                    # Create a GeoField and update the associated satellite image.
-                    new_image_url, datetime = await STAC.newest_satellite_image(geom)  # type: ignore[arg-type]
-                    geofield_item = GeoField(
-                        name=name,
-                        geom=ewkt_polygon,
-                        image_url=new_image_url,
-                        image_date=datetime,
+        self._invalidate_tiles(written_geoms)
+        await self.refresh_field_index(written_ids)
+        fields = {**updated, **inserted}
+        return [fields[item[3]] for item in pending if item[3] in fields]
+
+    @staticmethod
+    async def _fields_by_fingerprint(
+        session: AsyncSession, fingerprints: Sequence[str]
+    ) -> Dict[str, GeoField]:
+        """
+        Reads the GeoFields with the given fingerprints, by chunks of
+        `bulk_insert_chunk_size`. Fields already loaded in the session are refreshed.
+        """
+        chunk_size = settings.bulk_insert_chunk_size
+        fields: Dict[str, GeoField] = {}
+        for offset in range(0, len(fingerprints), chunk_size):
+            query = await session.scalars(
+                select(GeoField)
+                .where(
+                    GeoField.fingerprint.in_(fingerprints[offset : offset + chunk_size])
+                )
+                .execution_options(populate_existing=True)
+            )
+            fields.update((item.fingerprint, item) for item in query)  # type: ignore[misc]
+        return fields
+
+    @staticmethod
+    async def _lock_fields(session: AsyncSession, fingerprints: Sequence[str]) -> bool:
+        """
+        Takes the transaction-level advisory locks of the given fingerprints.
+
+        The locks are held until the session commits, so a concurrent request
+        for the same fields waits until their images are stored. It must only
+        be taken for a short transaction, as waiting for a lock counts against
+        the `postgres_statement_timeout` of the waiting request. They are taken
+        in key order, so requests sharing fields cannot deadlock. As every lock
+        takes a slot of the shared lock table, requests with more than
+        `field_lock_max_keys` fields are not locked, and rely on `ON CONFLICT`.
+
+        Args:
+            session (AsyncSession): The session of the transaction holding the locks.
+            fingerprints (Sequence[str]): The fingerprints of the fields to lock.
+
+        Returns:
+            bool: Whether the locks were taken.
+        """
+        if not fingerprints or len(fingerprints) > settings.field_lock_max_keys:
+            return False
+
+        keys = sorted(
+            {
+                int.from_bytes(bytes.fromhex(fingerprint[:16]), "big", signed=True)
+                for fingerprint in fingerprints
+            }
+        )
+        await session.execute(
+            select(
+                func.pg_advisory_xact_lock(
+                    func.unnest(literal(keys, ARRAY(BigInteger)))
+                )
+            )
+        )
+        return True
+
+    async def create_satellite_image_job(
+        self, geojson: GeoJSONSchema
+    ) -> SatelliteImageJob:
+        """
+        Queues the features of a GeoJSON object for the background workers.
+
+        Args:
+            geojson (GeoJSONSchema): The GeoJSON containing features to process.
+
+        Returns:
+            SatelliteImageJob: The pending job.
+        """
+        job = SatelliteImageJob(
+            status="pending",
+            features=[feature.model_dump() for feature in geojson.features],
+            results=[],
+            total=len(geojson.features),
+            processed=0,
+        )
+        async with self.session_factory() as session:
+            session.add(job)
+            await session.commit()
+        return job
+
+    async def get_satellite_image_job(self, job_id: int) -> Optional[SatelliteImageJob]:
+        """
+        Retrieves a satellite image job and its per-feature results, without its
+        input features.
+        """
+        async with self.session_factory() as session:
+            return await session.scalar(
+                select(SatelliteImageJob)
+                .options(defer(SatelliteImageJob.features))  # type: ignore[arg-type]
+                .where(SatelliteImageJob.id == job_id)
+            )
+
+    async def claim_satellite_image_job(self) -> Optional[SatelliteImageJob]:
+        """
+        Claims the oldest pending job for the calling worker.
+
+        Jobs are locked with `FOR UPDATE SKIP LOCKED`, so concurrent workers, in
+        this or another application instance, never claim the same job. A running
+        job without progress for `job_stale_after` seconds is claimed again, and
+        resumes after its last processed feature.
+
+        Returns:
+            Optional[SatelliteImageJob]: The claimed job, or None if the queue is empty.
+        """
+        stale = datetime.now(timezone.utc) - timedelta(seconds=settings.job_stale_after)
+        claimable = (
+            select(SatelliteImageJob.id)
+            .where(
+                (SatelliteImageJob.status == "pending")
+                | (
+                    (SatelliteImageJob.status == "running")
+                    & (SatelliteImageJob.updated_at < stale)
+                )
+            )
+            .order_by(SatelliteImageJob.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        statement = (
+            update(SatelliteImageJob)
+            .where(SatelliteImageJob.id == claimable)
+            .values(status="running", updated_at=func.now())
+            .returning(SatelliteImageJob)
+            .execution_options(synchronize_session=False)
+        )
+        async with self.session_factory() as session:
+            job = await session.scalar(statement)
+            await session.commit()
+        return job
+
+    async def run_satellite_image_job(self, job: SatelliteImageJob) -> bool:
+        """
+        Processes the remaining features of a claimed job, `job_chunk_size` at a time.
+
+        The results of every chunk are appended to the job together with its
+        progress, in one statement that only succeeds if no other worker has
+        taken over the job in the meantime.
+
+        Args:
+            job (SatelliteImageJob): A job returned by `claim_satellite_image_job`.
+
+        Returns:
+            bool: True if the job was completed, False if another worker took it over.
+        """
+        chunk_size = settings.job_chunk_size
+        for offset in range(job.processed, job.total, chunk_size):
+            results = await self._run_satellite_image_chunk(
+                offset, job.features[offset : offset + chunk_size]  # type: ignore[arg-type]
+            )
+            async with self.session_factory() as session:
+                progress = await session.execute(
+                    update(SatelliteImageJob)
+                    .where(
+                        SatelliteImageJob.id == job.id,
+                        SatelliteImageJob.processed == offset,
                     )
-                    session.add(geofield_item)
+                    .values(
+                        results=SatelliteImageJob.results.op("||")(
+                            literal(results, JSONB)
+                        ),
+                        processed=SatelliteImageJob.processed + len(results),
+                        updated_at=func.now(),
+                    )
+                    .execution_options(synchronize_session=False)
+                )
+                await session.commit()
+            if not progress.rowcount:  # type: ignore[attr-defined]
+                return False
 
-                result.append(geofield_item)
-                try:
-                    await session.commit()
-                except IntegrityError:
-                    await session.rollback()
+        await self.finish_satellite_image_job(job.id)
+        return True
+
+    async def _run_satellite_image_chunk(
+        self, offset: int, features: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Retrieves the satellite images of a chunk of job features.
 
-        return result
+        Returns:
+            List[Dict[str, Any]]: One `JobFeatureResultSchema` compatible result
+                per feature.
+        """
+        geojson = GeoJSONSchema(
+            type="FeatureCollection", features=features  # type: ignore[arg-type]
+        )
+        names, _, _, fingerprints = self._encode_features(geojson)
+        try:
+            await self.retrieve_satellite_image(geojson)
+        except Exception as e:
+            logger.exception(f"Satellite image job chunk at {offset} failed")
+            return [
+                {
+                    "index": offset + index,
+                    "name": name,
+                    "status": "failed",
+                    "error": str(e),
+                }
+                for index, name in enumerate(names)
+            ]
+
+        async with self.session_factory() as session:
+            rows = await session.execute(
+                select(
+                    GeoField.id,
+                    GeoField.fingerprint,
+                    GeoField.image_url,
+                    GeoField.image_date,
+                ).where(GeoField.fingerprint.in_(set(fingerprints)))
+            )
+            fields = {row.fingerprint: row for row in rows}
 
-    async def insert_geo_fields(self, geojson: GeoJSONSchema) -> List[GeoField]:
+        results = []
+        for index, (name, fingerprint) in enumerate(zip(names, fingerprints)):
+            result: Dict[str, Any] = {"index": offset + index, "name": name}
+            if field := fields.get(fingerprint):
+                result.update(
+                    status="done",
+                    field_id=field.id,
+                    image_url=field.image_url,
+                    image_date=field.image_date and field.image_date.isoformat(),
+                )
+            else:
+                result.update(
+                    status="skipped", error="A field with this name already exists"
+                )
+            results.append(result)
+        return results
+
+    async def finish_satellite_image_job(
+        self, job_id: int, error: Optional[str] = None
+    ) -> None:
+        """
+        Marks a job as completed, or as failed with the given error.
+        """
+        async with self.session_factory() as session:
+            await session.execute(
+                update(SatelliteImageJob)
+                .where(SatelliteImageJob.id == job_id)
+                .values(
+                    status="failed" if error else "completed",
+                    error=error,
+                    updated_at=func.now(),
+                )
+                .execution_options(synchronize_session=False)
+            )
+            await session.commit()
+
+    async def release_satellite_image_job(self, job_id: int) -> None:
+        """
+        Puts a running job back in the queue, e.g. when its worker shuts down.
+        """
+        async with self.session_factory() as session:
+            await session.execute(
+                update(SatelliteImageJob)
+                .where(
+                    SatelliteImageJob.id == job_id,
+                    SatelliteImageJob.status == "running",
+                )
+                .values(status="pending")
+                .execution_options(synchronize_session=False)
+            )
+            await session.commit()
+
+    async def newest_satellite_images(
+        self, geoms: Sequence[Dict[str, Any]]
+    ) -> List[Optional[Tuple[str, str]]]:
+        """
+        Retrieves the newest satellite image for each geometry through the STAC cache.
+
+        Searches are looked up in the in-process cache first, then in the
+        shared `stac_search_cache` table, and only the remaining ones are sent
+        to the STAC API. A search identical to one already in flight in this
+        worker waits for its result instead. Fresh results are written back to
+        both tiers.
+
+        The table is read and written in sessions of their own, so it must not
+        be awaited while holding a session: every request would need two
+        connections, and a busy pool would deadlock.
+
+        Args:
+            geoms (Sequence[Dict[str, Any]]): The GeoJSON geometries to search for.
+
+        Returns:
+            List[Optional[Tuple[str, str]]]: The image URL and capture datetime for
+                each geometry, or None if no image is found, in the order of `geoms`.
+        """
+        keys = [STAC.cache_key(geom) for geom in geoms]
+        found: Dict[str, Optional[Tuple[str, str]]] = {}
+
+        for key in set(keys):
+            cached = self.stac_cache.get(key, default=_MISSING)
+            if cached is not _MISSING:
+                found[key] = cached
+        self.stac_cache_stats["memory_hits"] += len(found)
+
+        if missing := [key for key in set(keys) if key not in found]:
+            async with self.session_factory() as session:
+                rows = await session.execute(
+                    select(StacSearchCache).where(
+                        StacSearchCache.key.in_(missing),
+                        StacSearchCache.expires_at > datetime.now(timezone.utc),
+                    )
+                )
+                for row in rows.scalars():
+                    image: Optional[Tuple[str, str]] = (
+                        (row.image_url, row.image_date)  # type: ignore[assignment]
+                        if row.image_url
+                        else None
+                    )
+                    found[row.key] = image  # type: ignore[index]
+                    self.stac_cache.set(row.key, image, ttl=self._stac_cache_ttl(image))
+                    self.stac_cache_stats["table_hits"] += 1
+
+        search_geoms = {key: geom for key, geom in zip(keys, geoms) if key not in found}
+        # Searches already running in this worker are awaited, not sent again
+        led, joined = self._stac_flights.claim(search_geoms)
+        self.stac_cache_stats["misses"] += len(led)
+        self.stac_cache_stats["shared_searches"] += len(joined)
+        if led:
+            try:
+                images = await STAC.newest_satellite_images(
+                    [search_geoms[key] for key in led]
+                )
+            except BaseException as e:
+                self._stac_flights.fail(led, e)
+                raise
+            results = dict(zip(led, images))
+            self._stac_flights.finish(results)
+            found.update(results)
+            await self._store_stac_results(results)  # type: ignore[arg-type]
+        for key, future in joined.items():
+            found[key] = await asyncio.shield(future)
+
+        return [found[key] for key in keys]
+
+    async def refresh_stale_images(self, interval: float = 0.0) -> int:
+        """
+        Searches newer satellite images for one batch of GeoFields with stale images.
+
+        Fields whose image is older than `image_refresh_max_age` are read oldest
+        first, through the index on `image_date`, skipping those already searched
+        in the last `image_refresh_recheck_after` seconds. The batch is claimed
+        before it is searched, by setting its `image_checked_at` with `FOR UPDATE
+        SKIP LOCKED`, so refreshers in other workers never search the same fields.
+        Claims are serialized by an advisory lock, and no batch is claimed if
+        another one was in the last `interval` seconds, so the STAC API sees one
+        batch per interval however many workers run a refresher. The searches
+        bypass the STAC cache, and their results are written back to it. Fields
+        are updated in one batch, and keep their image if no newer one is found.
+
+        Args:
+            interval (float, optional): The seconds between batches of all workers.
+
+        Returns:
+            int: The number of fields searched for.
+        """
+        now = datetime.now(timezone.utc)
+        stale = (
+            select(GeoField.id)
+            .where(
+                GeoField.image_date
+                < now - timedelta(seconds=settings.image_refresh_max_age),
+                GeoField.image_checked_at.is_(None)
+                | (
+                    GeoField.image_checked_at
+                    < now - timedelta(seconds=settings.image_refresh_recheck_after)
+                ),
+            )
+            .order_by(GeoField.image_date)
+            .limit(settings.image_refresh_batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        claim = (
+            update(GeoField)
+            .where(GeoField.id.in_(stale))
+            .values(image_checked_at=now)
+            .returning(
+                GeoField.id,
+                func.ST_AsGeoJSON(GeoField.geom, _GEOJSON_DECIMAL_DIGITS)
+                .cast(JSON)
+                .label("geom"),
+                GeoField.image_date,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        async with self.session_factory() as session:
+            locked = await session.scalar(
+                select(func.pg_try_advisory_xact_lock(*_REFRESH_LOCK_KEYS))
+            )
+            if not locked:
+                return 0
+            if interval > 0 and await session.scalar(
+                select(
+                    select(GeoField.id)
+                    .where(
+                        GeoField.image_checked_at > now - timedelta(seconds=interval)
+                    )
+                    .exists()
+                )
+            ):
+                return 0
+            rows = (await session.execute(claim)).all()
+            await session.commit()
+        if not rows:
+            return 0
+
+        geoms = [row.geom for row in rows]
+        images = await STAC.newest_satellite_images(
+            geoms, concurrency=settings.image_refresh_concurrency
+        )
+        await self._store_stac_results(
+            {STAC.cache_key(geom): image for geom, image in zip(geoms, images)}
+        )
+
+        refreshed, checked, refreshed_geoms = [], [], []
+        for row, image in zip(rows, images):
+            image_date = _parse_image_date(image[1]) if image else None
+            if image and image_date > row.image_date:
+                refreshed.append(
+                    {
+                        "id": row.id,
+                        "image_url": image[0],
+                        "image_date": image_date,
+                        "image_checked_at": now,
+                    }
+                )
+                refreshed_geoms.append(row.geom)
+            else:
+                checked.append({"id": row.id, "image_checked_at": now})
+
+        refreshed_ids = [values["id"] for values in refreshed]
+        async with self.session_factory() as session:
+            for values in (refreshed, checked):
+                if values:
+                    await session.execute(update(GeoField), values)
+            await self._record_field_changes(session, refreshed_ids)
+            await session.commit()
+
+        self._invalidate_tiles(refreshed_geoms)
+        await self.refresh_field_index(refreshed_ids)
+        logger.info(f"Refreshed {len(refreshed)} of {len(rows)} stale satellite images")
+        return len(rows)
+
+    async def _store_stac_results(
+        self, results: Dict[str, Optional[Tuple[str, str]]]
+    ) -> None:
+        """
+        Writes STAC search results to both cache tiers and evicts expired table entries.
+
+        Searches without an image are cached for `stac_cache_negative_ttl` only.
+        The size of the table is bounded by `trim_stac_cache`, off the request path.
+        """
+        now = datetime.now(timezone.utc)
+        values = []
+        for key, image in results.items():
+            ttl = self._stac_cache_ttl(image)
+            self.stac_cache.set(key, image, ttl=ttl)
+            image_url, image_date = image or (None, None)
+            values.append(
+                {
+                    "key": key,
+                    "image_url": image_url,
+                    "image_date": image_date,
+                    "expires_at": now + timedelta(seconds=ttl),
+                }
+            )
+
+        statement = insert(StacSearchCache).values(values)
+        statement = statement.on_conflict_do_update(
+            index_elements=[StacSearchCache.key],
+            set_={
+                "image_url": statement.excluded.image_url,
+                "image_date": statement.excluded.image_date,
+                "expires_at": statement.excluded.expires_at,
+            },
+        )
+        async with self.session_factory() as session:
+            await session.execute(statement)
+            await session.execute(
+                delete(StacSearchCache).where(StacSearchCache.expires_at <= now)
+            )
+            await session.commit()
+
+    async def trim_stac_cache(self) -> None:
+        """
+        Trims the STAC cache table to `stac_cache_table_max_entries` entries, by
+        dropping those closest to expiry.
+
+        Finding them reads the index on `expires_at` up to the limit, so this is
+        run periodically by `SatelliteImageRefresher` rather than on every write.
+        """
+        cutoff = (
+            select(StacSearchCache.expires_at)
+            .order_by(StacSearchCache.expires_at.desc())
+            .offset(settings.stac_cache_table_max_entries)
+            .limit(1)
+            .scalar_subquery()
+        )
+        async with self.session_factory() as session:
+            await session.execute(
+                delete(StacSearchCache).where(StacSearchCache.expires_at <= cutoff)
+            )
+            await session.commit()
+
+    @staticmethod
+    def _stac_cache_ttl(image: Optional[Tuple[str, str]]) -> int:
+        return settings.stac_cache_ttl if image else settings.stac_cache_negative_ttl
+
+    async def insert_geo_fields(
+        self, geojson: GeoJSONSchema
+    ) -> Tuple[List[GeoField], List[SkippedFeatureSchema]]:
         """
         Inserts new geo fields based on the provided GeoJSON data.
 
-        Each feature in the GeoJSON data is extracted and stored as a new GeoField in the database.
-        If a database integrity error occurs (e.g., a duplicate entry), the transaction is rolled back.
+        All features are written with multi-row `INSERT ... ON CONFLICT DO NOTHING
+        RETURNING` statements of at most `bulk_insert_chunk_size` rows, in a single
+        transaction. Features whose name or geometry fingerprint already exists,
+        either in the database or earlier in the same payload, are skipped and
+        reported back.
 
         Args:
             geojson (GeoJSONSchema): The GeoJSON data containing geo field information.
 
         Returns:
-            List[GeoField]: A list of successfully inserted GeoField instances.
-
-        Raises:
-            IntegrityError: If a database integrity issue occurs during the insert operation.
+            Tuple[List[GeoField], List[SkippedFeatureSchema]]: The inserted GeoField
+                instances and the skipped features, both in payload order.
         """
-        result: List[GeoField] = []
+        names, geoms, ewkbs, fingerprints = self._encode_features(geojson)
+        rows: List[Dict[str, Any]] = [
+            {
+                "name": name,
+                "geom": func.ST_GeomFromEWKB(ewkb),
+                "fingerprint": fingerprint,
+            }
+            for name, ewkb, fingerprint in zip(names, ewkbs, fingerprints)
+        ]
+
+        inserted_by_key: Dict[Tuple[str, str], GeoField] = {}
+        chunk_size = settings.bulk_insert_chunk_size
         async with self.session_factory() as session:
-            for feature in geojson.features:
-                name, geom, ewkt_polygon = extract_info_geojson(feature)
+            for offset in range(0, len(rows), chunk_size):
+                statement = (
+                    insert(GeoField)
+                    .values(rows[offset : offset + chunk_size])
+                    .on_conflict_do_nothing()
+                    .returning(GeoField)
+                )
+                for item in await session.scalars(statement):
+                    inserted_by_key[(item.name, item.fingerprint)] = item  # type: ignore[index]
+
+            # Match the returned rows back to the features that produced them
+            inserted: List[GeoField] = []
+            inserted_geoms: List[Dict[str, Any]] = []
+            skipped_rows: List[Tuple[int, str]] = []
+            for index, row in enumerate(rows):
+                if item := inserted_by_key.pop((row["name"], row["fingerprint"]), None):
+                    inserted.append(item)
+                    inserted_geoms.append(geoms[index])
+                else:
+                    skipped_rows.append((index, row["name"]))
 
-                new_item = GeoField(
-                    name=name,
-                    geom=ewkt_polygon,
+            taken_names = set()
+            if skipped_rows:
+                taken_names = set(
+                    await session.scalars(
+                        select(GeoField.name).where(
+                            GeoField.name.in_({name for _, name in skipped_rows})
+                        )
+                    )
                 )
-                session.add(new_item)
-                try:
-                    await session.commit()
-                    result.append(new_item)
-                except IntegrityError:
-                    await session.rollback()
-        return result
+            inserted_ids = [item.id for item in inserted]
+            await self._record_field_changes(session, inserted_ids)
+            await session.commit()
+
+        self._invalidate_tiles(inserted_geoms)
+        await self.refresh_field_index(inserted_ids)
+        skipped = [
+            SkippedFeatureSchema(
+                index=index,
+                name=name,
+                reason=(
+                    "duplicate name" if name in taken_names else "duplicate geometry"
+                ),
+            )
+            for index, name in skipped_rows
+        ]
+        return inserted, skipped
+
+    async def import_geo_fields(
+        self, batches: AsyncIterable[Sequence[Mapping[str, Any]]]
+    ) -> GeoFieldImportResponseSchema:
+        """
+        Imports a stream of GeoJSON Features, one batch at a time.
+
+        Each batch is converted in a worker thread while the previous one is
+        written: it is copied with a binary `COPY` into a temporary staging
+        table, which is merged into `geo_fields` with `INSERT ... SELECT ... ON
+        CONFLICT DO NOTHING`. As with `insert_geo_fields`, features whose name or
+        geometry fingerprint already exists are skipped. Every batch is written
+        in its own transaction, and applied to the caches and the `field_index`
+        once committed, so only two batches are held in memory. An import that
+        fails keeps the batches written before, which are skipped as duplicates
+        when it is run again.
+
+        Args:
+            batches (AsyncIterable[Sequence[Mapping[str, Any]]]): The Features,
+                e.g. as parsed by `src.utils.stream_utils.read_feature_batches`.
 
-    async def retrieve_geo_fields(self) -> List[GeoField]:
+        Returns:
+            GeoFieldImportResponseSchema: The number of features received,
+                inserted and skipped, and the features with an invalid geometry.
         """
-        Retrieves a list of all GeoField objects from the database.
+        received = staged = inserted = 0
+        reported = settings.import_max_reported_invalid
+        invalid: List[SkippedFeatureSchema] = []
+        encoding: Optional[asyncio.Future] = None
+
+        async def _write(encoded: asyncio.Future) -> None:
+            nonlocal staged, inserted
+            records, errors = await encoded
+            async with self.session_factory() as session:
+                connection = await (await session.connection()).get_raw_connection()
+                await session.execute(_CREATE_IMPORT_TABLE)
+                field_ids = await self._merge_import_batch(
+                    session, connection.driver_connection, records
+                )
+                await self._record_field_changes(session, field_ids)
+                await session.commit()
+
+            staged += len(records)
+            inserted += len(field_ids)
+            invalid.extend(errors[: reported - len(invalid)])
+            if field_ids:
+                # Imports are too large to drop the overlapping tiles one by one
+                self._tile_generation += 1
+                self.tile_cache.clear()
+            await self.refresh_field_index(field_ids)
+
+        try:
+            async for batch in batches:
+                previous, encoding = encoding, asyncio.ensure_future(
+                    asyncio.to_thread(self._encode_import_batch, batch, received)
+                )
+                received += len(batch)
+                if previous is not None:
+                    await _write(previous)
+            if encoding is not None:
+                await _write(encoding)
+        finally:
+            if encoding is not None and not encoding.done():
+                encoding.cancel()
+
+        return GeoFieldImportResponseSchema(
+            received=received,
+            inserted=inserted,
+            skipped=staged - inserted,
+            invalid=invalid,
+        )
+
+    @staticmethod
+    async def _merge_import_batch(
+        session: AsyncSession, connection: Any, records: List[Tuple[Any, ...]]
+    ) -> List[int]:
+        """
+        Copies a batch into the staging table, and merges it into `geo_fields`.
+
+        Args:
+            session (AsyncSession): The session of the batch.
+            connection (Any): The asyncpg connection of the session.
+            records (List[Tuple[Any, ...]]): The rows of the staging table.
+
+        Returns:
+            List[int]: The ids of the inserted GeoFields.
+        """
+        if not records:
+            return []
+        staging = _IMPORT_TABLE.columns
+        await connection.copy_records_to_table(
+            _IMPORT_TABLE.name,
+            records=records,
+            columns=[item.name for item in staging],
+        )
+        statement = (
+            insert(GeoField)
+            .from_select(
+                ["name", "geom", "fingerprint"],
+                select(
+                    staging.name,
+                    func.ST_GeomFromEWKB(staging.geom),
+                    staging.fingerprint,
+                ).order_by(staging.position),
+            )
+            .on_conflict_do_nothing()
+            .returning(GeoField.id)
+        )
+        field_ids = list(await session.scalars(statement))
+        return field_ids
+
+    async def retrieve_geo_fields(
+        self,
+        limit: Optional[int] = None,
+        after_id: Optional[int] = None,
+        name_prefix: Optional[str] = None,
+        has_image: Optional[bool] = None,
+        geometry_format: GeometryFormat = "wkt",
+        zoom: Optional[int] = None,
+        tolerance: Optional[float] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Retrieves a list of GeoField rows from the database, ordered by id.
+
+        Pages are read with keyset pagination on the primary key, so the cost of a
+        page does not depend on its position in the table. Rows are read with a
+        Core query whose geometry is encoded by PostGIS, without ORM hydration.
+
+        Args:
+            limit (int, optional): The maximum number of GeoFields returned.
+            after_id (int, optional): Only return GeoFields with a greater id.
+            name_prefix (str, optional): Only return GeoFields whose name starts with it.
+            has_image (bool, optional): Only return GeoFields with (True) or
+                without (False) a satellite image.
+            geometry_format (GeometryFormat, optional): Encode geometries as WKT
+                text or as GeoJSON objects.
+            zoom (int, optional): Return geometries simplified for this zoom level.
+            tolerance (float, optional): Return geometries simplified with this
+                tolerance, in degrees.
+
+        Returns:
+            List[Dict[str, Any]]: A list of GeoField rows from the database.
+        """
+        query = select(
+            *self._geo_field_columns(geometry_format, zoom, tolerance)
+        ).order_by(GeoField.id)
+        if after_id is not None:
+            query = query.where(GeoField.id > after_id)
+        if name_prefix:
+            query = query.where(GeoField.name.startswith(name_prefix, autoescape=True))
+        if has_image is not None:
+            query = query.where(
+                GeoField.image_url.is_not(None)
+                if has_image
+                else GeoField.image_url.is_(None)
+            )
+        if limit is not None:
+            query = query.limit(limit)
+
+        async with self.session_factory() as session:
+            result = await session.execute(query)
+            return [dict(row) for row in result.mappings()]
+
+    async def retrieve_geo_fields_in_bbox(
+        self,
+        bbox: Tuple[float, float, float, float],
+        limit: Optional[int] = None,
+        after_id: Optional[int] = None,
+        exact: bool = True,
+        geometry_format: GeometryFormat = "wkt",
+        zoom: Optional[int] = None,
+        tolerance: Optional[float] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Retrieves the GeoField rows inside a bounding box, ordered by id.
+
+        The box is compared with the `&&` operator, which is answered by the GiST
+        index on `geo_fields.geom`. Unless `exact` is False, the candidates are then
+        checked with `ST_Intersects`. Unsimplified geometries are read from the
+        `field_index` instead, when it is ready.
+
+        Args:
+            bbox (Tuple[float, float, float, float]): The bounding box, specified
+                as (min_lon, min_lat, max_lon, max_lat).
+            limit (int, optional): The maximum number of GeoFields returned.
+            after_id (int, optional): Only return GeoFields with a greater id.
+            exact (bool, optional): If False, only bounding boxes are compared.
+            geometry_format (GeometryFormat, optional): Encode geometries as WKT
+                text or as GeoJSON objects.
+            zoom (int, optional): Return geometries simplified for this zoom level.
+            tolerance (float, optional): Return geometries simplified with this
+                tolerance, in degrees.
 
         Returns:
-            List[GeoField]: A list of GeoField objects from the database.
+            List[Dict[str, Any]]: A list of GeoField rows inside the bounding box.
         """
+        if self._field_index_answers(zoom, tolerance):
+            _, field_ids = self.field_index.query(  # type: ignore[union-attr]
+                shapely.box(*bbox), predicate="intersects" if exact else None
+            )
+            if after_id is not None:
+                field_ids = field_ids[field_ids > after_id]
+            return self._field_index_rows(field_ids[:limit].tolist(), geometry_format)
+
+        envelope = func.ST_MakeEnvelope(*bbox, SRID)
+        query = (
+            select(*self._geo_field_columns(geometry_format, zoom, tolerance))
+            .where(GeoField.geom.op("&&")(envelope))
+            .order_by(GeoField.id)
+        )
+        if exact:
+            query = query.where(func.ST_Intersects(GeoField.geom, envelope))
+        if after_id is not None:
+            query = query.where(GeoField.id > after_id)
+        if limit is not None:
+            query = query.limit(limit)
+
         async with self.session_factory() as session:
-            query = select(GeoField)
             result = await session.execute(query)
-            return result.scalars().all()  # type: ignore[return-value]
+            return [dict(row) for row in result.mappings()]
+
+    async def stream_geo_fields(
+        self, batch_size: int
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Streams every GeoField, ordered by id, through a server-side cursor.
+
+        Rows are fetched `batch_size` at a time and are never all held in memory.
+        The geometry is encoded as GeoJSON text by PostGIS.
+
+        Args:
+            batch_size (int): The number of rows fetched and yielded at a time.
+
+        Yields:
+            List[Dict[str, Any]]: Batches of rows with `id`, `name`, `geom`,
+                `image_url` and `image_date` keys.
+        """
+        query = (
+            select(
+                GeoField.id,
+                GeoField.name,
+                func.ST_AsGeoJSON(GeoField.geom, _GEOJSON_DECIMAL_DIGITS).label("geom"),
+                GeoField.image_url,
+                GeoField.image_date,
+            )
+            .order_by(GeoField.id)
+            .execution_options(yield_per=batch_size)
+        )
+        async with self.session_factory() as session:
+            result = await session.stream(query)
+            async for partition in result.mappings().partitions(batch_size):
+                yield [dict(row) for row in partition]
 
-    async def get_intersecting_fields(self, geojson: GeoJSONSchema) -> List[GeoField]:
+    async def get_tile(self, z: int, x: int, y: int) -> Tuple[bytes, str]:
         """
-        Retrieves a list of GeoField objects that intersect with the specified GeoJSON polygon.
+        Retrieves a Mapbox Vector Tile of the GeoFields, through the tile cache.
 
-        This method queries the database for all GeoField entries whose geometry intersects
-        with the given GeoJSON polygon. It only works with the first or single polygon coordinates
-        specified in the GeoJSON object.
+        The tile holds one `geo_fields` layer whose features carry the `name`,
+        `image_url` and `image_date` attributes, with the GeoField id as feature id.
+        Geometries are read from the precomputed level of detail of the zoom level.
 
         Args:
-            geojson: A GeoJSONSchema object containing the polygon data for intersection check.
+            z (int): The zoom level.
+            x (int): The tile column.
+            y (int): The tile row, counted from the north.
 
         Returns:
-            A list of GeoField objects that intersect with the specified GeoJSON polygon.
+            Tuple[bytes, str]: The encoded tile and its ETag.
         """
-        _, _, ewkt_polygon = extract_info_geojson(geojson.features[0])
+        cached: Optional[Tuple[bytes, str]] = self.tile_cache.get((z, x, y))
+        if cached:
+            return cached
+
+        generation = self._tile_generation
+        bounds = func.ST_TileEnvelope(z, x, y)
+        tile = (
+            select(
+                func.ST_AsMVTGeom(
+                    func.ST_Transform(self._simplified_geometry(zoom=z), 3857),
+                    bounds,
+                    TILE_EXTENT,
+                    TILE_BUFFER,
+                    True,
+                ).label("geom"),
+                GeoField.id,
+                GeoField.name,
+                GeoField.image_url,
+                GeoField.image_date,
+            )
+            .where(GeoField.geom.op("&&")(func.ST_Transform(bounds, SRID)))
+            .subquery("tile")
+        )
+        query = select(
+            func.ST_AsMVT(tile.table_valued(), "geo_fields", TILE_EXTENT, "geom", "id")
+        )
         async with self.session_factory() as session:
-            result = await session.execute(
-                select(GeoField).where(GeoField.geom.ST_Intersects(ewkt_polygon))
+            data = bytes(await session.scalar(query) or b"")
+
+        etag = f'"{hashlib.sha1(data).hexdigest()}"'
+        # Do not cache a tile read before a write that invalidated it
+        if generation == self._tile_generation:
+            self.tile_cache.set((z, x, y), (data, etag))
+        return data, etag
+
+    def _invalidate_tiles(self, geoms: Sequence[Dict[str, Any]]) -> None:
+        """
+        Drops the cached vector tiles that overlap any of the written geometries.
+
+        Args:
+            geoms (Sequence[Dict[str, Any]]): The GeoJSON geometries that were written.
+        """
+        if not geoms:
+            return
+        self._tile_generation += 1
+        if len(self.tile_cache):
+            self._drop_tiles([shape(geom).bounds for geom in geoms])
+
+    def _drop_tiles(self, written: Sequence[Tuple[float, float, float, float]]) -> None:
+        """
+        Drops the cached vector tiles that overlap any of the given bounds.
+        """
+        envelope = (
+            min(bounds[0] for bounds in written),
+            min(bounds[1] for bounds in written),
+            max(bounds[2] for bounds in written),
+            max(bounds[3] for bounds in written),
+        )
+        tiles: List[Tuple[int, int, int]] = list(self.tile_cache)  # type: ignore[arg-type]
+        for z, x, y in tiles:
+            bounds = tile_bounds(z, x, y, buffer=TILE_BUFFER / TILE_EXTENT)
+            if bounds_intersect(bounds, envelope) and any(
+                bounds_intersect(bounds, item) for item in written
+            ):
+                self.tile_cache.delete((z, x, y))
+
+    async def get_intersecting_fields(
+        self,
+        geojson: GeoJSONSchema,
+        geometry_format: GeometryFormat = "wkt",
+        zoom: Optional[int] = None,
+        tolerance: Optional[float] = None,
+        measure: bool = False,
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Retrieves the GeoField rows that intersect with each feature of a GeoJSON object.
+
+        Every Polygon or MultiPolygon feature is matched in a single spatial join:
+        the query geometries are unnested into a derived table and joined against
+        `geo_fields`, with the `&&` operator as an index-backed bounding box
+        prefilter ahead of `ST_Intersects`. Unless geometries are simplified or
+        intersections measured, the features are matched against the
+        `field_index` instead, when it is ready.
+
+        Args:
+            geojson: A GeoJSONSchema object containing the query features.
+            geometry_format: Encode geometries as WKT text or as GeoJSON objects.
+            zoom: Return geometries simplified for this zoom level.
+            tolerance: Return geometries simplified with this tolerance, in degrees.
+            measure: Also compute the area of every intersection, in square meters,
+                and its ratio to the area of the field.
+
+        Returns:
+            The GeoField rows intersecting any feature, and for each feature its
+            index, name and the ids of the fields it intersects.
+        """
+        features = [
+            {
+                "index": index,
+                "name": feature.properties.get("name", "Unknown"),
+                "field_ids": [],
+                "intersections": [] if measure else None,
+            }
+            for index, feature in enumerate(geojson.features)
+        ]
+        if not features:
+            return [], []
+
+        if not measure and self._field_index_answers(zoom, tolerance):
+            feature_indexes, matched_ids = self.field_index.query(  # type: ignore[union-attr]
+                geojson_to_geometries(
+                    [feature.geometry.model_dump() for feature in geojson.features]
+                )
             )
-            return result.scalars().all()  # type: ignore[return-value]
+            for feature_index, field_id in zip(
+                feature_indexes.tolist(), matched_ids.tolist()
+            ):
+                features[feature_index]["field_ids"].append(field_id)
+            fields = self._field_index_rows(
+                np.unique(matched_ids).tolist(), geometry_format
+            )
+            return fields, features
+
+        _, _, ewkbs, _ = self._encode_features(geojson)
+        unnested = (
+            func.unnest(
+                literal(list(range(len(ewkbs))), ARRAY(Integer)),
+                literal(ewkbs, ARRAY(LargeBinary)),
+            )
+            .table_valued(column("feature_index", Integer), column("ewkb", LargeBinary))
+            .render_derived()
+        )
+        queries = (
+            select(
+                unnested.c.feature_index,
+                func.ST_GeomFromEWKB(unnested.c.ewkb).label("geom"),
+            )
+            .cte("queries")
+            .prefix_with("MATERIALIZED")
+        )
+        columns = [queries.c.feature_index, GeoField.id]
+        if measure:
+            # Areas on the spheroid, in square meters
+            geography = Geography(srid=SRID)
+            area = func.ST_Area(
+                cast(func.ST_Intersection(GeoField.geom, queries.c.geom), geography),
+                type_=Float,
+            )
+            field_area = func.ST_Area(cast(GeoField.geom, geography), type_=Float)
+            columns += [
+                area.label("area"),
+                (area / func.nullif(field_area, 0.0, type_=Float)).label(
+                    "overlap_ratio"
+                ),
+            ]
+        join = (
+            select(*columns)
+            .join_from(
+                queries,
+                GeoField,
+                and_(
+                    GeoField.geom.op("&&")(queries.c.geom),
+                    func.ST_Intersects(GeoField.geom, queries.c.geom),
+                ),
+            )
+            .order_by(queries.c.feature_index, GeoField.id)
+        )
+
+        async with self.session_factory() as session:
+            matches = (await session.execute(join)).mappings().all()
+            field_ids = sorted({match["id"] for match in matches})
+            fields = []
+            if field_ids:
+                result = await session.execute(
+                    select(*self._geo_field_columns(geometry_format, zoom, tolerance))
+                    .where(GeoField.id.in_(field_ids))
+                    .order_by(GeoField.id)
+                )
+                fields = [dict(row) for row in result.mappings()]
+
+        for match in matches:
+            feature = features[match["feature_index"]]
+            feature["field_ids"].append(match["id"])
+            if measure:
+                feature["intersections"].append(
+                    {
+                        "field_id": match["id"],
+                        "area": match["area"],
+                        "overlap_ratio": match["overlap_ratio"],
+                    }
+                )
+        return fields, features
+
+    @property
+    def listens_to_field_changes(self) -> bool:
+        """
+        Whether this handler keeps state that the writes of other workers change.
+        """
+        return self.field_index is not None or settings.tile_cache_max_entries > 0
+
+    async def sync_field_changes(self) -> None:
+        """
+        Catches up with the writes of other workers, once listening to them.
+
+        The writes notified while not listening are missed, so every cached tile
+        is dropped, and the `field_index` is loaded again if enabled.
+        """
+        self._tile_generation += 1
+        self.tile_cache.clear()
+        if self.field_index is not None:
+            await self.load_field_index()
+
+    async def load_field_index(self) -> None:
+        """
+        Loads every GeoField into the `field_index`, and marks it ready.
+
+        The version is read before the rows, so the index is never taken as
+        current with a version whose writes it may miss.
+        """
+        async with self._field_index_lock:
+            version = await self.geo_fields_version()
+            rows = await self._read_field_index_rows()
+            self.field_index.replace(rows, version)  # type: ignore[union-attr]
+        logger.info(f"Loaded {len(rows)} GeoFields into the spatial index")
+
+    async def refresh_field_index(self, field_ids: Sequence[int]) -> None:
+        """
+        Reads the given GeoFields again into the `field_index`, if enabled.
+
+        Args:
+            field_ids (Sequence[int]): The ids of the GeoFields written, those
+                that no longer exist are removed from the index.
+        """
+        if self.field_index is None or not field_ids:
+            return
+        async with self._field_index_lock:
+            rows = await self._read_field_index_rows(field_ids)
+            self.field_index.remove(set(field_ids) - {row[0] for row in rows})
+            self.field_index.upsert(rows)
+
+    async def apply_field_changes(self, payload: str) -> None:
+        """
+        Applies a notification of the `GEO_FIELDS_CHANNEL` to the `field_index`
+        and the `tile_cache`.
+
+        The writes of this handler are applied right after they are committed,
+        but their notifications are applied as well: the index is only taken as
+        current with a version once the notifications of every earlier version
+        were applied, in commit order.
+
+        Args:
+            payload (str): The sender id, the version of `geo_fields` if this is
+                the last notification of the write, and the comma separated
+                GeoField ids, separated by colons.
+        """
+        sender, version, field_ids = payload.split(":", 2)
+        ids = [int(item) for item in field_ids.split(",")] if field_ids else []
+        # Tiles are invalidated by the writer itself, only those of other workers
+        # are invalidated here, from the bounds the written fields now have
+        if ids and sender != self._instance_id:
+            self._tile_generation += 1
+            if len(self.tile_cache):
+                self._drop_tiles(await self._read_field_bounds(ids))
+        await self.refresh_field_index(ids)
+        if version and self.field_index is not None:
+            self.field_index.version = max(self.field_index.version, int(version))
+
+    async def geo_fields_read_version(self) -> int:
+        """
+        Returns the version of `geo_fields` that reads are answered at.
+
+        While the `field_index` answers queries, this is the version it has
+        applied, which may lag behind the table, so a response built from the
+        index is never taken as current with a write it has not applied yet.
+        Responses read from the table in the meantime are at least as recent.
+        """
+        if self.field_index is not None and self.field_index.ready:
+            return self.field_index.version
+        return await self.geo_fields_version()
+
+    async def geo_fields_version(self) -> int:
+        """
+        Returns the version of the `geo_fields` table, bumped by every write of
+        GeoFields, e.g. to tell whether a response built from them is current.
+        """
+        async with self.session_factory() as session:
+            version = await session.scalar(
+                select(TableVersion.version).where(
+                    TableVersion.name == GeoField.__tablename__
+                )
+            )
+        return version or 0
+
+    async def _record_field_changes(
+        self, session: AsyncSession, field_ids: Sequence[int]
+    ) -> None:
+        """
+        Records that GeoFields were written, as the last step of a transaction.
+
+        The version of `geo_fields` is bumped, and every worker is notified, to
+        update its `field_index` and `tile_cache`. Both only take effect once the
+        session commits. The version row stays locked until then, so it must be
+        written last, when the transaction no longer waits on other locks.
+        """
+        if not field_ids:
+            return
+        statement = insert(TableVersion).values(name=GeoField.__tablename__, version=1)
+        version = await session.scalar(
+            statement.on_conflict_do_update(
+                index_elements=[TableVersion.name],
+                set_={"version": TableVersion.version + 1},
+            ).returning(TableVersion.version)
+        )
+
+        chunks = [
+            field_ids[offset : offset + _NOTIFY_CHUNK_SIZE]
+            for offset in range(0, len(field_ids), _NOTIFY_CHUNK_SIZE)
+        ]
+        # Only the last notification carries the version, as the write is only
+        # applied once every one of them is
+        payloads = [
+            f"{self._instance_id}:{version if index == len(chunks) - 1 else ''}:"
+            + ",".join(map(str, chunk))
+            for index, chunk in enumerate(chunks)
+        ]
+        await session.execute(
+            select(
+                func.pg_notify(
+                    GEO_FIELDS_CHANNEL, func.unnest(literal(payloads, ARRAY(String)))
+                )
+            )
+        )
+
+    async def _read_field_bounds(
+        self, field_ids: Sequence[int]
+    ) -> List[Tuple[float, float, float, float]]:
+        """
+        Reads the bounds of the given GeoFields, e.g. to invalidate their tiles.
+        """
+        query = select(
+            func.ST_XMin(GeoField.geom),
+            func.ST_YMin(GeoField.geom),
+            func.ST_XMax(GeoField.geom),
+            func.ST_YMax(GeoField.geom),
+        )
+        chunk_size = settings.bulk_insert_chunk_size
+        bounds: List[Tuple[float, float, float, float]] = []
+        async with self.session_factory() as session:
+            for offset in range(0, len(field_ids), chunk_size):
+                chunk = field_ids[offset : offset + chunk_size]
+                rows = await session.execute(query.where(GeoField.id.in_(chunk)))
+                bounds += [tuple(row) for row in rows]
+        return bounds
+
+    async def _read_field_index_rows(
+        self, field_ids: Optional[Sequence[int]] = None
+    ) -> List[Tuple[int, shapely.Geometry, Dict[str, Any]]]:
+        """
+        Reads GeoFields for the `field_index`, with their geometry in both formats.
+        """
+        query = select(
+            GeoField.id,
+            GeoField.name,
+            func.ST_AsBinary(GeoField.geom).label("wkb"),
+            func.ST_AsText(GeoField.geom).label("wkt"),
+            func.ST_AsGeoJSON(GeoField.geom, _GEOJSON_DECIMAL_DIGITS)
+            .cast(JSON)
+            .label("geojson"),
+            GeoField.image_url,
+            GeoField.image_date,
+        )
+        chunk_size = settings.bulk_insert_chunk_size
+        async with self.session_factory() as session:
+            if field_ids is None:
+                rows = (await session.execute(query)).all()
+            else:
+                rows = []
+                for offset in range(0, len(field_ids), chunk_size):
+                    chunk = field_ids[offset : offset + chunk_size]
+                    rows += await session.execute(query.where(GeoField.id.in_(chunk)))
+
+        geometries = shapely.from_wkb([bytes(row.wkb) for row in rows])
+        attributes = [row._asdict() for row in rows]
+        for item in attributes:
+            del item["wkb"]
+        return [
+            (item["id"], geometry, item)
+            for item, geometry in zip(attributes, geometries)
+        ]
+
+    def _field_index_answers(
+        self, zoom: Optional[int] = None, tolerance: Optional[float] = None
+    ) -> bool:
+        """
+        Whether the `field_index` can answer a query, instead of the database.
+        """
+        return (
+            self.field_index is not None
+            and self.field_index.ready
+            and zoom is None
+            and tolerance is None
+        )
+
+    def _field_index_rows(
+        self, field_ids: Sequence[int], geometry_format: GeometryFormat
+    ) -> List[Dict[str, Any]]:
+        """
+        Returns GeoField rows from the `field_index`, shaped as `_geo_field_columns`.
+        """
+        geom_key = "geojson" if geometry_format == "geojson" else "wkt"
+        return [
+            {
+                "id": row["id"],
+                "name": row["name"],
+                "geom": row[geom_key],
+                "image_url": row["image_url"],
+                "image_date": row["image_date"],
+            }
+            for row in self.field_index.rows(field_ids)  # type: ignore[union-attr]
+        ]
+
+    @staticmethod
+    def _encode_features(
+        geojson: GeoJSONSchema,
+    ) -> Tuple[List[str], List[Dict[str, Any]], List[bytes], List[str]]:
+        """
+        Encodes the features of a GeoJSON object for the database in one batch.
+
+        Returns:
+            Tuple[List[str], List[Dict[str, Any]], List[bytes], List[str]]: The
+                name, GeoJSON geometry, EWKB and fingerprint of each feature.
+        """
+        names = [
+            feature.properties.get("name", "Unknown") for feature in geojson.features
+        ]
+        geoms = [feature.geometry.model_dump() for feature in geojson.features]
+        geometries = geojson_to_geometries(geoms)
+        fingerprints = geometry_fingerprints(geometries)
+        return names, geoms, geometries_to_ewkb(geometries), fingerprints
+
+    @staticmethod
+    def _encode_import_batch(
+        features: Sequence[Mapping[str, Any]], offset: int
+    ) -> Tuple[List[Tuple[int, str, bytes, str]], List[SkippedFeatureSchema]]:
+        """
+        Encodes a batch of imported Features as rows of the staging table.
+
+        The batch is converted in one vectorized call. If that fails, its
+        features are converted one at a time to tell the invalid ones apart.
+
+        Args:
+            features (Sequence[Mapping[str, Any]]): The GeoJSON Features.
+            offset (int): The position of the first feature in the import.
+
+        Returns:
+            Tuple[List[Tuple[int, str, bytes, str]], List[SkippedFeatureSchema]]:
+                The position, name, EWKB and fingerprint of the valid features,
+                and the invalid features.
+        """
+        names = [
+            str((feature.get("properties") or {}).get("name", "Unknown"))
+            for feature in features
+        ]
+        positions = list(range(offset, offset + len(features)))
+        invalid: List[SkippedFeatureSchema] = []
+        try:
+            geometries = geojson_to_geometries(
+                [feature["geometry"] for feature in features]
+            )
+        except _INVALID_GEOMETRY_ERRORS:
+            valid = []
+            for index, feature in enumerate(features):
+                try:
+                    valid.append((index, geojson_to_geometries([feature["geometry"]])))
+                except _INVALID_GEOMETRY_ERRORS as e:
+                    invalid.append(
+                        SkippedFeatureSchema(
+                            index=offset + index,
+                            name=names[index],
+                            reason=(
+                                f"invalid geometry: {e}"
+                                if isinstance(e, (ValueError, ShapelyError))
+                                else "invalid geometry"
+                            ),
+                        )
+                    )
+            names = [names[index] for index, _ in valid]
+            positions = [positions[index] for index, _ in valid]
+            geometries = (
+                np.concatenate([geometry for _, geometry in valid])
+                if valid
+                else np.empty(0, dtype=object)
+            )
+
+        records = list(
+            zip(
+                positions,
+                names,
+                geometries_to_ewkb(geometries),
+                geometry_fingerprints(geometries),
+            )
+        )
+        return records, invalid
+
+    @staticmethod
+    def _simplified_geometry(
+        zoom: Optional[int] = None, tolerance: Optional[float] = None
+    ) -> Any:
+        """
+        Returns the geometry expression of a GeoField at a level of detail.
+
+        A zoom level reads the precomputed column of the closest level of detail
+        that is at least as detailed, and simplifies on the fly beyond the most
+        detailed one. An explicit tolerance always simplifies on the fly.
+
+        Args:
+            zoom (int, optional): The zoom level the geometry is displayed at.
+            tolerance (float, optional): The simplification tolerance, in degrees.
+
+        Returns:
+            Any: The full resolution geometry if neither argument is given.
+        """
+        if tolerance is not None:
+            return func.ST_SimplifyPreserveTopology(GeoField.geom, tolerance)
+        if zoom is None:
+            return GeoField.geom
+        for lod in LOD_ZOOMS:
+            if zoom <= lod:
+                return getattr(GeoField, f"geom_z{lod}")
+        return func.ST_SimplifyPreserveTopology(GeoField.geom, zoom_tolerance(zoom))
+
+    @classmethod
+    def _geo_field_columns(
+        cls,
+        geometry_format: GeometryFormat,
+        zoom: Optional[int] = None,
+        tolerance: Optional[float] = None,
+    ) -> List[Any]:
+        """
+        Returns the columns of a GeoField row, with the geometry encoded by PostGIS.
+        """
+        geometry = cls._simplified_geometry(zoom, tolerance)
+        geom = (
+            func.ST_AsGeoJSON(geometry, _GEOJSON_DECIMAL_DIGITS).cast(JSON)
+            if geometry_format == "geojson"
+            else func.ST_AsText(geometry)
+        )
+        return [
+            GeoField.id,
+            GeoField.name,
+            geom.label("geom"),
+            GeoField.image_url,
+            GeoField.image_date,
+        ]
@@ -0,0 +1,67 @@
+"""
+Imports large GeoJSON files into the `geo_fields` table, streaming them.
+
+Each file holds a FeatureCollection, or one Feature per line as written by
+`GET /geo/fields/export`:
+
+    python -m src.database.postgres.import_fields fields.geojson [more.ndjson ...]
+"""
+
+import argparse
+import asyncio
+import time
+
+from logging import config, getLogger
+from typing import AsyncIterator, Sequence
+
+from src.config.base import settings
+from src.database.postgres.handler import PostgreSQLHandler
+from src.utils.stream_utils import read_feature_batches
+
+logger = getLogger(__name__)
+
+# Bytes read from a file at a time
+_READ_SIZE = 1024 * 1024
+
+
+async def _read_file(path: str) -> AsyncIterator[bytes]:
+    with open(path, "rb") as file:
+        while chunk := await asyncio.to_thread(file.read, _READ_SIZE):
+            yield chunk
+
+
+async def import_fields(paths: Sequence[str]) -> None:
+    db_handler = PostgreSQLHandler()
+    try:
+        for path in paths:
+            started_at = time.perf_counter()
+            result = await db_handler.import_geo_fields(
+                read_feature_batches(
+                    _read_file(path),
+                    batch_size=settings.import_batch_size,
+                    max_value_size=settings.import_max_feature_size,
+                )
+            )
+            elapsed = time.perf_counter() - started_at
+            for feature in result.invalid:
+                logger.warning(
+                    f"Skipped feature {feature.index} ({feature.name}) of {path}: "
+                    f"{feature.reason}"
+                )
+            logger.info(
+                f"Imported {path} in {elapsed:.1f}s: {result.received} features "
+                f"received, {result.inserted} inserted, {result.skipped} duplicates "
+                f"skipped ({result.received / max(elapsed, 1e-9):.0f} features/s)"
+            )
+    finally:
+        await db_handler.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Import GeoJSON or NDJSON files into the geo_fields table."
+    )
+    parser.add_argument("paths", nargs="+", help="the files to import, in order")
+    arguments = parser.parse_args()
+    config.fileConfig("logging.conf", disable_existing_loggers=False)  # type: ignore[arg-type]
+    asyncio.run(import_fields(arguments.paths))
@@ -0,0 +1,30 @@
+"""
+Creates the tables and applies the schema migrations of the database.
+
+Run it once before starting (or scaling out) the application, so application
+instances do not run DDL on startup:
+
+    python -m src.database.postgres.migrate
+"""
+
+import asyncio
+
+from logging import config, getLogger
+
+from src.database.postgres.handler import PostgreSQLHandler
+
+logger = getLogger(__name__)
+
+
+async def migrate() -> None:
+    db_handler = PostgreSQLHandler()
+    try:
+        await db_handler.initialize()
+        logger.info("Database schema is up to date")
+    finally:
+        await db_handler.dispose()
+
+
+if __name__ == "__main__":
+    config.fileConfig("logging.conf", disable_existing_loggers=False)  # type: ignore[arg-type]
+    asyncio.run(migrate())
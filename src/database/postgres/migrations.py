@@ -0,0 +1,72 @@
+from typing import List
+
+from src.models.geo_models import LOD_ZOOMS, lod_expression
+
+_DROP_LODS = ", ".join(f"DROP COLUMN IF EXISTS geom_z{zoom}" for zoom in LOD_ZOOMS)
+
+# Idempotent schema changes, applied after `create_all` so that databases
+# created by an earlier version of the models catch up with them.
+MIGRATIONS: List[str] = [
+    # Geometry fingerprints, backfilled by `PostgreSQLHandler.backfill_fingerprints`
+    "ALTER TABLE geo_fields ADD COLUMN IF NOT EXISTS fingerprint VARCHAR(64)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_geo_fields_fingerprint "
+    "ON geo_fields (fingerprint)",
+    # Name prefix filters of GET /geo/fields
+    "CREATE INDEX IF NOT EXISTS ix_geo_fields_name_pattern "
+    "ON geo_fields (name text_pattern_ops)",
+    # Geometries stored without an SRID are WGS 84, declare it so they can be
+    # reprojected (e.g. to Web Mercator for vector tiles)
+    """
+    DO $$
+    BEGIN
+        IF (
+            SELECT srid FROM geometry_columns
+            WHERE f_table_name = 'geo_fields' AND f_geometry_column = 'geom'
+        ) = 0 THEN
+            ALTER TABLE geo_fields
+            ALTER COLUMN geom TYPE geometry(Polygon, 4326) USING ST_SetSRID(geom, 4326);
+        END IF;
+    END
+    $$
+    """,
+    # MultiPolygon fields. The levels of detail are generated from `geom`, so
+    # they are dropped while its type changes and added back below.
+    f"""
+    DO $$
+    BEGIN
+        IF (
+            SELECT type FROM geometry_columns
+            WHERE f_table_name = 'geo_fields' AND f_geometry_column = 'geom'
+        ) = 'POLYGON' THEN
+            ALTER TABLE geo_fields {_DROP_LODS};
+            ALTER TABLE geo_fields ALTER COLUMN geom TYPE geometry(Geometry, 4326);
+        END IF;
+    END
+    $$
+    """,
+    # Precomputed levels of detail, after the SRID migration they depend on
+    *(
+        f"ALTER TABLE geo_fields ADD COLUMN IF NOT EXISTS geom_z{zoom} "
+        f"geometry(Geometry, 4326) GENERATED ALWAYS AS ({lod_expression(zoom)}) STORED"
+        for zoom in LOD_ZOOMS
+    ),
+    # Image capture datetimes were stored as the ISO 8601 text returned by STAC
+    """
+    DO $$
+    BEGIN
+        IF (
+            SELECT data_type FROM information_schema.columns
+            WHERE table_name = 'geo_fields' AND column_name = 'image_date'
+        ) = 'character varying' THEN
+            ALTER TABLE geo_fields
+            ALTER COLUMN image_date TYPE timestamptz
+            USING NULLIF(image_date, '')::timestamptz;
+        END IF;
+    END
+    $$
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_geo_fields_image_date ON geo_fields (image_date)",
+    "ALTER TABLE geo_fields ADD COLUMN IF NOT EXISTS image_checked_at timestamptz",
+    "CREATE INDEX IF NOT EXISTS ix_geo_fields_image_checked_at "
+    "ON geo_fields (image_checked_at)",
+]
@@ -1,11 +1,19 @@
+import time
+
 from logging import config, getLogger
 
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, Response
 from fastapi.responses import RedirectResponse
 
+from src.api.common.metrics import MetricsMiddleware, collect_database_metrics
 from src.api.v1.routers.geo_routers import router as v1_geo_router
+from src.config.base import settings
 from src.database.postgres.handler import PostgreSQLHandler as Database
+from src.services.field_index_service import GeoFieldIndexListener
+from src.services.job_service import SatelliteImageJobWorkers
+from src.services.refresh_service import SatelliteImageRefresher
+from src.utils.metrics_utils import REGISTRY
 
 # setup logger
 config.fileConfig("logging.conf", disable_existing_loggers=False)  # type: ignore[arg-type]
@@ -15,20 +23,51 @@ logger = getLogger(__name__)
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # startup-event
+    started_at = time.perf_counter()
 
     db_handler = Database()
-    await db_handler.initialize()
+    # The schema is created by `python -m src.database.postgres.migrate`, so
+    # starting a worker costs one health-check query rather than running DDL.
+    if settings.postgres_migrate_on_startup:
+        await db_handler.initialize()
     logger.info(f"Database Health-Check: {await db_handler.health_check()}")
+    app.state.database = db_handler
+
+    job_workers = SatelliteImageJobWorkers(db_handler)
+    job_workers.start()
+    app.state.job_workers = job_workers
+    image_refresher = SatelliteImageRefresher(db_handler)
+    image_refresher.start()
+    field_index_listener = GeoFieldIndexListener(db_handler)
+    field_index_listener.start()
+    logger.info(f"Application started in {time.perf_counter() - started_at:.3f}s")
 
     yield
 
     # shutdown-event
+    await field_index_listener.stop()
+    await image_refresher.stop()
+    await job_workers.stop()
+    await db_handler.dispose()
 
 
 app = FastAPI(lifespan=lifespan)
+if settings.metrics_enabled:
+    app.add_middleware(MetricsMiddleware)
 app.include_router(v1_geo_router, prefix="/api/v1")
 
 
 @app.get("/", response_class=RedirectResponse, include_in_schema=False)
 async def docs():
     return RedirectResponse(url="/docs")
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics(request: Request):
+    """
+    Exposes the metrics of this worker in the Prometheus text format.
+    """
+    collect_database_metrics(request.app.state.database)
+    return Response(
+        REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
@@ -1,13 +1,59 @@
 from geoalchemy2 import Geometry
-from sqlalchemy import Column, String
+from sqlalchemy import Column, Computed, DateTime, Index, String
+from sqlalchemy.orm import deferred
 
 from src.database.common.dependencies import BaseSQL
+from src.utils.tile_utils import zoom_tolerance
+
+# GeoJSON coordinates are WGS 84 longitudes and latitudes
+SRID = 4326
+
+# Fields are Polygons, or MultiPolygons for fields made of several parcels
+GEOMETRY_TYPE = "GEOMETRY"
+
+# Zoom levels whose simplified geometries are stored next to `GeoField.geom`
+LOD_ZOOMS = (6, 10, 14)
+
+
+def lod_expression(zoom: int) -> str:
+    """
+    Returns the SQL expression of the `geom_z{zoom}` level of detail.
+    """
+    return f"ST_SimplifyPreserveTopology(geom, {zoom_tolerance(zoom)!r})"
+
+
+def _lod_column(zoom: int):
+    # Generated columns, so PostGIS refreshes them on every insert and update
+    return deferred(
+        Column(
+            Geometry(GEOMETRY_TYPE, srid=SRID, spatial_index=False),
+            Computed(lod_expression(zoom), persisted=True),
+        )
+    )
 
 
 class GeoField(BaseSQL):
     __tablename__ = "geo_fields"
+    __table_args__ = (
+        # Lets `name LIKE 'prefix%'` filters use an index range scan
+        Index(
+            "ix_geo_fields_name_pattern",
+            "name",
+            postgresql_ops={"name": "text_pattern_ops"},
+        ),
+    )
 
     name = Column(String, unique=True, nullable=False)
-    geom = Column(Geometry("POLYGON"), nullable=False)
+    geom = Column(Geometry(GEOMETRY_TYPE, srid=SRID), nullable=False)
+    # Hash of the normalized geometry, see `src.utils.geo_utils.geometry_fingerprint`.
+    # Only NULL for rows that duplicated an older geometry before the column existed.
+    fingerprint = Column(String(64), unique=True, index=True, nullable=True)
+    geom_z6 = _lod_column(6)
+    geom_z10 = _lod_column(10)
+    geom_z14 = _lod_column(14)
     image_url = Column(String, nullable=True)
-    image_date = Column(String, nullable=True)
+    # Capture datetime of the image, indexed so the refresher reads the oldest first
+    image_date = Column(DateTime(timezone=True), nullable=True, index=True)
+    # When the refresher last claimed the field to search for a newer image, indexed
+    # so it finds when it last claimed a batch
+    image_checked_at = Column(DateTime(timezone=True), nullable=True, index=True)
@@ -0,0 +1,34 @@
+from sqlalchemy import Column, DateTime, Index, Integer, String, func
+from sqlalchemy.dialects.postgresql import JSONB
+
+from src.database.common.dependencies import BaseSQL
+
+
+class SatelliteImageJob(BaseSQL):
+    __tablename__ = "satellite_image_jobs"
+    __table_args__ = (
+        # Workers only ever look for the oldest unfinished jobs
+        Index(
+            "ix_satellite_image_jobs_unfinished",
+            "id",
+            postgresql_where="status IN ('pending', 'running')",
+        ),
+    )
+    # Reads the server-side timestamps back with the INSERT ... RETURNING
+    __mapper_args__ = {"eager_defaults": True}
+
+    # pending -> running -> completed, or failed if the job itself could not run
+    status = Column(String(16), nullable=False, default="pending")
+    # The GeoJSON features to process, and one result per processed feature
+    features = Column(JSONB, nullable=False)
+    results = Column(JSONB, nullable=False, default=list)
+    total = Column(Integer, nullable=False)
+    processed = Column(Integer, nullable=False, default=0)
+    error = Column(String, nullable=True)
+    created_at = Column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+    # Bumped after every chunk, so jobs of a crashed worker can be picked up again
+    updated_at = Column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
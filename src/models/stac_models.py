@@ -0,0 +1,12 @@
+from sqlalchemy import Column, DateTime, String
+
+from src.database.common.dependencies import BaseSQL
+
+
+class StacSearchCache(BaseSQL):
+    __tablename__ = "stac_search_cache"
+
+    key = Column(String(64), unique=True, nullable=False)
+    image_url = Column(String, nullable=True)
+    image_date = Column(String, nullable=True)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
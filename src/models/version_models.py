@@ -0,0 +1,14 @@
+from sqlalchemy import BigInteger, Column, String
+
+from src.database.common.dependencies import BaseSQL
+
+
+class TableVersion(BaseSQL):
+    """
+    A counter bumped by every write of a table, identifying its current content.
+    """
+
+    __tablename__ = "table_versions"
+
+    name = Column(String(63), unique=True, nullable=False)
+    version = Column(BigInteger, nullable=False, default=0)
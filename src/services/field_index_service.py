@@ -0,0 +1,71 @@
+import asyncio
+import logging
+
+from typing import Optional
+
+from src.config.base import settings
+from src.database.postgres.handler import GEO_FIELDS_CHANNEL, PostgreSQLHandler
+
+logger = logging.getLogger(__name__)
+
+
+class GeoFieldIndexListener:
+    """
+    A background task keeping the `field_index` and `tile_cache` of a handler
+    up to date.
+
+    It listens to the GeoField ids notified by the writes of every worker (see
+    `PostgreSQLHandler._record_field_changes`), reads those fields again and
+    drops the tiles they overlap. The handler catches up once listening (see
+    `PostgreSQLHandler.sync_field_changes`), so no write is missed in between.
+    When the connection is lost, queries go to the database until the index is
+    loaded again.
+
+    Attributes:
+        database (PostgreSQLHandler): The handler whose state is kept.
+        retry_interval (float): The seconds before listening again after a failure.
+    """
+
+    def __init__(
+        self, database: PostgreSQLHandler, retry_interval: Optional[float] = None
+    ) -> None:
+        self.database = database
+        self.retry_interval = (
+            settings.field_index_retry_interval
+            if retry_interval is None
+            else retry_interval
+        )
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self.database.listens_to_field_changes:
+            self._task = asyncio.create_task(
+                self._listen(), name="geo-field-index-listener"
+            )
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _listen(self) -> None:
+        while True:
+            payloads: asyncio.Queue = asyncio.Queue()
+            connection = None
+            try:
+                connection = await self.database.listen(
+                    GEO_FIELDS_CHANNEL, payloads.put_nowait
+                )
+                await self.database.sync_field_changes()
+                while (payload := await payloads.get()) is not None:
+                    await self.database.apply_field_changes(payload)
+                logger.warning("Lost the connection listening to GeoField changes")
+            except Exception:
+                logger.exception("Failed to keep the GeoField index up to date")
+            finally:
+                if self.database.field_index is not None:
+                    self.database.field_index.ready = False
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+            await asyncio.sleep(self.retry_interval)
@@ -0,0 +1,94 @@
+import asyncio
+import logging
+
+from typing import List, Optional
+
+from src.config.base import settings
+from src.database.postgres.handler import PostgreSQLHandler
+from src.models.job_models import SatelliteImageJob
+
+logger = logging.getLogger(__name__)
+
+
+class SatelliteImageJobWorkers:
+    """
+    A pool of background tasks processing the queued satellite image jobs.
+
+    Jobs are queued in the `satellite_image_jobs` table, so any application
+    instance may process them. Idle workers poll the table every
+    `poll_interval` seconds, and are woken up at once by `notify` when a job is
+    queued by this instance.
+
+    Attributes:
+        database (PostgreSQLHandler): The handler the jobs are read and processed with.
+        workers (int): The number of jobs processed concurrently.
+        poll_interval (float): The seconds idle workers wait before checking again.
+    """
+
+    def __init__(
+        self,
+        database: PostgreSQLHandler,
+        workers: Optional[int] = None,
+        poll_interval: Optional[float] = None,
+    ) -> None:
+        self.database = database
+        self.workers = settings.job_workers if workers is None else workers
+        self.poll_interval = (
+            settings.job_poll_interval if poll_interval is None else poll_interval
+        )
+        self._wakeup = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self) -> None:
+        self._tasks = [
+            asyncio.create_task(self._work(), name=f"satellite-image-worker-{index}")
+            for index in range(self.workers)
+        ]
+
+    async def stop(self) -> None:
+        """
+        Stops the workers. Jobs they were processing are put back in the queue.
+        """
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self) -> None:
+        """
+        Wakes up the idle workers, e.g. after a job has been queued.
+        """
+        self._wakeup.set()
+
+    async def _work(self) -> None:
+        while True:
+            self._wakeup.clear()
+            try:
+                job = await self.database.claim_satellite_image_job()
+            except Exception:
+                logger.exception("Failed to claim a satellite image job")
+                job = None
+
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._process(job)
+
+    async def _process(self, job: SatelliteImageJob) -> None:
+        logger.info(f"Processing satellite image job {job.id}")
+        try:
+            if not await self.database.run_satellite_image_job(job):
+                logger.warning(f"Satellite image job {job.id} was taken over")
+        except asyncio.CancelledError:
+            await self.database.release_satellite_image_job(job.id)
+            raise
+        except Exception as e:
+            logger.exception(f"Satellite image job {job.id} failed")
+            try:
+                await self.database.finish_satellite_image_job(job.id, error=str(e))
+            except Exception:
+                # The worker keeps running, the job is claimed again once stale
+                logger.exception(f"Failed to record satellite image job {job.id}")
@@ -0,0 +1,61 @@
+import asyncio
+import logging
+
+from typing import Optional
+
+from src.config.base import settings
+from src.database.postgres.handler import PostgreSQLHandler
+
+logger = logging.getLogger(__name__)
+
+
+class SatelliteImageRefresher:
+    """
+    A background task keeping the satellite images of stored GeoFields fresh.
+
+    Every `interval` seconds, one batch of the fields with the oldest images is
+    searched again (see `PostgreSQLHandler.refresh_stale_images`). Every worker
+    runs a refresher, but only one of them claims a batch per interval, so the
+    load put on the STAC API is at most `image_refresh_batch_size` searches per
+    interval.
+
+    It also trims the STAC cache table to its size limit every interval (see
+    `PostgreSQLHandler.trim_stac_cache`).
+
+    Attributes:
+        database (PostgreSQLHandler): The handler the fields are refreshed with.
+        interval (float): The seconds between batches, 0 disables the refresher.
+    """
+
+    def __init__(
+        self, database: PostgreSQLHandler, interval: Optional[float] = None
+    ) -> None:
+        self.database = database
+        self.interval = (
+            settings.image_refresh_interval if interval is None else interval
+        )
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self.interval > 0:
+            self._task = asyncio.create_task(
+                self._refresh(), name="satellite-image-refresher"
+            )
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _refresh(self) -> None:
+        while True:
+            try:
+                await self.database.refresh_stale_images(self.interval)
+            except Exception:
+                logger.exception("Failed to refresh stale satellite images")
+            try:
+                await self.database.trim_stac_cache()
+            except Exception:
+                logger.exception("Failed to trim the STAC cache table")
+            await asyncio.sleep(self.interval)
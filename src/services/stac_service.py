@@ -1,14 +1,142 @@
-from planetary_computer import sign_inplace
-from pystac_client import Client
-from typing import ClassVar, Tuple, Optional
+import asyncio
+import hashlib
+import shapely
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from shapely.geometry import mapping, shape
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    ClassVar,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from src.config.base import settings
+from src.utils.geo_utils import (
+    cluster_geometries,
+    geojson_to_geometries,
+    normalized_wkb,
+)
+from src.utils.metrics_utils import STAC_SEARCH_ERRORS, STAC_SEARCH_SECONDS, stage
+
+if TYPE_CHECKING:
+    from pystac_client import Client
+    from pystac_client.stac_api_io import StacApiIO
+
+
+def build_stac_io() -> "StacApiIO":
+    """
+    Builds the STAC API I/O with a pooled keep-alive session.
+
+    The session keeps up to `stac_max_concurrency` connections alive, retries
+    failed or throttled searches with exponential backoff and applies
+    `stac_timeout` to every request.
+
+    Returns:
+        StacApiIO: The I/O instance used by the STAC client.
+    """
+    from pystac_client.stac_api_io import StacApiIO
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    stac_io = StacApiIO(timeout=settings.stac_timeout)
+    retry = Retry(
+        total=settings.stac_max_retries,
+        backoff_factor=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset({"GET", "POST"}),
+    )
+    adapter = HTTPAdapter(
+        pool_connections=settings.stac_max_concurrency,
+        pool_maxsize=settings.stac_max_concurrency,
+        max_retries=retry,
+    )
+    stac_io.session.mount("http://", adapter)
+    stac_io.session.mount("https://", adapter)
+    return stac_io
+
+
+@contextmanager
+def _observe_search(kind: str) -> Iterator[None]:
+    """
+    Records the latency of a STAC search, and its error if it fails.
+    """
+    started_at = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        STAC_SEARCH_ERRORS.inc(kind=kind, error=type(e).__name__)
+        raise
+    finally:
+        STAC_SEARCH_SECONDS.observe(time.perf_counter() - started_at, kind=kind)
 
 
 class STAC:
-    _client: ClassVar[Client] = Client.open(
-        "https://planetarycomputer.microsoft.com/api/stac/v1",
-        modifier=sign_inplace,
+    # The client is opened on first use, as reading the root catalog is a
+    # network request (see `client`).
+    _client: ClassVar[Optional["Client"]] = None
+    _client_lock: ClassVar[threading.Lock] = threading.Lock()
+    # pystac_client is blocking, so searches run on a dedicated thread pool
+    # to keep the event loop free while waiting on the STAC API.
+    _executor: ClassVar[ThreadPoolExecutor] = ThreadPoolExecutor(
+        max_workers=settings.stac_max_concurrency,
+        thread_name_prefix="stac",
     )
 
+    @classmethod
+    def client(cls) -> "Client":
+        """
+        Returns the STAC client, opening it on first use.
+
+        The root catalog is read from `stac_catalog_path` when set, so no request
+        is made until the first search, or from `stac_api_url` otherwise. The
+        client is shared by every search thread.
+
+        Returns:
+            Client: The STAC client of the configured API.
+        """
+        if cls._client is None:
+            with cls._client_lock:
+                if cls._client is None:
+                    from planetary_computer import sign_inplace
+                    from pystac_client import Client
+
+                    cls._client = Client.open(
+                        settings.stac_catalog_path or settings.stac_api_url,
+                        modifier=sign_inplace,
+                        stac_io=build_stac_io(),
+                    )
+        return cls._client
+
+    @staticmethod
+    def cache_key(geom: Dict[str, Any]) -> str:
+        """
+        Builds the cache key of a newest-image search.
+
+        The key combines the normalized geometry, snapped to
+        `stac_cache_grid_size`, with the search parameters, so changing the
+        collection or the cloud-cover threshold never serves stale results.
+
+        Args:
+            geom (Dict[str, Any]): The GeoJSON geometry searched for.
+
+        Returns:
+            str: The hex SHA-256 digest identifying the search.
+        """
+        digest = hashlib.sha256(
+            f"{settings.stac_collection}|{settings.stac_max_cloud_cover}|".encode()
+        )
+        digest.update(normalized_wkb(geom, settings.stac_cache_grid_size))
+        return digest.hexdigest()
+
     @classmethod
     async def newest_satellite_image(
         cls, geom: Tuple[float, float, float, float]
@@ -17,7 +145,8 @@ class STAC:
         Retrieve the newest satellite image within a given bounding box.
 
         Searches for the most recent satellite image of the specified area
-        with cloud cover less than 10%.
+        with cloud cover less than `stac_max_cloud_cover`. The search runs on a worker thread,
+        so it does not block the event loop.
 
         Args:
             bbox (Tuple[float, float, float, float]): The bounding box for
@@ -28,18 +157,145 @@ class STAC:
                 preview of the satellite image and its capture datetime, or None
                 if no image is found.
         """
-        search = cls._client.search(
-            collections=["sentinel-2-l2a"],
-            intersects=geom,  # type: ignore[arg-type]
-            sortby=[{"field": "properties.datetime", "direction": "desc"}],
-            query={
-                "eo:cloud_cover": {"lt": 10},
-            },
-            max_items=1,
-        )
+        loop = asyncio.get_running_loop()
+        with stage("stac"):
+            return await loop.run_in_executor(
+                cls._executor, cls._search_newest_satellite_image, geom
+            )
+
+    @classmethod
+    async def newest_satellite_images(
+        cls, geoms: Sequence[Dict[str, Any]], concurrency: Optional[int] = None
+    ) -> List[Optional[Tuple[str, str]]]:
+        """
+        Retrieve the newest satellite image for each of the given geometries.
+
+        With `stac_batch_search`, nearby geometries are clustered (see
+        `cluster_geometries`) and every cluster is searched once, over its
+        envelope. Each geometry is assigned the newest scene covering it, and
+        the geometries no scene covers are searched one by one.
+
+        The searches run concurrently, at most `stac_request_concurrency` at a
+        time, so the call takes about as long as the slowest search.
+
+        Args:
+            geoms (Sequence[Dict[str, Any]]): The GeoJSON geometries to search for.
+            concurrency (int, optional): Overrides `stac_request_concurrency`.
+
+        Returns:
+            List[Optional[Tuple[str, str]]]: The result of `newest_satellite_image`
+                for each geometry, in the same order as `geoms`.
+        """
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(concurrency or settings.stac_request_concurrency)
+
+        async def _search(geom: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+            async with semaphore:
+                return await cls.newest_satellite_image(geom)  # type: ignore[arg-type]
 
-        if items := list(search.items()):
+        async def _search_cluster(
+            geometries: List[shapely.Geometry],
+        ) -> List[Optional[Tuple[str, str]]]:
+            async with semaphore:
+                return await loop.run_in_executor(
+                    cls._executor, cls._search_newest_satellite_images, geometries
+                )
+
+        images: List[Optional[Tuple[str, str]]] = [None] * len(geoms)
+        uncovered = list(range(len(geoms)))
+        if settings.stac_batch_search and len(geoms) > 1:
+            geometries = geojson_to_geometries(geoms)
+            clusters = [
+                cluster
+                for cluster in cluster_geometries(
+                    geometries,
+                    settings.stac_batch_cluster_distance,
+                    settings.stac_batch_max_extent,
+                )
+                if len(cluster) > 1
+            ]
+            with stage("stac"):
+                results = await asyncio.gather(
+                    *(
+                        _search_cluster(list(geometries[cluster]))
+                        for cluster in clusters
+                    )
+                )
+            for cluster, cluster_images in zip(clusters, results):
+                for index, image in zip(cluster, cluster_images):
+                    images[index] = image
+            uncovered = [index for index, image in enumerate(images) if image is None]
+
+        with stage("stac"):
+            fallback = await asyncio.gather(
+                *(_search(geoms[index]) for index in uncovered)
+            )
+        for index, image in zip(uncovered, fallback):
+            images[index] = image
+        return images
+
+    @classmethod
+    def _search_newest_satellite_image(
+        cls, geom: Tuple[float, float, float, float]
+    ) -> Optional[Tuple[str, str]]:
+        with _observe_search("single"):
+            search = cls.client().search(
+                collections=[settings.stac_collection],
+                intersects=geom,  # type: ignore[arg-type]
+                sortby=[{"field": "properties.datetime", "direction": "desc"}],
+                query={
+                    "eo:cloud_cover": {"lt": settings.stac_max_cloud_cover},
+                },
+                max_items=1,
+            )
+            items = list(search.items())
+
+        if items:
             item = items[0]
             return item.assets["rendered_preview"].href, item.properties["datetime"]
 
         return None
+
+    @classmethod
+    def _search_newest_satellite_images(
+        cls, geometries: List[shapely.Geometry]
+    ) -> List[Optional[Tuple[str, str]]]:
+        """
+        Searches the newest scenes of a cluster at once, over its envelope.
+
+        Up to `stac_batch_max_items` scenes are read, newest first, and every
+        geometry is assigned the newest one whose footprint covers it, looked up
+        in an STRtree of the footprints. Geometries that no scene covers are
+        left as None, to be searched on their own.
+        """
+        with _observe_search("cluster"):
+            search = cls.client().search(
+                collections=[settings.stac_collection],
+                intersects=mapping(shapely.box(*shapely.total_bounds(geometries))),
+                sortby=[{"field": "properties.datetime", "direction": "desc"}],
+                query={
+                    "eo:cloud_cover": {"lt": settings.stac_max_cloud_cover},
+                },
+                max_items=settings.stac_batch_max_items,
+            )
+            items = sorted(
+                search.items(),
+                key=lambda item: item.properties["datetime"],
+                reverse=True,
+            )
+        images: List[Optional[Tuple[str, str]]] = [None] * len(geometries)
+        if not items:
+            return images
+
+        footprints = shapely.STRtree([shape(item.geometry) for item in items])
+        indexes, item_indexes = footprints.query(geometries, predicate="covered_by")
+        # Items are sorted newest first, so the lowest item index is the newest scene
+        for index, item_index in sorted(
+            zip(indexes.tolist(), item_indexes.tolist()), reverse=True
+        ):
+            item = items[item_index]
+            images[index] = (
+                item.assets["rendered_preview"].href,
+                item.properties["datetime"],
+            )
+        return images
@@ -0,0 +1,183 @@
+import asyncio
+import time
+
+from collections import OrderedDict
+from typing import (
+    Any,
+    Dict,
+    Generic,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+K = TypeVar("K", bound=Hashable)
+
+
+class TTLCache:
+    """
+    An in-process LRU cache whose entries expire after a time-to-live.
+
+    Once `maxsize` entries are stored, or `maxbytes` bytes for entries stored
+    with their size, the least recently used entry is evicted. Lookups are
+    counted, so the hit rate of every cache can be reported.
+
+    Attributes:
+        maxsize (int): The maximum number of entries kept in the cache.
+        ttl (float): The default time-to-live of an entry, in seconds.
+        maxbytes (int, optional): The maximum total size of the entries.
+        nbytes (int): The total size of the entries.
+        hits (int): The number of lookups answered by the cache.
+        misses (int): The number of lookups that missed or found an expired entry.
+    """
+
+    def __init__(
+        self, maxsize: int, ttl: float, maxbytes: Optional[int] = None
+    ) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.maxbytes = maxbytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[Hashable, Tuple[float, Any, int]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[Hashable]:
+        return iter(list(self._entries))
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Returns the cached value for `key`, or `default` if it is missing or expired.
+        """
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            if entry is not None:
+                self.delete(key)
+            self.misses += 1
+            return default
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(
+        self, key: Hashable, value: Any, ttl: Optional[float] = None, size: int = 0
+    ) -> None:
+        """
+        Stores `value` under `key`, evicting the least recently used entries if full.
+
+        Args:
+            key (Hashable): The cache key.
+            value (Any): The value to store.
+            ttl (float, optional): Overrides the default time-to-live for this entry.
+            size (int, optional): The size of the value in bytes, counted against
+                `maxbytes`. A value larger than `maxbytes` is not stored.
+        """
+        self.delete(key)
+        if self.maxbytes is not None and size > self.maxbytes:
+            return
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._entries[key] = (expires_at, value, size)
+        self.nbytes += size
+        while len(self._entries) > self.maxsize or (
+            self.maxbytes is not None and self.nbytes > self.maxbytes
+        ):
+            self.nbytes -= self._entries.popitem(last=False)[1][2]
+
+    def delete(self, key: Hashable) -> None:
+        if (entry := self._entries.pop(key, None)) is not None:
+            self.nbytes -= entry[2]
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.nbytes = 0
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Returns the size and hit/miss counters of the cache.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class SingleFlight(Generic[K]):
+    """
+    Coalesces concurrent calls for the same key into a single in-flight call.
+
+    A caller `claim`s its keys: it leads the keys nobody is working on, and is
+    handed the futures of the keys other callers are already working on. The
+    leader must `finish` (or `fail`) every key it leads, which resolves the
+    futures awaited by the other callers.
+
+    Attributes:
+        shared (int): The number of keys handed to a caller that did not lead them.
+    """
+
+    def __init__(self) -> None:
+        self.shared = 0
+        self._flights: Dict[K, asyncio.Future] = {}
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    def in_flight(self, keys: Iterable[K]) -> List[asyncio.Future]:
+        """
+        Returns the futures of the given keys that other callers are working on.
+        """
+        return [self._flights[key] for key in set(keys) if key in self._flights]
+
+    def claim(self, keys: Iterable[K]) -> Tuple[List[K], Dict[K, asyncio.Future]]:
+        """
+        Claims the given keys for the caller.
+
+        Args:
+            keys (Iterable[K]): The keys the caller is about to work on.
+
+        Returns:
+            Tuple[List[K], Dict[K, asyncio.Future]]: The keys the
+                caller now leads, and the futures of the keys led by other callers.
+        """
+        led: List[K] = []
+        joined: Dict[K, asyncio.Future] = {}
+        for key in dict.fromkeys(keys):
+            if (future := self._flights.get(key)) is not None:
+                joined[key] = future
+            else:
+                self._flights[key] = asyncio.get_running_loop().create_future()
+                led.append(key)
+        self.shared += len(joined)
+        return led, joined
+
+    def finish(self, results: Dict[K, Any]) -> None:
+        """
+        Resolves the futures of the given keys with their results.
+        """
+        for key, value in results.items():
+            future = self._flights.pop(key, None)
+            if future is not None and not future.done():
+                future.set_result(value)
+
+    def fail(self, keys: Iterable[K], error: BaseException) -> None:
+        """
+        Resolves the futures of the given keys with the error of their leader.
+        """
+        if isinstance(error, asyncio.CancelledError):
+            error = RuntimeError("The leading call was cancelled")
+        for key in keys:
+            future = self._flights.pop(key, None)
+            if future is not None and not future.done():
+                future.set_exception(error)
+                # Nobody may be waiting for it, which is not worth a warning
+                future.exception()
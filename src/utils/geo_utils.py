@@ -1,43 +1,266 @@
-from typing import Any, Dict, List, Tuple
+import hashlib
+import json
+import numpy as np
+import shapely
 
-from src.api.v1.schemas.geo_schemas import FeatureSchema
+from itertools import chain
+from shapely import GeometryType
+from shapely.geometry import shape
+from shapely.geometry.base import BaseGeometry
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple, Union
 
+from src.models.geo_models import SRID
 
-def coordinates_to_wkt(coordinates: List[List[Tuple[float, float]]]) -> str:
+
+def _offsets(counts: Sequence[int]) -> np.ndarray:
+    """
+    Converts the part counts of a ragged array into the offsets of its parts.
+    """
+    offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    return offsets
+
+
+def _ragged_polygons(
+    polygons: Sequence[Sequence[Sequence[Sequence[float]]]],
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Flattens GeoJSON polygon coordinates into a ragged array.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: The (x, y) coordinates, the
+            offsets of the rings into the coordinates and the offsets of the
+            polygons into the rings.
+
+    Raises:
+        ValueError: If a polygon has no rings, a ring has fewer than 4 positions
+            or a position is not a longitude and a latitude. shapely does not
+            check the offsets it is given, so these would crash the process.
+    """
+    if not all(polygons):
+        raise ValueError("Polygons must hold at least one ring")
+    rings = list(chain.from_iterable(polygons))
+    if min(map(len, rings)) < 4:
+        raise ValueError("Rings must hold at least 4 positions")
+    points = list(chain.from_iterable(rings))
+    try:
+        coords = np.array(points, dtype=np.float64)
+    except ValueError:
+        # Positions of mixed dimensions, only longitude and latitude are kept
+        coords = np.array([point[:2] for point in points], dtype=np.float64)
+    if coords.ndim != 2 or coords.shape[1] < 2:
+        raise ValueError("Positions must hold a longitude and a latitude")
+    return (
+        np.ascontiguousarray(coords[:, :2]),
+        _offsets([len(ring) for ring in rings]),
+        _offsets([len(polygon) for polygon in polygons]),
+    )
+
+
+def geojson_to_geometries(geometries: Sequence[Mapping[str, Any]]) -> np.ndarray:
+    """
+    Converts GeoJSON Polygon and MultiPolygon geometries into shapely geometries.
+
+    The coordinates of all geometries of a type are flattened into one ragged
+    array and built by shapely in a single vectorized call, instead of one
+    geometry at a time. Holes are kept as the interior rings of their polygon.
+
+    Args:
+        geometries (Sequence[Mapping[str, Any]]): The GeoJSON geometries.
+
+    Returns:
+        np.ndarray: The shapely geometries, in the order of `geometries`.
+
+    Raises:
+        ValueError: If a geometry is neither a Polygon nor a MultiPolygon, or
+            holds an empty polygon or ring.
+    """
+    result = np.empty(len(geometries), dtype=object)
+    polygons = [i for i, geom in enumerate(geometries) if geom["type"] == "Polygon"]
+    multipolygons = [
+        i for i, geom in enumerate(geometries) if geom["type"] == "MultiPolygon"
+    ]
+    if len(polygons) + len(multipolygons) != len(geometries):
+        raise ValueError("Only Polygon and MultiPolygon geometries are supported")
+
+    if polygons:
+        coords, ring_offsets, polygon_offsets = _ragged_polygons(
+            [geometries[i]["coordinates"] for i in polygons]
+        )
+        result[polygons] = shapely.from_ragged_array(
+            GeometryType.POLYGON, coords, (ring_offsets, polygon_offsets)
+        )
+    if multipolygons:
+        parts = [geometries[i]["coordinates"] for i in multipolygons]
+        if not all(parts):
+            raise ValueError("MultiPolygons must hold at least one polygon")
+        coords, ring_offsets, polygon_offsets = _ragged_polygons(
+            list(chain.from_iterable(parts))
+        )
+        result[multipolygons] = shapely.from_ragged_array(
+            GeometryType.MULTIPOLYGON,
+            coords,
+            (ring_offsets, polygon_offsets, _offsets([len(part) for part in parts])),
+        )
+    return result
+
+
+def cluster_geometries(
+    geometries: np.ndarray, distance: float, max_extent: float
+) -> List[List[int]]:
+    """
+    Groups nearby geometries into spatial clusters.
+
+    Geometries whose envelopes are less than `distance` apart, directly or
+    through other geometries of the cluster, share a cluster. The envelopes
+    are grown by half the distance and merged, and every geometry is assigned
+    to the merged envelope containing its own with an STRtree query. Clusters
+    spanning more than `max_extent` are split into single geometries again.
+
+    Args:
+        geometries (np.ndarray): The shapely geometries.
+        distance (float): The largest gap between geometries of a cluster, in
+            coordinate units.
+        max_extent (float): The largest width or height of a cluster, in
+            coordinate units.
+
+    Returns:
+        List[List[int]]: The indexes into `geometries` of every cluster.
     """
-    Convert a list of GeoJSON-style coordinates to a WKT string.
+    if not len(geometries):
+        return []
+    envelopes = shapely.buffer(
+        shapely.envelope(geometries),
+        distance / 2,
+        cap_style="square",
+        join_style="mitre",
+    )
+    merged = shapely.get_parts(shapely.union_all(envelopes))
+    indexes, labels = shapely.STRtree(merged).query(
+        shapely.centroid(envelopes), predicate="within"
+    )
+
+    members: Dict[int, List[int]] = {}
+    for index, label in sorted(zip(indexes.tolist(), labels.tolist())):
+        members.setdefault(label, []).append(index)
+
+    # The extent of the geometries, without the margin added to their envelopes
+    bounds = shapely.bounds(merged)
+    extents = np.maximum(bounds[:, 2] - bounds[:, 0], bounds[:, 3] - bounds[:, 1])
+    clusters: List[List[int]] = []
+    for label, cluster in members.items():
+        if extents[label] - distance > max_extent:
+            clusters.extend([index] for index in cluster)
+        else:
+            clusters.append(cluster)
+    return clusters
+
+
+def geometries_to_ewkb(geometries: np.ndarray, srid: int = SRID) -> List[bytes]:
+    """
+    Encodes shapely geometries as little-endian EWKB carrying an SRID.
 
     Args:
-        coordinates (List[List[Tuple[float, float]]]): A list of lists of
-            tuples, where each tuple represents a coordinate (longitude, latitude).
+        geometries (np.ndarray): The shapely geometries.
+        srid (int, optional): The SRID embedded in every geometry.
 
     Returns:
-        str: The WKT (Well-Known Text) representation of the polygon.
+        List[bytes]: The EWKB of each geometry, to be read by `ST_GeomFromEWKB`.
+    """
+    if not len(geometries):
+        return []
+    ewkbs: List[bytes] = shapely.to_wkb(
+        shapely.set_srid(geometries, srid),
+        output_dimension=2,
+        byte_order=1,
+        include_srid=True,
+    ).tolist()
+    return ewkbs
 
-    Example:
-        >>> coordinates_to_wkt([[(1.0, 2.0), (3.0, 4.0), (5.0, 6.0), (1.0, 2.0)]])
-        'POLYGON ((1.0 2.0, 3.0 4.0, 5.0 6.0, 1.0 2.0))'
+
+def normalized_wkb(
+    geom: Union[Dict[str, Any], BaseGeometry], grid_size: Optional[float] = None
+) -> bytes:
     """
-    wkt_coordinates = ", ".join(f"{lon} {lat}" for lon, lat in coordinates[0])
-    return f"POLYGON (({wkt_coordinates}))"
+    Encodes a GeoJSON geometry as canonical WKB.
 
+    The geometry is normalized (ring orientation and start vertex), so equal
+    polygons written differently share the same encoding. With `grid_size`,
+    coordinates are snapped to that grid first, so near-identical polygons
+    share it as well.
 
-def extract_info_geojson(data: FeatureSchema) -> Tuple[str, Dict[str, Any], str]:
+    Args:
+        geom (Union[Dict[str, Any], BaseGeometry]): The GeoJSON or shapely geometry.
+        grid_size (float, optional): The precision grid, in coordinate units.
+
+    Returns:
+        bytes: The little-endian WKB of the normalized geometry.
     """
-    Extracts information from a GeoJSON feature.
+    geometry = shape(geom) if isinstance(geom, dict) else geom
+    if grid_size:
+        geometry = shapely.set_precision(geometry, grid_size)
+    data: bytes = shapely.to_wkb(shapely.normalize(geometry), byte_order=1)
+    return data
 
-    This function extracts the name, geometry, and EWKT (Extended Well-Known Text)
-        polygon from a GeoJSON feature.
+
+def geometry_fingerprint(geom: Union[Dict[str, Any], BaseGeometry]) -> str:
+    """
+    Computes the fingerprint stored in `GeoField.fingerprint`.
+
+    Two geometries share a fingerprint when they have the same vertices,
+    regardless of ring orientation and start vertex.
 
     Args:
-        data (Feature): The GeoJSON feature from which to extract information.
+        geom (Union[Dict[str, Any], BaseGeometry]): The GeoJSON or shapely geometry.
 
     Returns:
-        Tuple[str, Dict[str, Any], str]: A tuple containing the name, geometry as
-            a dictionary, and EWKT (Extended Well-Known Text) polygon.
+        str: The hex SHA-256 digest of the normalized WKB.
     """
-    name = data.properties.get("name", "Unknown")
-    geom = dict(data.geometry)
-    ewkt_polygon = coordinates_to_wkt(geom["coordinates"])
+    return hashlib.sha256(normalized_wkb(geom)).hexdigest()
+
 
-    return name, geom, ewkt_polygon
+def geometry_fingerprints(geometries: np.ndarray) -> List[str]:
+    """
+    Computes the fingerprints of shapely geometries in one vectorized call.
+
+    Args:
+        geometries (np.ndarray): The shapely geometries.
+
+    Returns:
+        List[str]: The `geometry_fingerprint` of each geometry.
+    """
+    if not len(geometries):
+        return []
+    return [
+        hashlib.sha256(item).hexdigest()
+        for item in shapely.to_wkb(shapely.normalize(geometries), byte_order=1)
+    ]
+
+
+def geojson_feature(row: Mapping[str, Any]) -> str:
+    """
+    Serializes a GeoField row as a GeoJSON Feature.
+
+    The geometry is expected to be GeoJSON text already, as produced by
+    `ST_AsGeoJSON`, and is embedded as is instead of being parsed again.
+
+    Args:
+        row (Mapping[str, Any]): A row with `id`, `name`, `geom`, `image_url`
+            and `image_date` keys.
+
+    Returns:
+        str: The GeoJSON Feature, as compact JSON text.
+    """
+    image_date = row["image_date"]
+    properties = json.dumps(
+        {
+            "name": row["name"],
+            "image_url": row["image_url"],
+            "image_date": image_date.isoformat() if image_date else None,
+        },
+        separators=(",", ":"),
+    )
+    return (
+        f'{{"type":"Feature","id":{row["id"]},'
+        f'"geometry":{row["geom"]},"properties":{properties}}}'
+    )
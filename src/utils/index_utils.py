@@ -0,0 +1,91 @@
+import numpy as np
+import shapely
+
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+
+class GeometryIndex:
+    """
+    An in-memory spatial index of rows, each carrying a shapely geometry.
+
+    Rows are kept by id, and queried through a shapely STRtree. As an STRtree
+    cannot be modified, it is rebuilt on the first query after rows changed.
+
+    Attributes:
+        ready (bool): Whether the index holds every row, and may answer queries.
+        version (int): The version of the source of the rows they are current
+            with, which may lag behind the source.
+    """
+
+    def __init__(self) -> None:
+        self.ready = False
+        self.version = 0
+        self._rows: Dict[int, Mapping[str, Any]] = {}
+        self._geometries: Dict[int, shapely.Geometry] = {}
+        self._tree: Optional[shapely.STRtree] = None
+        self._tree_ids = np.empty(0, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def replace(
+        self,
+        rows: Iterable[Tuple[int, shapely.Geometry, Mapping[str, Any]]],
+        version: int = 0,
+    ) -> None:
+        """
+        Replaces every row of the index, and marks it ready.
+
+        Args:
+            rows (Iterable[Tuple[int, shapely.Geometry, Mapping[str, Any]]]): The
+                id, geometry and attributes of each row.
+            version (int, optional): The version of the source the rows were
+                read at, or an earlier one.
+        """
+        self._rows, self._geometries = {}, {}
+        self.upsert(rows)
+        self.version = version
+        self.ready = True
+
+    def upsert(
+        self, rows: Iterable[Tuple[int, shapely.Geometry, Mapping[str, Any]]]
+    ) -> None:
+        for row_id, geometry, attributes in rows:
+            self._rows[row_id] = attributes
+            self._geometries[row_id] = geometry
+        self._tree = None
+
+    def remove(self, row_ids: Iterable[int]) -> None:
+        for row_id in row_ids:
+            self._rows.pop(row_id, None)
+            self._geometries.pop(row_id, None)
+        self._tree = None
+
+    def rows(self, row_ids: Iterable[int]) -> List[Mapping[str, Any]]:
+        return [self._rows[row_id] for row_id in row_ids]
+
+    def query(
+        self, geometries: Any, predicate: Optional[str] = "intersects"
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Finds the rows matching each of the given geometries.
+
+        Args:
+            geometries (Any): A shapely geometry or an array of them.
+            predicate (str, optional): The shapely predicate the row geometries
+                are tested with. If None, only bounding boxes are compared.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: For every match, the index of the
+                query geometry and the id of the row, sorted by both.
+        """
+        if self._tree is None:
+            self._tree_ids = np.fromiter(self._geometries, dtype=np.int64)
+            self._tree = shapely.STRtree(list(self._geometries.values()))
+
+        indexes, positions = self._tree.query(
+            np.atleast_1d(geometries), predicate=predicate
+        )
+        row_ids = self._tree_ids[positions]
+        order = np.lexsort((row_ids, indexes))
+        return indexes[order], row_ids[order]
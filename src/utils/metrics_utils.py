@@ -0,0 +1,298 @@
+import math
+import threading
+import time
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import (
+    Dict,
+    FrozenSet,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
+
+# Upper bounds of the latency histograms, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+# Seconds spent in each stage of the current request, see `stage`
+_stage_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar(
+    "stage_timings", default=None
+)
+_open_stages: ContextVar[FrozenSet[str]] = ContextVar(
+    "open_stages", default=frozenset()
+)
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    escaped = (
+        value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        for value in values
+    )
+    return (
+        "{" + ",".join(f'{name}="{value}"' for name, value in zip(names, escaped)) + "}"
+    )
+
+
+class _Metric:
+    """
+    A metric family, whose samples are kept per combination of label values.
+
+    Samples may be recorded from any thread.
+    """
+
+    kind = "untyped"
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+            *self._samples(),
+        ]
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+M = TypeVar("M", bound=_Metric)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def set(self, value: float, **labels: str) -> None:
+        """
+        Sets a count kept elsewhere, e.g. by `TTLCache`, when it is collected.
+        """
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in values
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # Per label values: the count of each bucket (not cumulative), and the sum
+        self._values: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = next(i for i, bound in enumerate(self.buckets) if value <= bound)
+        with self._lock:
+            counts, total = self._values.setdefault(
+                key, ([0] * len(self.buckets), [0.0])
+            )
+            counts[index] += 1
+            total[0] += value
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = sorted(
+                (key, list(counts), total[0])
+                for key, (counts, total) in self._values.items()
+            )
+        samples = []
+        for key, counts, total in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                labels = _format_labels(
+                    self.labelnames + ("le",), key + (_format_value(bound),)
+                )
+                samples.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            samples.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            samples.append(f"{self.name}_count{labels} {cumulative}")
+        return samples
+
+
+class MetricsRegistry:
+    """
+    The metrics of the application, rendered in the Prometheus text format.
+    """
+
+    def __init__(self) -> None:
+        self._metrics: List[_Metric] = []
+
+    def counter(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        lines = [line for metric in self._metrics for line in metric.render()]
+        return "\n".join(lines) + "\n"
+
+    def _register(self, metric: M) -> M:
+        if any(item.name == metric.name for item in self._metrics):
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics.append(metric)
+        return metric
+
+
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "http_request_duration_seconds",
+    "Latency of HTTP requests, by route template.",
+    ("method", "route", "status"),
+)
+DB_STATEMENT_SECONDS = REGISTRY.histogram(
+    "db_statement_duration_seconds",
+    "Latency of database statements, by operation and table.",
+    ("operation", "table"),
+    buckets=DB_LATENCY_BUCKETS,
+)
+DB_STATEMENT_ERRORS = REGISTRY.counter(
+    "db_statement_errors_total",
+    "Database statements that failed, by operation and table.",
+    ("operation", "table"),
+)
+DB_POOL_CHECKOUT_SECONDS = REGISTRY.histogram(
+    "db_pool_checkout_duration_seconds",
+    "Time spent waiting for a connection of the pool.",
+    buckets=DB_LATENCY_BUCKETS,
+)
+DB_POOL_CONNECTIONS = REGISTRY.gauge(
+    "db_pool_connections",
+    "Connections of the pool: in use, idle, overflow, and the pool size.",
+    ("state",),
+)
+STAC_SEARCH_SECONDS = REGISTRY.histogram(
+    "stac_search_duration_seconds",
+    "Latency of STAC API searches, of one geometry or of a cluster.",
+    ("kind",),
+)
+STAC_SEARCH_ERRORS = REGISTRY.counter(
+    "stac_search_errors_total",
+    "STAC API searches that failed after their retries, by exception type.",
+    ("kind", "error"),
+)
+CACHE_ENTRIES = REGISTRY.gauge(
+    "cache_entries", "Entries held by an in-process cache.", ("cache",)
+)
+CACHE_HITS = REGISTRY.counter(
+    "cache_hits_total", "Lookups answered by an in-process cache.", ("cache",)
+)
+CACHE_MISSES = REGISTRY.counter(
+    "cache_misses_total",
+    "Lookups that missed or found an expired entry in an in-process cache.",
+    ("cache",),
+)
+CACHE_HIT_RATIO = REGISTRY.gauge(
+    "cache_hit_ratio", "Share of the lookups answered by a cache.", ("cache",)
+)
+STAC_CACHE_LOOKUPS = REGISTRY.counter(
+    "stac_cache_lookups_total",
+    "Newest-image lookups by the tier that answered them, or shared in flight.",
+    ("result",),
+)
+
+
+@contextmanager
+def stage_timings() -> Iterator[Dict[str, float]]:
+    """
+    Collects the seconds spent in each `stage` within the block, e.g. a request.
+    """
+    timings: Dict[str, float] = {}
+    token = _stage_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _stage_timings.reset(token)
+
+
+def add_stage_time(name: str, seconds: float) -> None:
+    """
+    Adds seconds to a stage of the current `stage_timings`, if any.
+    """
+    if (timings := _stage_timings.get()) is not None:
+        timings[name] = timings.get(name, 0.0) + seconds
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """
+    Times the block as a stage of the current `stage_timings`.
+
+    Nested or concurrent blocks of the same stage, e.g. searches gathered
+    within a timed search, are only counted once, by the outermost block.
+    """
+    if _stage_timings.get() is None or name in _open_stages.get():
+        yield
+        return
+    token = _open_stages.set(_open_stages.get() | {name})
+    started_at = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_stage_time(name, time.perf_counter() - started_at)
+        _open_stages.reset(token)
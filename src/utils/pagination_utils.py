@@ -0,0 +1,41 @@
+import base64
+import binascii
+import json
+
+
+def encode_cursor(last_id: int) -> str:
+    """
+    Encodes the id of the last item of a page as an opaque cursor.
+
+    Args:
+        last_id (int): The id of the last item returned.
+
+    Returns:
+        str: A URL-safe cursor pointing after that item.
+    """
+    payload = json.dumps({"id": last_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    """
+    Decodes a cursor created by `encode_cursor`.
+
+    Args:
+        cursor (str): The opaque cursor received from a client.
+
+    Returns:
+        int: The id after which the next page starts.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        last_id = json.loads(payload)["id"]
+    except (binascii.Error, json.JSONDecodeError, KeyError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+    if not isinstance(last_id, int):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return last_id
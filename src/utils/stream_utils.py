@@ -0,0 +1,190 @@
+import codecs
+import json
+
+from typing import Any, AsyncIterable, AsyncIterator, Dict, List
+
+_WHITESPACE = " \t\n\r"
+# Returned by `FeatureStreamParser._decode` while a value is still being received
+_INCOMPLETE = object()
+
+
+class FeatureStreamParser:
+    """
+    Parses GeoJSON Features incrementally from a stream of bytes.
+
+    The stream holds either a FeatureCollection, whose `features` are returned
+    one by one while the array is still being received, or Features written one
+    after the other, e.g. one per line as in the NDJSON export. Only the JSON
+    value being received is buffered, so memory does not grow with the stream.
+
+    Attributes:
+        max_value_size (int): The largest JSON value buffered, in characters.
+    """
+
+    def __init__(self, max_value_size: int) -> None:
+        self.max_value_size = max_value_size
+        self._decoder = json.JSONDecoder()
+        self._text_decoder = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._position = 0
+        # "value" between top-level objects, "member" and "items" inside one
+        self._state = "value"
+        self._members: Dict[str, Any] = {}
+
+    def feed(self, chunk: bytes) -> List[Dict[str, Any]]:
+        """
+        Parses the next chunk of the stream.
+
+        Args:
+            chunk (bytes): The chunk of UTF-8 encoded JSON text.
+
+        Returns:
+            List[Dict[str, Any]]: The Features completed by the chunk.
+
+        Raises:
+            ValueError: If the stream is not valid GeoJSON, or holds a value
+                larger than `max_value_size`.
+        """
+        self._buffer = self._buffer[self._position :] + self._text_decoder.decode(chunk)
+        self._position = 0
+        features: List[Dict[str, Any]] = []
+        while self._step(features):
+            pass
+        if len(self._buffer) - self._position > self.max_value_size:
+            raise ValueError(
+                f"GeoJSON value larger than {self.max_value_size} characters"
+            )
+        return features
+
+    def close(self) -> None:
+        """
+        Ends the stream.
+
+        Raises:
+            ValueError: If the stream ended in the middle of a value.
+        """
+        self._buffer = self._buffer[self._position :] + self._text_decoder.decode(
+            b"", final=True
+        )
+        self._position = 0
+        if self._state != "value" or self._buffer.strip(_WHITESPACE):
+            raise ValueError("Unexpected end of the GeoJSON stream")
+
+    def _skip_whitespace(self) -> bool:
+        """
+        Moves past whitespace, returning whether a character follows it.
+        """
+        buffer, position = self._buffer, self._position
+        while position < len(buffer) and buffer[position] in _WHITESPACE:
+            position += 1
+        self._position = position
+        return position < len(buffer)
+
+    def _decode(self) -> Any:
+        """
+        Decodes the value at the current position, or returns `_INCOMPLETE`.
+        """
+        try:
+            value, end = self._decoder.raw_decode(self._buffer, self._position)
+        except json.JSONDecodeError:
+            return _INCOMPLETE
+        # A number may go on in the next chunk, so one more character is needed
+        if end == len(self._buffer):
+            return _INCOMPLETE
+        self._position = end
+        return value
+
+    def _step(self, features: List[Dict[str, Any]]) -> bool:
+        """
+        Parses the next token, returning False if more bytes are needed.
+        """
+        if not self._skip_whitespace():
+            return False
+        char = self._buffer[self._position]
+
+        if self._state == "value":
+            if char != "{":
+                raise ValueError("Expected a GeoJSON FeatureCollection or Feature")
+            self._position += 1
+            self._state, self._members = "member", {}
+            return True
+
+        if self._state == "items":
+            if char in ",]":
+                self._position += 1
+                self._state = "member" if char == "]" else "items"
+                return True
+            if (feature := self._decode()) is _INCOMPLETE:
+                return False
+            features.append(self._feature(feature))
+            return True
+
+        if char in ",}":
+            self._position += 1
+            if char == "}":
+                self._end_object(features)
+            return True
+        # A member, whose value is decoded whole unless it is the features array
+        start = self._position
+        key = self._decode()
+        if key is _INCOMPLETE or not self._skip_whitespace():
+            self._position = start
+            return False
+        if not isinstance(key, str) or self._buffer[self._position] != ":":
+            raise ValueError("Expected a GeoJSON member")
+        self._position += 1
+        if not self._skip_whitespace():
+            self._position = start
+            return False
+        if key == "features" and self._buffer[self._position] == "[":
+            self._position += 1
+            self._members["features"] = None
+            self._state = "items"
+            return True
+        if (value := self._decode()) is _INCOMPLETE:
+            self._position = start
+            return False
+        self._members[key] = value
+        return True
+
+    def _end_object(self, features: List[Dict[str, Any]]) -> None:
+        members, self._members = self._members, {}
+        self._state = "value"
+        if "features" in members:
+            return
+        features.append(self._feature(members))
+
+    @staticmethod
+    def _feature(value: Any) -> Dict[str, Any]:
+        if not isinstance(value, dict) or value.get("type") != "Feature":
+            raise ValueError("Expected a GeoJSON Feature")
+        return value
+
+
+async def read_feature_batches(
+    chunks: AsyncIterable[bytes], batch_size: int, max_value_size: int
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    """
+    Parses a stream of GeoJSON bytes into batches of Features.
+
+    Args:
+        chunks (AsyncIterable[bytes]): The stream, see `FeatureStreamParser`.
+        batch_size (int): The number of Features per batch, except the last one.
+        max_value_size (int): The largest JSON value buffered, in characters.
+
+    Yields:
+        List[Dict[str, Any]]: The Features, in stream order.
+
+    Raises:
+        ValueError: If the stream is not valid GeoJSON.
+    """
+    parser = FeatureStreamParser(max_value_size)
+    batch: List[Dict[str, Any]] = []
+    async for chunk in chunks:
+        batch += parser.feed(chunk)
+        while len(batch) >= batch_size:
+            yield batch[:batch_size]
+            batch = batch[batch_size:]
+    parser.close()
+    if batch:
+        yield batch
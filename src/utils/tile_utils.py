@@ -0,0 +1,73 @@
+import math
+
+from typing import Tuple
+
+# Vector tiles are clipped with a buffer of 256 units out of an extent of 4096
+TILE_EXTENT = 4096
+TILE_BUFFER = 256
+
+
+def tile_bounds(
+    z: int, x: int, y: int, buffer: float = 0.0
+) -> Tuple[float, float, float, float]:
+    """
+    Computes the longitude/latitude bounds of a Web Mercator (XYZ) tile.
+
+    Args:
+        z (int): The zoom level.
+        x (int): The tile column.
+        y (int): The tile row, counted from the north.
+        buffer (float, optional): A margin added on every side, as a fraction
+            of the tile size.
+
+    Returns:
+        Tuple[float, float, float, float]: The bounds, specified as
+            (min_lon, min_lat, max_lon, max_lat).
+    """
+    n = 1 << z
+
+    def _lon(column: float) -> float:
+        return column / n * 360.0 - 180.0
+
+    def _lat(row: float) -> float:
+        row = min(max(row, 0.0), n)
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / n))))
+
+    return (
+        _lon(x - buffer),
+        _lat(y + 1 + buffer),
+        _lon(x + 1 + buffer),
+        _lat(y - buffer),
+    )
+
+
+def zoom_tolerance(z: int) -> float:
+    """
+    Computes the simplification tolerance of a zoom level, in degrees.
+
+    The tolerance is the width of one pixel of a 256 pixels wide tile, so a
+    geometry simplified with it looks the same at that zoom level.
+
+    Args:
+        z (int): The zoom level.
+
+    Returns:
+        float: The tolerance, in degrees of longitude.
+    """
+    return 360.0 / (256 << z)
+
+
+def is_valid_tile(z: int, x: int, y: int) -> bool:
+    """
+    Checks that a tile exists at its zoom level.
+    """
+    return 0 <= z <= 30 and 0 <= x < 2**z and 0 <= y < 2**z
+
+
+def bounds_intersect(
+    a: Tuple[float, float, float, float], b: Tuple[float, float, float, float]
+) -> bool:
+    """
+    Checks whether two (min_x, min_y, max_x, max_y) boxes intersect.
+    """
+    return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
@@ -0,0 +1,13 @@
+from src.api.common.etags import etag_matches
+
+
+def test_etag_matches():
+    assert etag_matches('"abc"', '"abc"')
+    assert etag_matches('W/"abc"', '"abc"')
+    assert etag_matches('"xyz", "abc"', '"abc"')
+    assert etag_matches("*", '"abc"')
+
+
+def test_etag_does_not_match():
+    assert not etag_matches(None, '"abc"')
+    assert not etag_matches('"xyz"', '"abc"')
@@ -0,0 +1,112 @@
+import asyncio
+import httpx
+import pytest
+
+from fastapi import APIRouter, FastAPI
+from pydantic import BaseModel
+from unittest.mock import MagicMock
+
+from src.api.common.metrics import (
+    MetricsMiddleware,
+    TimedRoute,
+    collect_database_metrics,
+    server_timing,
+)
+from src.utils.cache_utils import TTLCache
+from src.utils.metrics_utils import REGISTRY, add_stage_time, stage
+
+
+class _Item(BaseModel):
+    id: int
+
+
+def _app() -> FastAPI:
+    router = APIRouter(route_class=TimedRoute)
+
+    @router.get("/items/{item_id}", response_model=_Item)
+    async def read_item(item_id: int):
+        add_stage_time("db", 0.002)
+        with stage("stac"):
+            await asyncio.sleep(0.01)
+        return {"id": item_id}
+
+    @router.get("/fail")
+    async def fail():
+        raise RuntimeError("boom")
+
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+    app.include_router(router)
+    return app
+
+
+def _server_timing(header: str) -> dict:
+    return {
+        name: float(duration.removeprefix("dur="))
+        for name, duration in (metric.split(";") for metric in header.split(", "))
+    }
+
+
+def test_server_timing_format():
+    assert server_timing({"db": 0.0125}, 0.05) == (
+        "pool;dur=0.0, db;dur=12.5, stac;dur=0.0, serialize;dur=0.0, total;dur=50.0"
+    )
+
+
+@pytest.mark.asyncio
+async def test_middleware_reports_stages_and_route_latency():
+    transport = httpx.ASGITransport(app=_app(), raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.get("/items/7")
+        failed = await client.get("/fail")
+        unmatched = await client.get("/missing")
+
+    assert response.json() == {"id": 7}
+    timings = _server_timing(response.headers["server-timing"])
+    assert list(timings) == ["pool", "db", "stac", "serialize", "total"]
+    assert timings["db"] == 2.0
+    assert timings["stac"] >= 10.0
+    assert 0 <= timings["serialize"] < timings["stac"] <= timings["total"]
+    assert failed.status_code == 500
+    assert unmatched.status_code == 404
+
+    metrics = REGISTRY.render()
+    assert (
+        'http_request_duration_seconds_count{method="GET",'
+        'route="/items/{item_id}",status="200"} 1'
+    ) in metrics
+    assert (
+        'http_request_duration_seconds_count{method="GET",route="/fail",status="500"}'
+    ) in metrics
+    assert (
+        'http_request_duration_seconds_count{method="GET",route="unmatched",'
+        'status="404"}'
+    ) in metrics
+
+
+def test_collect_database_metrics():
+    pool = MagicMock()
+    pool.size.return_value = 10
+    pool.checkedout.return_value = 3
+    pool.checkedin.return_value = 7
+    pool.overflow.return_value = -7
+    tile_cache = TTLCache(maxsize=10, ttl=60)
+    tile_cache.set("a", 1)
+    tile_cache.get("a")
+    tile_cache.get("b")
+    database = MagicMock(
+        engine=MagicMock(pool=pool),
+        stac_cache=TTLCache(maxsize=10, ttl=60),
+        tile_cache=tile_cache,
+        response_cache=TTLCache(maxsize=10, ttl=60),
+        stac_cache_stats={"memory_hits": 4, "misses": 1},
+    )
+
+    collect_database_metrics(database)
+
+    metrics = REGISTRY.render()
+    assert 'db_pool_connections{state="in_use"} 3.0' in metrics
+    assert 'db_pool_connections{state="overflow"} 0.0' in metrics
+    assert 'cache_hit_ratio{cache="tiles"} 0.5' in metrics
+    assert 'cache_entries{cache="tiles"} 1.0' in metrics
+    assert 'stac_cache_lookups_total{result="memory_hits"} 4.0' in metrics
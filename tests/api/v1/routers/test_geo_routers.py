@@ -1,9 +1,14 @@
+import json
 import pytest
 
 from fastapi import status
+from unittest.mock import patch
 
+from src.config.base import settings
+from src.database.postgres.handler import PostgreSQLHandler
 from src.models.geo_models import GeoField
-from src.api.v1.schemas.geo_schemas import GeoFieldResponseSchema
+from src.api.v1.schemas.geo_schemas import GeoFieldResponseSchema, GeoJSONSchema
+from src.utils.index_utils import GeometryIndex
 
 
 @pytest.mark.asyncio
@@ -15,18 +20,42 @@ async def test_retrieve_satellite_image(async_client_v1, geojson_request):
     assert all(isinstance(item, GeoField) for item in satellite_images)
 
 
+@pytest.mark.asyncio
+async def test_retrieve_satellite_image_async(async_client_v1, geojson_request):
+    response = await async_client_v1.post(
+        "/satellite-image", json=geojson_request, params={"async": True}
+    )
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    job = response.json()
+    assert (job["status"], job["total"], job["processed"]) == ("pending", 1, 0)
+    assert response.headers["location"].endswith(f"/geo/jobs/{job['id']}")
+
+    response = await async_client_v1.get(f"/jobs/{job['id']}")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == job
+
+    response = await async_client_v1.get(f"/jobs/{job['id'] + 1}")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
 @pytest.mark.asyncio
 async def test_insert_geo_fields(async_client_v1, geojson_request):
     response = await async_client_v1.post("/fields", json=geojson_request)
     assert response.status_code == status.HTTP_200_OK
 
-    assert len(response.json()) == 1
-    satellite_images = [GeoFieldResponseSchema(**item) for item in response.json()]
+    assert len(response.json()["inserted"]) == 1
+    assert response.json()["skipped"] == []
+    satellite_images = [
+        GeoFieldResponseSchema(**item) for item in response.json()["inserted"]
+    ]
     assert all(isinstance(item, GeoFieldResponseSchema) for item in satellite_images)
 
     response = await async_client_v1.post("/fields", json=geojson_request)
     assert response.status_code == status.HTTP_200_OK
-    assert response.json() == []
+    assert response.json() == {
+        "inserted": [],
+        "skipped": [{"index": 0, "name": "Rotterdam", "reason": "duplicate name"}],
+    }
 
 
 @pytest.mark.asyncio
@@ -37,15 +66,329 @@ async def test_retrieve_geo_fields(async_client_v1, geojson_request):
     response = await async_client_v1.get("/fields")
     assert response.status_code == status.HTTP_200_OK
 
-    assert len(response.json()) == 1
-    satellite_images = [GeoFieldResponseSchema(**item) for item in response.json()]
+    assert len(response.json()["items"]) == 1
+    assert response.json()["next"] is None
+    satellite_images = [
+        GeoFieldResponseSchema(**item) for item in response.json()["items"]
+    ]
     assert all(isinstance(item, GeoFieldResponseSchema) for item in satellite_images)
 
 
+@pytest.mark.asyncio
+async def test_retrieve_geo_fields_not_modified(async_client_v1, geojson_request):
+    await async_client_v1.post("/fields", json=geojson_request)
+    response = await async_client_v1.get("/fields")
+    etag = response.headers["etag"]
+
+    response = await async_client_v1.get("/fields", headers={"If-None-Match": etag})
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert response.content == b""
+
+    # Another query of the same table version has its own ETag
+    response = await async_client_v1.get("/fields", params={"limit": 1})
+    assert response.headers["etag"] != etag
+
+    # Every write of GeoFields changes the ETag
+    feature = geojson_request["features"][0]
+    feature["properties"]["name"] = "Delft"
+    feature["geometry"]["coordinates"][0][0][0] += 0.001
+    feature["geometry"]["coordinates"][0][-1][0] += 0.001
+    await async_client_v1.post("/fields", json=geojson_request)
+
+    response = await async_client_v1.get("/fields", headers={"If-None-Match": etag})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["etag"] != etag
+    assert len(response.json()["items"]) == 2
+
+
+@pytest.mark.asyncio
+async def test_retrieve_geo_fields_pagination(async_client_v1, geojson_request):
+    feature = geojson_request["features"][0]
+    geojson_request["features"] = [
+        {
+            **feature,
+            "properties": {"name": f"Field {index}"},
+            "geometry": {
+                "type": "Polygon",
+                "coordinates": [
+                    [[index, 0.0], [index + 1.0, 0.0], [index, 1.0], [index, 0.0]]
+                ],
+            },
+        }
+        for index in range(3)
+    ]
+    response = await async_client_v1.post("/fields", json=geojson_request)
+    assert len(response.json()["inserted"]) == 3
+
+    names, cursor = [], None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        page = (await async_client_v1.get("/fields", params=params)).json()
+        names += [item["name"] for item in page["items"]]
+        if not (cursor := page["next"]):
+            break
+    assert names == ["Field 0", "Field 1", "Field 2"]
+
+    response = await async_client_v1.get(
+        "/fields", params={"name_prefix": "Field 1", "has_image": False}
+    )
+    assert [item["name"] for item in response.json()["items"]] == ["Field 1"]
+
+    response = await async_client_v1.get("/fields", params={"cursor": "not-a-cursor"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.asyncio
+async def test_retrieve_geo_fields_in_bbox(async_client_v1, geojson_request):
+    await async_client_v1.post("/fields", json=geojson_request)
+
+    viewport = {"minx": 4.0, "miny": 51.0, "maxx": 5.0, "maxy": 52.0}
+    response = await async_client_v1.get("/fields/bbox", params=viewport)
+    assert response.status_code == status.HTTP_200_OK
+    assert [item["name"] for item in response.json()["items"]] == ["Rotterdam"]
+    assert response.json()["next"] is None
+
+    response = await async_client_v1.get(
+        "/fields/bbox", params={**viewport, "minx": 6.0}
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.asyncio
+async def test_retrieve_geo_fields_in_bbox_follows_field_index(
+    async_client_v1, test_database_handler, geojson_request
+):
+    test_database_handler.field_index = GeometryIndex()
+    await test_database_handler.load_field_index()
+    with patch.object(settings, "field_index_enabled", True):
+        other_worker = PostgreSQLHandler(database="test_geo_stac_db")
+        try:
+            [inserted], _ = await other_worker.insert_geo_fields(
+                GeoJSONSchema(**geojson_request)
+            )
+        finally:
+            await other_worker.dispose()
+
+    # The index has not applied the write, so its answer is not cached as current
+    viewport = {"minx": 4.0, "miny": 51.0, "maxx": 5.0, "maxy": 52.0}
+    response = await async_client_v1.get("/fields/bbox", params=viewport)
+    assert response.json()["items"] == []
+    etag = response.headers["etag"]
+
+    await test_database_handler.apply_field_changes(
+        f"{other_worker._instance_id}:1:{inserted.id}"
+    )
+    response = await async_client_v1.get(
+        "/fields/bbox", params=viewport, headers={"If-None-Match": etag}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["etag"] != etag
+    assert [item["name"] for item in response.json()["items"]] == ["Rotterdam"]
+
+
+@pytest.mark.asyncio
+async def test_retrieve_geo_fields_simplified(async_client_v1, geojson_request):
+    await async_client_v1.post("/fields", json=geojson_request)
+
+    viewport = {"minx": 4.0, "miny": 51.0, "maxx": 5.0, "maxy": 52.0}
+    response = await async_client_v1.get("/fields/bbox", params={**viewport, "zoom": 8})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["items"][0]["geom"].startswith("POLYGON")
+
+    response = await async_client_v1.get(
+        "/fields", params={"zoom": 8, "tolerance": 0.01}
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.asyncio
+async def test_retrieve_tile(async_client_v1, geojson_request):
+    await async_client_v1.post("/fields", json=geojson_request)
+
+    response = await async_client_v1.get("/tiles/10/524/338.mvt")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"] == "application/vnd.mapbox-vector-tile"
+    assert b"geo_fields" in response.content and b"Rotterdam" in response.content
+    assert response.headers["cache-control"] == "no-cache"
+
+    response = await async_client_v1.get(
+        "/tiles/10/524/338.mvt",
+        headers={"If-None-Match": response.headers["etag"]},
+    )
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    response = await async_client_v1.get("/tiles/1/2/0.mvt")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.asyncio
+async def test_export_geo_fields(async_client_v1, geojson_request):
+    await async_client_v1.post("/fields", json=geojson_request)
+
+    response = await async_client_v1.get("/fields/export")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"] == "application/x-ndjson"
+    features = [json.loads(line) for line in response.text.splitlines()]
+    assert [feature["properties"]["name"] for feature in features] == ["Rotterdam"]
+    assert features[0]["geometry"]["type"] == "Polygon"
+
+    response = await async_client_v1.get("/fields/export", params={"format": "geojson"})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"] == "application/geo+json"
+    collection = response.json()
+    assert collection["type"] == "FeatureCollection"
+    assert collection["features"] == features
+
+
+@pytest.mark.asyncio
+async def test_import_geo_fields(async_client_v1, geojson_request):
+    data = json.dumps(geojson_request).encode()
+
+    async def _chunks():
+        for offset in range(0, len(data), 100):
+            yield data[offset : offset + 100]
+
+    response = await async_client_v1.post("/fields/import", content=_chunks())
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {
+        "received": 1,
+        "inserted": 1,
+        "skipped": 0,
+        "invalid": [],
+    }
+
+    # The NDJSON export is imported back, its fields already exist
+    export = await async_client_v1.get("/fields/export")
+    response = await async_client_v1.post("/fields/import", content=export.content)
+    assert response.status_code == status.HTTP_200_OK
+    assert (response.json()["inserted"], response.json()["skipped"]) == (0, 1)
+
+    response = await async_client_v1.post("/fields/import", content=data[:-10])
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
 @pytest.mark.asyncio
 async def test_find_intersecting_fields(async_client_v1, geojson_request):
     response = await async_client_v1.post("/fields-intersect", json=geojson_request)
     assert response.status_code == status.HTTP_200_OK
 
-    satellite_images = [GeoFieldResponseSchema(**item) for item in response.json()]
+    satellite_images = [
+        GeoFieldResponseSchema(**item) for item in response.json()["fields"]
+    ]
     assert all(isinstance(item, GeoFieldResponseSchema) for item in satellite_images)
+    assert response.json()["features"] == [
+        {"index": 0, "name": "Rotterdam", "field_ids": [], "intersections": None}
+    ]
+
+
+@pytest.mark.asyncio
+async def test_find_intersecting_fields_echoes_any_name(
+    async_client_v1, geojson_request
+):
+    feature = geojson_request["features"][0]
+    geojson_request["features"] = [
+        {**feature, "properties": {"name": None}},
+        {**feature, "properties": {"name": 42}},
+    ]
+
+    response = await async_client_v1.post("/fields-intersect", json=geojson_request)
+    assert response.status_code == status.HTTP_200_OK
+    assert [item["name"] for item in response.json()["features"]] == [None, 42]
+
+
+@pytest.mark.asyncio
+async def test_find_intersecting_fields_empty_ring(async_client_v1, geojson_request):
+    ring = geojson_request["features"][0]["geometry"]["coordinates"][0]
+    for geometry in (
+        {"type": "MultiPolygon", "coordinates": [[[]]]},
+        {"type": "Polygon", "coordinates": [[[]]]},
+        {"type": "Polygon", "coordinates": []},
+        {"type": "Polygon", "coordinates": [[]]},
+        {"type": "Polygon", "coordinates": [ring, []]},
+        {"type": "Polygon", "coordinates": [ring[:3]]},
+        {"type": "MultiPolygon", "coordinates": [[ring], []]},
+        {"type": "MultiPolygon", "coordinates": [[ring], [[]]]},
+    ):
+        geojson_request["features"][0]["geometry"] = geometry
+        response = await async_client_v1.post("/fields-intersect", json=geojson_request)
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+@pytest.mark.asyncio
+async def test_find_intersecting_fields_not_modified(async_client_v1, geojson_request):
+    await async_client_v1.post("/fields", json=geojson_request)
+    response = await async_client_v1.post("/fields-intersect", json=geojson_request)
+    etag = response.headers["etag"]
+
+    response = await async_client_v1.post(
+        "/fields-intersect", json=geojson_request, headers={"If-None-Match": etag}
+    )
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    # The ETag depends on the queried features
+    geojson_request["features"][0]["properties"]["name"] = "Delft"
+    response = await async_client_v1.post(
+        "/fields-intersect", json=geojson_request, headers={"If-None-Match": etag}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["features"][0]["name"] == "Delft"
+
+
+@pytest.mark.asyncio
+async def test_find_intersecting_fields_geojson(async_client_v1, geojson_request):
+    await async_client_v1.post("/fields", json=geojson_request)
+
+    response = await async_client_v1.post(
+        "/fields-intersect",
+        json=geojson_request,
+        params={"geometry_format": "geojson"},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert [item["geom"] for item in response.json()["fields"]] == [
+        geojson_request["features"][0]["geometry"]
+    ]
+
+
+@pytest.mark.asyncio
+async def test_find_intersecting_fields_multipolygon(async_client_v1, geojson_request):
+    await async_client_v1.post("/fields", json=geojson_request)
+    polygon = geojson_request["features"][0]["geometry"]["coordinates"]
+    geojson_request["features"][0]["geometry"] = {
+        "type": "MultiPolygon",
+        "coordinates": [polygon, [[[0.0, 0.0], [1.0, 0.0], [0.0, 1.0], [0.0, 0.0]]]],
+    }
+
+    response = await async_client_v1.post(
+        "/fields-intersect", json=geojson_request, params={"measure": True}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    [feature] = response.json()["features"]
+    assert feature["field_ids"] == [item["id"] for item in response.json()["fields"]]
+    assert feature["intersections"][0]["overlap_ratio"] == pytest.approx(1.0)
+
+
+@pytest.mark.asyncio
+async def test_insert_geo_fields_multipolygon_with_hole(
+    async_client_v1, geojson_request
+):
+    outer = [[0.0, 0.0], [4.0, 0.0], [4.0, 4.0], [0.0, 4.0], [0.0, 0.0]]
+    hole = [[1.0, 1.0], [2.0, 1.0], [2.0, 2.0], [1.0, 1.0]]
+    geojson_request["features"][0]["geometry"] = {
+        "type": "MultiPolygon",
+        "coordinates": [
+            [outer, hole],
+            [[[5.0, 5.0], [6.0, 5.0], [5.0, 6.0], [5.0, 5.0]]],
+        ],
+    }
+
+    response = await async_client_v1.post("/fields", json=geojson_request)
+    assert response.status_code == status.HTTP_200_OK
+    [inserted] = response.json()["inserted"]
+    assert inserted["geom"].startswith("MULTIPOLYGON (((0 0, 4 0, 4 4, 0 4, 0 0), (1 1")
+
+    geojson_request["features"][0]["geometry"] = {
+        "type": "Point",
+        "coordinates": [[[0.0, 0.0]]],
+    }
+    response = await async_client_v1.post("/fields", json=geojson_request)
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
@@ -0,0 +1,74 @@
+import pytest
+
+from unittest.mock import patch
+
+from benchmarks.load import latency_stats, summarize
+from benchmarks.stac_stub import StacStubServer
+from benchmarks.traffic import TrafficEntry, TrafficGenerator
+from src.config.base import settings
+from src.services.stac_service import STAC
+
+
+def test_latency_stats():
+    stats = latency_stats([index / 1000 for index in range(1, 101)])
+
+    assert stats["p50"] == pytest.approx(50.5)
+    assert stats["p99"] == pytest.approx(99.01)
+    assert stats["max"] == 100
+    assert latency_stats([])["p95"] == 0
+
+
+def test_summarize():
+    samples = [("list", 200, 0.01), ("list", 500, 1.0), ("tile", 200, 0.02)]
+
+    summary = summarize(samples, elapsed=2.0)
+    assert list(summary) == ["list", "tile", "total"]
+    assert summary["list"]["requests"] == 2
+    assert summary["list"]["errors"] == 1
+    assert summary["list"]["statuses"] == {"200": 1, "500": 1}
+    # Failed requests are left out of the latencies
+    assert summary["list"]["latency_ms"]["max"] == 10
+    assert summary["total"]["throughput"] == 1.5
+
+
+def test_traffic_generator():
+    entries = [
+        TrafficEntry(
+            name="insert", method="POST", path="/fields", body="$new_features"
+        ),
+        TrafficEntry(name="intersect", method="POST", path="/x", body="$features"),
+    ]
+    traffic = TrafficGenerator(entries, features=3, seed=1)
+    requests = {request["name"]: request for request in (next(traffic), next(traffic))}
+    again = {request["name"]: request for request in (next(traffic), next(traffic))}
+
+    assert again["intersect"]["json"] == requests["intersect"]["json"]
+    names = [
+        feature["properties"]["name"]
+        for request in (requests, again)
+        for feature in request["insert"]["json"]["features"]
+    ]
+    assert len(set(names)) == 6
+
+
+def test_stac_stub_answers_searches():
+    geom = {
+        "type": "Polygon",
+        "coordinates": [[[4.3, 51.8], [4.4, 51.8], [4.4, 51.9], [4.3, 51.8]]],
+    }
+    with StacStubServer(latency=0, seed=1) as stub:
+        with patch.object(settings, "stac_api_url", stub.url), patch.object(
+            settings, "stac_catalog_path", None
+        ), patch.object(STAC, "_client", None):
+            url, image_date = STAC._search_newest_satellite_image(geom)  # type: ignore[misc, arg-type]
+
+            stub.failure_rate = 1.0
+            with patch.object(settings, "stac_max_retries", 0), patch.object(
+                STAC, "_client", None
+            ):
+                with pytest.raises(Exception):
+                    STAC._search_newest_satellite_image(geom)  # type: ignore[arg-type]
+
+    assert url.startswith("https://stac-stub.invalid/")
+    assert image_date == "2024-01-10T10:54:21Z"
+    assert stub.stats()["failures"] >= 1
@@ -0,0 +1,40 @@
+from benchmarks.micro import cases, find_regressions, measure
+
+
+def test_cases_run():
+    for name, setup in cases(quick=True).items():
+        assert setup()() is not None, name
+
+
+def test_measure():
+    result = measure(lambda: [0] * 1000, repeat=2)
+
+    assert result["seconds"] >= result["min_seconds"] > 0
+    assert result["peak_bytes"] >= result["result_bytes"] >= 8000
+
+
+def test_find_regressions():
+    baselines = {
+        "fast": {"seconds": 1.0, "peak_bytes": 100_000},
+        "lean": {"seconds": 1.0, "peak_bytes": 100_000},
+    }
+    results = {
+        "fast": {"seconds": 1.2, "peak_bytes": 100_000},
+        "lean": {"seconds": 1.3, "peak_bytes": 120_000},
+        "new": {"seconds": 9.0, "peak_bytes": 9_000_000},
+    }
+
+    regressions = find_regressions(
+        results, baselines, tolerance=0.25, memory_tolerance=0.1
+    )
+    assert len(regressions) == 2
+    assert all(item.startswith("lean: ") for item in regressions)
+
+    # Small peaks may grow by a few blocks
+    results = {"fast": {"seconds": 1.0, "peak_bytes": 103_000}}
+    baselines = {"fast": {"seconds": 1.0, "peak_bytes": 1_000}}
+    assert find_regressions(results, baselines, 0.25, 0.1) == [
+        "fast: peaks at 103000 bytes, up from 1000 bytes"
+    ]
+    baselines = {"fast": {"seconds": 1.0, "peak_bytes": 100_000}}
+    assert find_regressions(results, baselines, 0.25, 0.1) == []
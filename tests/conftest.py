@@ -2,25 +2,40 @@ import pytest_asyncio
 
 from datetime import datetime, timezone
 from fastapi import FastAPI
+from geoalchemy2 import WKBElement
 from httpx import ASGITransport, AsyncClient
 from typing import AsyncGenerator, Callable
 
 from src.api.v1.schemas.geo_schemas import GeoJSONSchema
 from src.database.postgres.handler import PostgreSQLHandler
-from src.models.geo_models import GeoField
-from src.utils.geo_utils import extract_info_geojson
+from src.models.geo_models import SRID, GeoField
+from src.utils.geo_utils import geojson_to_geometries, geometries_to_ewkb
 
 
 @pytest_asyncio.fixture
-async def override_get_database_dependency() -> Callable:
+async def test_database_handler() -> AsyncGenerator[PostgreSQLHandler, None]:
+    """
+    A pytest fixture providing one test database handler shared by every
+    request of a test, mirroring the application-wide handler.
+    """
+    db_handler = PostgreSQLHandler(database="test_geo_stac_db")
+    await db_handler.initialize()
+    yield db_handler
+
+    await db_handler.drop_tables()
+    await db_handler.dispose()
+
+
+@pytest_asyncio.fixture
+async def override_get_database_dependency(
+    test_database_handler: PostgreSQLHandler,
+) -> Callable:
     """
     A pytest fixture to override the database handler dependency for testing.
     """
 
     async def _override_get_database_dependency():
-        db_handler = PostgreSQLHandler(database="test_geo_stac_db")
-        await db_handler.initialize()
-        return db_handler
+        return test_database_handler
 
     return _override_get_database_dependency
 
@@ -45,9 +60,7 @@ async def app(
     app.dependency_overrides[get_database_dependency] = override_get_database_dependency
     yield app
 
-    db_handler = PostgreSQLHandler(database="test_geo_stac_db")
-    await db_handler.drop_tables()
-    await db_handler.engine.dispose()
+    app.dependency_overrides.clear()
 
 
 @pytest_asyncio.fixture
@@ -83,7 +96,7 @@ async def postgres() -> AsyncGenerator:
 
     # Perform cleanup after all tests are done
     await db_handler.drop_tables()
-    await db_handler.engine.dispose()
+    await db_handler.dispose()
 
 
 @pytest_asyncio.fixture
@@ -138,10 +151,10 @@ def satellite_image_instance(geojson_data: GeoJSONSchema) -> GeoField:
         GeoField: An instance of GeoField.
     """
     feature = geojson_data.features[0]
-    name, geom, ewkt_polygon = extract_info_geojson(feature)
+    [ewkb] = geometries_to_ewkb(geojson_to_geometries([feature.geometry.model_dump()]))
     return GeoField(
-        name=name,
-        geom=ewkt_polygon,
+        name=feature.properties["name"],
+        geom=WKBElement(ewkb, srid=SRID, extended=True),
         image_url="https://planetarycomputer.microsoft.com/api/data/v1/item/preview.png",
-        image_date=datetime.now(timezone.utc).isoformat(timespec="microseconds") + "Z",
+        image_date=datetime.now(timezone.utc),
     )
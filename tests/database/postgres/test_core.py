@@ -1,7 +1,8 @@
 import pytest
 
-from sqlalchemy import select
+from sqlalchemy import select, text
 
+from src.config.base import settings
 from src.models.geo_models import GeoField
 
 
@@ -22,7 +23,13 @@ async def test_create_tables(postgres):
             table_names = await connection.run_sync(
                 session.bind.dialect.get_table_names
             )
-            assert table_names == ["spatial_ref_sys", "geo_fields"]
+            assert set(table_names) == {
+                "spatial_ref_sys",
+                "geo_fields",
+                "stac_search_cache",
+                "satellite_image_jobs",
+                "table_versions",
+            }
 
 
 @pytest.mark.asyncio
@@ -43,3 +50,15 @@ async def test_drop_tables(postgres):
             assert table_names == ["spatial_ref_sys"]
 
     await postgres.create_tables()
+
+
+@pytest.mark.asyncio
+async def test_engine_pool_settings(postgres):
+    assert postgres.engine.pool.size() == settings.postgres_pool_size
+    assert postgres.engine.pool._max_overflow == settings.postgres_max_overflow
+
+    async with postgres.engine.connect() as connection:
+        result = await connection.execute(
+            text("SELECT setting FROM pg_settings WHERE name = 'statement_timeout'")
+        )
+        assert int(result.scalar()) == settings.postgres_statement_timeout
@@ -1,8 +1,19 @@
+import asyncio
 import pytest
 
+from datetime import datetime, timezone
+from shapely.geometry import Point, box, shape
+from sqlalchemy import select, update
 from unittest.mock import patch
 
+from src.api.v1.schemas.geo_schemas import FeatureSchema, GeoJSONSchema
+from src.config.base import settings
+from src.database.postgres.handler import PostgreSQLHandler
 from src.models.geo_models import GeoField
+from src.models.stac_models import StacSearchCache
+from src.utils.geo_utils import geometry_fingerprint
+
+IMAGE_DATE = "2024-01-10T10:54:21.024000Z"
 
 
 @pytest.mark.asyncio
@@ -10,7 +21,7 @@ from src.models.geo_models import GeoField
 async def test_retrieve_satellite_image(
     mock_newest_satellite_image, postgres, geojson_data
 ):
-    mock_newest_satellite_image.return_value = ("mock_url", "mock_datetime")
+    mock_newest_satellite_image.return_value = ("mock_url", IMAGE_DATE)
 
     result = await postgres.retrieve_satellite_image(geojson_data)
     assert all(isinstance(item, GeoField) for item in result)
@@ -19,14 +30,424 @@ async def test_retrieve_satellite_image(
     mock_newest_satellite_image.assert_called()
 
 
+@pytest.mark.asyncio
+@patch("src.services.stac_service.STAC.newest_satellite_image")
+async def test_retrieve_satellite_image_updates_existing_field(
+    mock_newest_satellite_image, postgres, geojson_data
+):
+    mock_newest_satellite_image.return_value = ("mock_url", IMAGE_DATE)
+    inserted, _ = await postgres.insert_geo_fields(geojson_data)
+
+    # The repeated feature matches the same field and is processed once
+    geojson_data.features.append(geojson_data.features[0])
+    result = await postgres.retrieve_satellite_image(geojson_data)
+
+    assert [item.id for item in result] == [inserted[0].id]
+    assert result[0].image_url == "mock_url"
+    assert mock_newest_satellite_image.call_count == 1
+    assert len(await postgres.retrieve_geo_fields()) == 1
+
+
+@pytest.mark.asyncio
+@patch("src.services.stac_service.STAC.newest_satellite_image")
+async def test_satellite_image_job(mock_newest_satellite_image, postgres, geojson_data):
+    mock_newest_satellite_image.return_value = ("mock_url", IMAGE_DATE)
+    triangle = [[[0.0, 0.0], [1.0, 0.0], [0.0, 1.0], [0.0, 0.0]]]
+    geojson_data.features.append(
+        FeatureSchema(
+            type="Feature",
+            properties={"name": "Rotterdam"},
+            geometry={"type": "Polygon", "coordinates": triangle},
+        )
+    )
+    queued = await postgres.create_satellite_image_job(geojson_data)
+    assert (queued.status, queued.total, queued.processed) == ("pending", 2, 0)
+
+    job = await postgres.claim_satellite_image_job()
+    assert job.id == queued.id and job.status == "running"
+    assert await postgres.claim_satellite_image_job() is None
+
+    assert await postgres.run_satellite_image_job(job)
+    job = await postgres.get_satellite_image_job(queued.id)
+    assert (job.status, job.processed) == ("completed", 2)
+
+    # The second feature reuses the name of the first one, with another geometry
+    [field] = await postgres.retrieve_geo_fields()
+    assert job.results == [
+        {
+            "index": 0,
+            "name": "Rotterdam",
+            "status": "done",
+            "field_id": field["id"],
+            "image_url": "mock_url",
+            "image_date": "2024-01-10T10:54:21.024000+00:00",
+        },
+        {
+            "index": 1,
+            "name": "Rotterdam",
+            "status": "skipped",
+            "error": "A field with this name already exists",
+        },
+    ]
+
+
+@pytest.mark.asyncio
+async def test_claim_stale_satellite_image_job(postgres, geojson_data):
+    queued = await postgres.create_satellite_image_job(geojson_data)
+    await postgres.claim_satellite_image_job()
+
+    # A running job is only claimed again once its worker stopped reporting progress
+    assert await postgres.claim_satellite_image_job() is None
+    with patch.object(settings, "job_stale_after", -1):
+        job = await postgres.claim_satellite_image_job()
+    assert job.id == queued.id
+
+    await postgres.release_satellite_image_job(job.id)
+    assert (await postgres.get_satellite_image_job(job.id)).status == "pending"
+
+
+@pytest.mark.asyncio
+@patch("src.services.stac_service.STAC.newest_satellite_image")
+async def test_refresh_stale_images(
+    mock_newest_satellite_image, postgres, geojson_data
+):
+    mock_newest_satellite_image.return_value = ("mock_url", IMAGE_DATE)
+    await postgres.retrieve_satellite_image(geojson_data)
+    assert await postgres.refresh_stale_images() == 0
+
+    # Once the image is older than `image_refresh_max_age`, a newer one is searched
+    async with postgres.session_factory() as session:
+        await session.execute(
+            update(GeoField).values(
+                image_date=datetime(2020, 1, 1, tzinfo=timezone.utc)
+            )
+        )
+        await session.commit()
+    mock_newest_satellite_image.return_value = ("new_url", "2024-02-01T10:00:00Z")
+    postgres.stac_cache.clear()
+
+    assert await postgres.refresh_stale_images() == 1
+    [field] = await postgres.retrieve_geo_fields()
+    assert field["image_url"] == "new_url"
+    assert field["image_date"] == datetime(2024, 2, 1, 10, tzinfo=timezone.utc)
+    assert await postgres.refresh_stale_images() == 0
+
+
+@pytest.mark.asyncio
+@patch("src.services.stac_service.STAC.newest_satellite_image")
+async def test_refresh_stale_images_without_newer_image(
+    mock_newest_satellite_image, postgres, geojson_data
+):
+    mock_newest_satellite_image.return_value = ("mock_url", IMAGE_DATE)
+    await postgres.retrieve_satellite_image(geojson_data)
+    mock_newest_satellite_image.return_value = None
+
+    with patch.object(settings, "image_refresh_max_age", 0):
+        assert await postgres.refresh_stale_images() == 1
+        # The field keeps its image, and is not searched again right away
+        assert await postgres.refresh_stale_images() == 0
+
+    [field] = await postgres.retrieve_geo_fields()
+    assert field["image_url"] == "mock_url"
+
+
+@pytest.mark.asyncio
+@patch("src.services.stac_service.STAC.newest_satellite_image")
+async def test_refresh_stale_images_once_per_interval(
+    mock_newest_satellite_image, postgres, geojson_data
+):
+    mock_newest_satellite_image.return_value = ("mock_url", IMAGE_DATE)
+    await postgres.retrieve_satellite_image(geojson_data)
+    mock_newest_satellite_image.return_value = None
+
+    with patch.object(settings, "image_refresh_max_age", 0), patch.object(
+        settings, "image_refresh_recheck_after", 0
+    ):
+        # The refreshers of every worker claim a single batch between them
+        searched = await asyncio.gather(
+            *(postgres.refresh_stale_images(interval=60) for _ in range(3))
+        )
+        assert sorted(searched) == [0, 0, 1]
+        assert mock_newest_satellite_image.call_count == 1
+        assert await postgres.refresh_stale_images(interval=60) == 0
+        assert await postgres.refresh_stale_images() == 1
+
+
+@pytest.mark.asyncio
+@patch("src.services.stac_service.STAC.newest_satellite_image")
+async def test_newest_satellite_images_cache(
+    mock_newest_satellite_image, postgres, geojson_data
+):
+    mock_newest_satellite_image.return_value = ("mock_url", "mock_datetime")
+    geom = geojson_data.features[0].geometry.model_dump()
+
+    result = await postgres.newest_satellite_images([geom, geom])
+    assert result == [("mock_url", "mock_datetime")] * 2
+    assert mock_newest_satellite_image.call_count == 1
+
+    # Served by the in-process cache
+    await postgres.newest_satellite_images([geom])
+    assert postgres.stac_cache_stats["memory_hits"] == 1
+
+    # Served by the shared table, as another worker would be
+    postgres.stac_cache.clear()
+    result = await postgres.newest_satellite_images([geom])
+    assert result == [("mock_url", "mock_datetime")]
+    assert postgres.stac_cache_stats["table_hits"] == 1
+    assert mock_newest_satellite_image.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_trim_stac_cache(postgres):
+    with patch.object(settings, "stac_cache_table_max_entries", 1):
+        await postgres._store_stac_results({"found": ("mock_url", "mock_datetime")})
+        await postgres._store_stac_results({"missing": None})
+        # The table is only trimmed off the request path
+        async with postgres.session_factory() as session:
+            assert len(list(await session.scalars(select(StacSearchCache.key)))) == 2
+
+        await postgres.trim_stac_cache()
+
+    # Searches without an image expire first
+    async with postgres.session_factory() as session:
+        assert list(await session.scalars(select(StacSearchCache.key))) == ["found"]
+
+
+@pytest.mark.asyncio
+@patch("src.services.stac_service.STAC.newest_satellite_image")
+async def test_newest_satellite_images_single_flight(
+    mock_newest_satellite_image, postgres, geojson_data
+):
+    async def _search(geom):
+        await asyncio.sleep(0.1)
+        return ("mock_url", IMAGE_DATE)
+
+    mock_newest_satellite_image.side_effect = _search
+    geom = geojson_data.features[0].geometry.model_dump()
+
+    results = await asyncio.gather(
+        *(postgres.newest_satellite_images([geom]) for _ in range(3))
+    )
+    assert results == [[("mock_url", IMAGE_DATE)]] * 3
+    assert mock_newest_satellite_image.call_count == 1
+    assert postgres.stac_cache_stats["shared_searches"] == 2
+
+
+@pytest.mark.asyncio
+@patch("src.services.stac_service.STAC.newest_satellite_image")
+async def test_retrieve_satellite_image_single_flight(
+    mock_newest_satellite_image, postgres, geojson_data
+):
+    async def _search(geom):
+        await asyncio.sleep(0.1)
+        return ("mock_url", IMAGE_DATE)
+
+    mock_newest_satellite_image.side_effect = _search
+    # A second handler has its own in-process state, as another worker would
+    other_worker = PostgreSQLHandler(database="test_geo_stac_db")
+    try:
+        results = await asyncio.gather(
+            postgres.retrieve_satellite_image(geojson_data),
+            postgres.retrieve_satellite_image(geojson_data),
+            other_worker.retrieve_satellite_image(geojson_data),
+        )
+    finally:
+        await other_worker.dispose()
+
+    # One request stored the field, the others found it stored. Each worker
+    # searches once, as no connection is held while searching.
+    assert sorted(len(result) for result in results) == [0, 0, 1]
+    assert mock_newest_satellite_image.call_count == 2
+    assert len(await postgres.retrieve_geo_fields()) == 1
+
+
+@pytest.mark.asyncio
+@patch("src.services.stac_service.STAC.newest_satellite_image")
+async def test_retrieve_satellite_image_search_outlasts_statement_timeout(
+    mock_newest_satellite_image, postgres, geojson_data
+):
+    async def _search(geom):
+        await asyncio.sleep(0.5)
+        return ("mock_url", IMAGE_DATE)
+
+    mock_newest_satellite_image.side_effect = _search
+    # Two workers whose statements time out long before a search completes
+    with patch.object(settings, "postgres_statement_timeout", 100):
+        workers = [PostgreSQLHandler(database="test_geo_stac_db") for _ in range(2)]
+    try:
+        results = await asyncio.gather(
+            *(worker.retrieve_satellite_image(geojson_data) for worker in workers)
+        )
+    finally:
+        for worker in workers:
+            await worker.dispose()
+
+    assert sorted(len(result) for result in results) == [0, 1]
+    fields = await postgres.retrieve_geo_fields()
+    assert [field["image_url"] for field in fields] == ["mock_url"]
+
+
+@pytest.mark.asyncio
+@patch("src.services.stac_service.STAC.newest_satellite_image")
+async def test_retrieve_satellite_image_with_one_connection(
+    mock_newest_satellite_image, postgres, geojson_data
+):
+    mock_newest_satellite_image.return_value = ("mock_url", IMAGE_DATE)
+    triangle = [[[0.0, 0.0], [1.0, 0.0], [0.0, 1.0], [0.0, 0.0]]]
+    other = GeoJSONSchema(
+        type="FeatureCollection",
+        features=[
+            FeatureSchema(
+                type="Feature",
+                properties={"name": "Triangle"},
+                geometry={"type": "Polygon", "coordinates": triangle},
+            )
+        ],
+    )
+    # Each request holds at most one connection at a time, so requests
+    # sharing a single one take turns rather than waiting for each other
+    with (
+        patch.object(settings, "postgres_pool_size", 1),
+        patch.object(settings, "postgres_max_overflow", 0),
+    ):
+        worker = PostgreSQLHandler(database="test_geo_stac_db")
+    try:
+        results = await asyncio.wait_for(
+            asyncio.gather(
+                worker.retrieve_satellite_image(geojson_data),
+                worker.retrieve_satellite_image(other),
+            ),
+            timeout=10,
+        )
+    finally:
+        await worker.dispose()
+
+    assert [len(result) for result in results] == [1, 1]
+
+
 @pytest.mark.asyncio
 async def test_insert_geo_fields(postgres, geojson_data):
-    result = await postgres.insert_geo_fields(geojson_data)
+    result, skipped = await postgres.insert_geo_fields(geojson_data)
     assert len(result) == 1
+    assert skipped == []
     assert all(isinstance(item, GeoField) for item in result)
     assert result[0].name == geojson_data.features[0].properties["name"]
 
 
+@pytest.mark.asyncio
+async def test_geo_fields_version(postgres, geojson_data):
+    assert await postgres.geo_fields_version() == 0
+
+    await postgres.insert_geo_fields(geojson_data)
+    assert await postgres.geo_fields_version() == 1
+
+    # Nothing is written when every feature is skipped
+    await postgres.insert_geo_fields(geojson_data)
+    assert await postgres.geo_fields_version() == 1
+
+
+@pytest.mark.asyncio
+async def test_insert_geo_fields_reports_duplicates(postgres, geojson_data):
+    geojson_data.features.append(geojson_data.features[0])
+
+    result, skipped = await postgres.insert_geo_fields(geojson_data)
+    assert len(result) == 1
+    assert [(item.index, item.reason) for item in skipped] == [(1, "duplicate name")]
+
+    result, skipped = await postgres.insert_geo_fields(geojson_data)
+    assert result == []
+    assert [item.index for item in skipped] == [0, 1]
+
+
+@pytest.mark.asyncio
+async def test_insert_geo_fields_skips_duplicate_geometry(postgres, geojson_data):
+    await postgres.insert_geo_fields(geojson_data)
+
+    geojson_data.features[0].properties["name"] = "Rotterdam again"
+    result, skipped = await postgres.insert_geo_fields(geojson_data)
+    assert result == []
+    assert [(item.name, item.reason) for item in skipped] == [
+        ("Rotterdam again", "duplicate geometry")
+    ]
+
+
+@pytest.mark.asyncio
+async def test_import_geo_fields(postgres, geojson_request):
+    await postgres.insert_geo_fields(GeoJSONSchema(**geojson_request))
+    rotterdam = geojson_request["features"][0]
+    fields = [
+        {
+            "type": "Feature",
+            "properties": {"name": f"Field {index}"},
+            "geometry": {
+                "type": "Polygon",
+                "coordinates": [[[index, 0], [index + 1, 0], [index, 1], [index, 0]]],
+            },
+        }
+        for index in range(5)
+    ]
+    point = {"type": "Point", "coordinates": [0, 0]}
+    invalid = {"type": "Feature", "properties": {"name": "Point"}, "geometry": point}
+
+    async def _batches():
+        # Duplicates of a stored field, and of a field earlier in the import
+        yield [fields[0], rotterdam, fields[1]]
+        yield [fields[2], invalid, fields[0]]
+        yield fields[3:]
+
+    result = await postgres.import_geo_fields(_batches())
+    assert (result.received, result.inserted, result.skipped) == (8, 5, 2)
+    assert [(item.index, item.name) for item in result.invalid] == [(4, "Point")]
+
+    rows = await postgres.retrieve_geo_fields()
+    assert [row["name"] for row in rows] == ["Rotterdam"] + [
+        f"Field {index}" for index in range(5)
+    ]
+    async with postgres.session_factory() as session:
+        fingerprints = await session.scalars(
+            select(GeoField.fingerprint).where(GeoField.name == "Field 3")
+        )
+        assert list(fingerprints) == [geometry_fingerprint(fields[3]["geometry"])]
+    # Every batch is committed, and recorded, on its own
+    assert await postgres.geo_fields_version() == 4
+
+
+@pytest.mark.asyncio
+async def test_import_geo_fields_keeps_written_batches(postgres, geojson_request):
+    rotterdam = geojson_request["features"][0]
+
+    async def _batches():
+        yield [rotterdam]
+        yield [rotterdam]
+        raise ValueError("Invalid GeoJSON")
+
+    with pytest.raises(ValueError):
+        await postgres.import_geo_fields(_batches())
+    rows = await postgres.retrieve_geo_fields()
+    assert [row["name"] for row in rows] == ["Rotterdam"]
+    assert await postgres.geo_fields_version() == 1
+
+
+@pytest.mark.asyncio
+async def test_backfill_fingerprints(postgres, geojson_data, satellite_image_instance):
+    duplicate = GeoField(name="Duplicate", geom=satellite_image_instance.geom)
+    async with postgres.session_factory() as session:
+        session.add_all([satellite_image_instance, duplicate])
+        await session.commit()
+
+    assert await postgres.backfill_fingerprints() == 1
+
+    async with postgres.session_factory() as session:
+        query = await session.execute(select(GeoField.name, GeoField.fingerprint))
+        fingerprints = dict(query.tuples().all())
+
+    geom = geojson_data.features[0].geometry.model_dump()
+    assert fingerprints == {
+        satellite_image_instance.name: geometry_fingerprint(geom),
+        "Duplicate": None,
+    }
+
+
 @pytest.mark.asyncio
 async def test_retrieve_geo_fields(postgres, geojson_data):
     await postgres.insert_geo_fields(geojson_data)
@@ -34,16 +455,199 @@ async def test_retrieve_geo_fields(postgres, geojson_data):
     result = await postgres.retrieve_geo_fields()
 
     assert len(result) == 1
-    assert all(isinstance(item, GeoField) for item in result)
-    assert result[0].name == geojson_data.features[0].properties["name"]
+    assert result[0]["name"] == geojson_data.features[0].properties["name"]
+    assert result[0]["geom"].startswith("POLYGON")
+
+    result = await postgres.retrieve_geo_fields(geometry_format="geojson")
+    assert result[0]["geom"] == geojson_data.features[0].geometry.model_dump()
+
+
+@pytest.mark.asyncio
+async def test_retrieve_geo_fields_simplified(postgres, geojson_data):
+    # A circle with many vertices, about 1 km wide
+    geojson_data.features[0].geometry.coordinates = [
+        list(map(list, Point(4.4, 51.9).buffer(0.005, 64).exterior.coords))
+    ]
+    await postgres.insert_geo_fields(geojson_data)
+
+    def vertices(result):
+        return len(shape(result[0]["geom"]).exterior.coords)
+
+    full = await postgres.retrieve_geo_fields(geometry_format="geojson")
+    z14 = await postgres.retrieve_geo_fields(geometry_format="geojson", zoom=14)
+    z6 = await postgres.retrieve_geo_fields(geometry_format="geojson", zoom=6)
+    coarse = await postgres.retrieve_geo_fields(
+        geometry_format="geojson", tolerance=0.01
+    )
+
+    assert vertices(full) >= vertices(z14) > vertices(z6)
+    assert vertices(coarse) <= vertices(z6)
 
 
 @pytest.mark.asyncio
 async def test_get_intersecting_fields(postgres, geojson_data):
     await postgres.insert_geo_fields(geojson_data)
 
-    result = await postgres.get_intersecting_fields(geojson_data)
+    fields, features = await postgres.get_intersecting_fields(geojson_data)
 
-    assert len(result) == 1
-    assert all(isinstance(item, GeoField) for item in result)
-    assert result[0].name == geojson_data.features[0].properties["name"]
+    assert len(fields) == 1
+    assert fields[0]["name"] == geojson_data.features[0].properties["name"]
+    assert features[0]["field_ids"] == [fields[0]["id"]]
+
+
+@pytest.mark.asyncio
+async def test_get_intersecting_fields_per_feature(postgres, geojson_data):
+    await postgres.insert_geo_fields(geojson_data)
+    field = geojson_data.features[0]
+    min_lon, min_lat, max_lon, max_lat = shape(field.geometry.model_dump()).bounds
+    west_half = box(
+        min_lon - 1.0, min_lat - 1.0, (min_lon + max_lon) / 2, max_lat + 1.0
+    )
+    query = GeoJSONSchema(
+        type="FeatureCollection",
+        features=[
+            {
+                "type": "Feature",
+                "properties": {"name": "Away"},
+                "geometry": {
+                    "type": "Polygon",
+                    "coordinates": [[[0.0, 0.0], [1.0, 0.0], [0.0, 1.0], [0.0, 0.0]]],
+                },
+            },
+            {
+                "type": "Feature",
+                "properties": {"name": "West"},
+                "geometry": {
+                    "type": "Polygon",
+                    "coordinates": [list(map(list, west_half.exterior.coords))],
+                },
+            },
+        ],
+    )
+
+    fields, features = await postgres.get_intersecting_fields(query, measure=True)
+
+    assert [feature["field_ids"] for feature in features] == [[], [fields[0]["id"]]]
+    assert features[0]["intersections"] == []
+    [intersection] = features[1]["intersections"]
+    assert intersection["area"] > 0
+    assert intersection["overlap_ratio"] == pytest.approx(0.5, abs=0.05)
+
+
+@pytest.mark.asyncio
+async def test_retrieve_geo_fields_in_bbox(postgres, geojson_data):
+    geojson_data.features[0].geometry.coordinates = [
+        [[0.0, 0.0], [1.0, 0.0], [0.0, 1.0], [0.0, 0.0]]
+    ]
+    await postgres.insert_geo_fields(geojson_data)
+
+    result = await postgres.retrieve_geo_fields_in_bbox((0.1, 0.1, 0.2, 0.2))
+    assert [item["name"] for item in result] == ["Rotterdam"]
+
+    # Inside the bounding box of the triangle, but outside the triangle itself
+    corner = (0.8, 0.8, 0.9, 0.9)
+    assert await postgres.retrieve_geo_fields_in_bbox(corner) == []
+    assert len(await postgres.retrieve_geo_fields_in_bbox(corner, exact=False)) == 1
+
+    assert await postgres.retrieve_geo_fields_in_bbox((5.0, 5.0, 6.0, 6.0)) == []
+
+
+@pytest.mark.asyncio
+async def test_field_index(postgres, geojson_data):
+    geojson_data.features[0].geometry.coordinates = [
+        [[0.0, 0.0], [1.0, 0.0], [0.0, 1.0], [0.0, 0.0]]
+    ]
+    await postgres.insert_geo_fields(geojson_data)
+    with patch.object(settings, "field_index_enabled", True):
+        worker = PostgreSQLHandler(database="test_geo_stac_db")
+    try:
+        await worker.load_field_index()
+        assert len(worker.field_index) == 1
+
+        # Answered in memory, with the same rows as the database
+        for geometry_format in ("wkt", "geojson"):
+            assert await worker.get_intersecting_fields(
+                geojson_data, geometry_format
+            ) == await postgres.get_intersecting_fields(geojson_data, geometry_format)
+        for bbox, exact in [((0.1, 0.1, 0.2, 0.2), True), ((0.8, 0.8, 0.9, 0.9), True)]:
+            assert await worker.retrieve_geo_fields_in_bbox(
+                bbox, exact=exact
+            ) == await postgres.retrieve_geo_fields_in_bbox(bbox, exact=exact)
+        corner = (0.8, 0.8, 0.9, 0.9)
+        assert len(await worker.retrieve_geo_fields_in_bbox(corner, exact=False)) == 1
+
+        # Writes of this worker are applied once committed
+        geojson_data.features[0].properties["name"] = "Delft"
+        geojson_data.features[0].geometry.coordinates = [
+            [[0.0, 0.0], [0.5, 0.0], [0.0, 0.5], [0.0, 0.0]]
+        ]
+        with patch.object(settings, "field_index_enabled", True):
+            [inserted], _ = await worker.insert_geo_fields(geojson_data)
+        _, features = await worker.get_intersecting_fields(geojson_data)
+        assert inserted.id in features[0]["field_ids"]
+
+        # Writes of other workers are applied from their notifications
+        with patch.object(settings, "field_index_enabled", True):
+            other_worker = PostgreSQLHandler(database="test_geo_stac_db")
+        worker.field_index.remove([inserted.id])
+        await worker.apply_field_changes(f"{other_worker._instance_id}::{inserted.id}")
+        assert len(worker.field_index) == 2
+        await other_worker.dispose()
+    finally:
+        await worker.dispose()
+
+
+@pytest.mark.asyncio
+async def test_read_version_follows_field_index(postgres, geojson_data):
+    with patch.object(settings, "field_index_enabled", True):
+        worker = PostgreSQLHandler(database="test_geo_stac_db")
+    try:
+        await worker.load_field_index()
+        assert await worker.geo_fields_read_version() == 0
+
+        with patch.object(settings, "field_index_enabled", True):
+            [inserted], _ = await postgres.insert_geo_fields(geojson_data)
+
+        # Reads stay at the version of the index until it applies the write
+        assert await worker.geo_fields_version() == 1
+        assert await worker.geo_fields_read_version() == 0
+        await worker.apply_field_changes(f"{postgres._instance_id}::{inserted.id}")
+        assert await worker.geo_fields_read_version() == 0
+        await worker.apply_field_changes(f"{postgres._instance_id}:1:{inserted.id}")
+        assert await worker.geo_fields_read_version() == 1
+        assert len(worker.field_index) == 1
+    finally:
+        await worker.dispose()
+
+
+@pytest.mark.asyncio
+async def test_get_tile_cache_invalidation(postgres, geojson_data):
+    empty_tile, empty_etag = await postgres.get_tile(10, 524, 338)
+    assert empty_tile == b""
+    assert (10, 524, 338) in list(postgres.tile_cache)
+
+    # Inserting a field that overlaps the tile drops it from the cache
+    await postgres.insert_geo_fields(geojson_data)
+    assert (10, 524, 338) not in list(postgres.tile_cache)
+
+    tile, etag = await postgres.get_tile(10, 524, 338)
+    assert tile and etag != empty_etag
+    assert await postgres.get_tile(10, 524, 338) == (tile, etag)
+    assert postgres.tile_cache.hits == 1
+
+
+@pytest.mark.asyncio
+async def test_get_tile_invalidated_by_other_workers(postgres, geojson_data):
+    empty_tile, _ = await postgres.get_tile(10, 524, 338)
+    other_worker = PostgreSQLHandler(database="test_geo_stac_db")
+    try:
+        [inserted], _ = await other_worker.insert_geo_fields(geojson_data)
+    finally:
+        await other_worker.dispose()
+
+    # The tile is dropped once the notification of the write is applied
+    assert (10, 524, 338) in list(postgres.tile_cache)
+    await postgres.apply_field_changes(f"{other_worker._instance_id}:1:{inserted.id}")
+    assert (10, 524, 338) not in list(postgres.tile_cache)
+    tile, _ = await postgres.get_tile(10, 524, 338)
+    assert tile != empty_tile
@@ -0,0 +1,78 @@
+import asyncio
+import pytest
+
+from unittest.mock import patch
+
+from src.config.base import settings
+from src.database.postgres.handler import PostgreSQLHandler
+from src.services.field_index_service import GeoFieldIndexListener
+
+
+@pytest.mark.asyncio
+async def test_field_index_listener(postgres, geojson_data):
+    await postgres.insert_geo_fields(geojson_data)
+    with patch.object(settings, "field_index_enabled", True):
+        worker = PostgreSQLHandler(database="test_geo_stac_db")
+        listener = GeoFieldIndexListener(worker, retry_interval=60)
+        listener.start()
+        try:
+            for _ in range(100):
+                if worker.field_index.ready:
+                    break
+                await asyncio.sleep(0.05)
+            assert len(worker.field_index) == 1
+
+            # A field inserted by another worker is notified to the listener
+            geojson_data.features[0].properties["name"] = "Delft"
+            geojson_data.features[0].geometry.coordinates[0][0][0] += 0.001
+            geojson_data.features[0].geometry.coordinates[0][-1][0] += 0.001
+            await postgres.insert_geo_fields(geojson_data)
+            for _ in range(100):
+                if len(worker.field_index) == 2:
+                    break
+                await asyncio.sleep(0.05)
+            assert len(worker.field_index) == 2
+        finally:
+            await listener.stop()
+            await worker.dispose()
+
+    assert not worker.field_index.ready
+
+
+@pytest.mark.asyncio
+async def test_field_index_listener_disabled(postgres):
+    with patch.object(settings, "tile_cache_max_entries", 0):
+        listener = GeoFieldIndexListener(postgres)
+        listener.start()
+    await listener.stop()
+
+    assert postgres.field_index is None
+    assert listener._task is None
+
+
+@pytest.mark.asyncio
+async def test_field_index_listener_invalidates_tiles(postgres, geojson_data):
+    listener = GeoFieldIndexListener(postgres, retry_interval=60)
+    await postgres.get_tile(10, 524, 338)
+    listener.start()
+    try:
+        # The tiles cached before listening are dropped, as writes may be missed
+        for _ in range(100):
+            if not len(postgres.tile_cache):
+                break
+            await asyncio.sleep(0.05)
+        assert not len(postgres.tile_cache)
+
+        await postgres.get_tile(10, 524, 338)
+        other_worker = PostgreSQLHandler(database="test_geo_stac_db")
+        try:
+            await other_worker.insert_geo_fields(geojson_data)
+        finally:
+            await other_worker.dispose()
+        for _ in range(100):
+            if not len(postgres.tile_cache):
+                break
+            await asyncio.sleep(0.05)
+        assert not len(postgres.tile_cache)
+    finally:
+        await listener.stop()
@@ -0,0 +1,64 @@
+import asyncio
+import pytest
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from src.models.job_models import SatelliteImageJob
+from src.services.job_service import SatelliteImageJobWorkers
+
+
+@pytest.mark.asyncio
+@patch("src.services.stac_service.STAC.newest_satellite_image")
+async def test_job_workers(mock_newest_satellite_image, postgres, geojson_data):
+    mock_newest_satellite_image.return_value = (
+        "mock_url",
+        "2024-01-10T10:54:21.024000Z",
+    )
+    workers = SatelliteImageJobWorkers(postgres, workers=2, poll_interval=60)
+    workers.start()
+    try:
+        job = await postgres.create_satellite_image_job(geojson_data)
+        workers.notify()
+        for _ in range(100):
+            job = await postgres.get_satellite_image_job(job.id)
+            if job.status == "completed":
+                break
+            await asyncio.sleep(0.05)
+    finally:
+        await workers.stop()
+
+    assert job.status == "completed"
+    assert [result["image_url"] for result in job.results] == ["mock_url"]
+
+
+@pytest.mark.asyncio
+async def test_job_worker_survives_failed_finish():
+    jobs = [SatelliteImageJob(id=1), SatelliteImageJob(id=2)]
+    ran = []
+    both_ran = asyncio.Event()
+
+    async def _claim():
+        return jobs.pop(0) if jobs else None
+
+    async def _run(job):
+        ran.append(job.id)
+        if len(ran) == 2:
+            both_ran.set()
+        raise RuntimeError("STAC is down")
+
+    database = MagicMock(
+        claim_satellite_image_job=AsyncMock(side_effect=_claim),
+        run_satellite_image_job=AsyncMock(side_effect=_run),
+        # e.g. the connection dropped
+        finish_satellite_image_job=AsyncMock(side_effect=ConnectionError),
+    )
+    workers = SatelliteImageJobWorkers(database, workers=1, poll_interval=60)
+    workers.start()
+    try:
+        await asyncio.wait_for(both_ran.wait(), timeout=5)
+    finally:
+        await workers.stop()
+
+    # The worker went on with the next job
+    assert ran == [1, 2]
+    assert database.finish_satellite_image_job.await_count == 2
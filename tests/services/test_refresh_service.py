@@ -0,0 +1,44 @@
+import asyncio
+import pytest
+
+from unittest.mock import AsyncMock, MagicMock
+
+from src.services.refresh_service import SatelliteImageRefresher
+
+
+@pytest.mark.asyncio
+async def test_refresher_runs_one_batch_per_interval():
+    intervals = []
+    refreshed = asyncio.Event()
+
+    async def _refresh(interval):
+        intervals.append(interval)
+        if len(intervals) == 3:
+            refreshed.set()
+        if len(intervals) == 1:
+            raise RuntimeError
+
+    database = MagicMock(
+        refresh_stale_images=AsyncMock(side_effect=_refresh),
+        trim_stac_cache=AsyncMock(),
+    )
+    refresher = SatelliteImageRefresher(database, interval=0.05)
+
+    refresher.start()
+    await asyncio.wait_for(refreshed.wait(), timeout=5)
+    await refresher.stop()
+
+    # A failed batch does not stop the refresher
+    assert intervals[:3] == [0.05] * 3
+    assert database.trim_stac_cache.await_count >= 3
+
+
+@pytest.mark.asyncio
+async def test_refresher_disabled():
+    database = MagicMock(refresh_stale_images=AsyncMock())
+    refresher = SatelliteImageRefresher(database, interval=0)
+
+    refresher.start()
+    await refresher.stop()
+
+    database.refresh_stale_images.assert_not_awaited()
@@ -1,7 +1,12 @@
+import json
 import pytest
+import time
 
+from shapely.geometry import box, mapping
+from types import SimpleNamespace
 from unittest.mock import patch, MagicMock
 
+from src.config.base import settings
 from src.services.stac_service import STAC
 
 
@@ -37,3 +42,86 @@ async def test_newest_satellite_image_no_image_found(mock_search):
     result = await STAC.newest_satellite_image(bbox)
 
     assert result is None
+
+
+@pytest.mark.asyncio
+@patch.object(settings, "stac_batch_search", False)
+@patch("src.services.stac_service.STAC._search_newest_satellite_image")
+async def test_newest_satellite_images_run_concurrently(mock_search):
+    def _slow_search(geom):
+        time.sleep(0.2)
+        return f"http://example.com/{geom['id']}.jpg", "2024-01-10T10:54:21.024000Z"
+
+    mock_search.side_effect = _slow_search
+
+    geoms = [{"id": index} for index in range(5)]
+    started = time.perf_counter()
+    results = await STAC.newest_satellite_images(geoms)
+    elapsed = time.perf_counter() - started
+
+    assert [url for url, _ in results] == [
+        f"http://example.com/{index}.jpg" for index in range(5)
+    ]
+    assert elapsed < 0.2 * len(geoms) / 2
+
+
+def test_client_opened_lazily_from_catalog_file(tmp_path):
+    catalog_path = tmp_path / "catalog.json"
+    catalog_path.write_text(
+        json.dumps(
+            {
+                "type": "Catalog",
+                "id": "local-catalog",
+                "description": "A local copy of the root catalog",
+                "stac_version": "1.0.0",
+                "conformsTo": ["https://api.stacspec.org/v1.0.0/core"],
+                "links": [],
+            }
+        )
+    )
+
+    with (
+        patch.object(STAC, "_client", None),
+        patch.object(settings, "stac_catalog_path", str(catalog_path)),
+    ):
+        client = STAC.client()
+
+        assert client.id == "local-catalog"
+        assert STAC.client() is client
+
+
+def _scene(href, datetime, bounds):
+    return SimpleNamespace(
+        geometry=mapping(box(*bounds)),
+        properties={"datetime": datetime},
+        assets={"rendered_preview": SimpleNamespace(href=href)},
+    )
+
+
+@pytest.mark.asyncio
+@patch("src.services.stac_service.STAC._search_newest_satellite_image")
+@patch("src.services.stac_service.STAC.client")
+async def test_newest_satellite_images_batched(mock_client, mock_search):
+    mock_client.return_value.search.return_value.items.return_value = [
+        _scene("http://example.com/old.jpg", "2024-01-01T00:00:00Z", (0, 0, 0.5, 1)),
+        _scene("http://example.com/new.jpg", "2024-02-01T00:00:00Z", (0, 0, 0.42, 1)),
+    ]
+    mock_search.return_value = ("http://example.com/single.jpg", "2024-03-01T00:00:00Z")
+    geoms = [
+        mapping(box(0.40, 0.1, 0.41, 0.11)),  # covered by both scenes
+        mapping(box(0.44, 0.1, 0.45, 0.11)),  # covered by the older scene only
+        mapping(box(0.48, 0.1, 0.51, 0.11)),  # not covered by any scene
+        mapping(box(10.0, 10.0, 10.01, 10.01)),  # in a cluster of its own
+    ]
+
+    results = await STAC.newest_satellite_images(geoms)
+
+    assert [url for url, _ in results] == [
+        "http://example.com/new.jpg",
+        "http://example.com/old.jpg",
+        "http://example.com/single.jpg",
+        "http://example.com/single.jpg",
+    ]
+    # One search for the cluster, then one for each geometry it did not cover
+    assert mock_client.return_value.search.call_count == 1
+    assert [call.args[0] for call in mock_search.call_args_list] == geoms[2:]
@@ -0,0 +1,82 @@
+import pytest
+import subprocess
+import sys
+import time
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from src.config.base import settings
+from src.services.stac_service import STAC
+
+# Seconds allowed to import the application and to run its startup, so that
+# scaling out to many workers stays fast.
+IMPORT_TIME_BUDGET = 2.0
+STARTUP_TIME_BUDGET = 0.5
+
+IMPORT_SCRIPT = """
+import socket, sys, time
+
+def _no_network(*args, **kwargs):
+    raise OSError("network access while importing the application")
+
+socket.socket.connect = _no_network
+started_at = time.perf_counter()
+import src.main
+print(time.perf_counter() - started_at)
+assert "pystac_client" not in sys.modules
+"""
+
+
+def test_import_is_network_free_and_within_budget():
+    result = subprocess.run(
+        [sys.executable, "-c", IMPORT_SCRIPT], capture_output=True, text=True
+    )
+
+    assert result.returncode == 0, result.stderr
+    assert float(result.stdout) < IMPORT_TIME_BUDGET
+
+
+@pytest.mark.asyncio
+async def test_startup_within_budget():
+    from src.main import app, lifespan
+
+    database = MagicMock(
+        initialize=AsyncMock(),
+        health_check=AsyncMock(return_value=True),
+        dispose=AsyncMock(),
+    )
+    with (
+        patch("src.main.Database", return_value=database),
+        patch.object(settings, "job_workers", 0),
+        patch.object(settings, "image_refresh_interval", 0),
+    ):
+        started_at = time.perf_counter()
+        async with lifespan(app):
+            elapsed = time.perf_counter() - started_at
+
+    assert elapsed < STARTUP_TIME_BUDGET
+    # Neither the schema nor the STAC client are set up on startup
+    database.initialize.assert_not_awaited()
+    assert STAC._client is None
+
+
+@pytest.mark.asyncio
+async def test_startup_migrates_when_enabled():
+    from src.main import app, lifespan
+
+    database = MagicMock(
+        initialize=AsyncMock(),
+        health_check=AsyncMock(return_value=True),
+        dispose=AsyncMock(),
+    )
+    with (
+        patch("src.main.Database", return_value=database),
+        patch.object(settings, "job_workers", 0),
+        patch.object(settings, "image_refresh_interval", 0),
+        patch.object(settings, "postgres_migrate_on_startup", True),
+    ):
+        async with lifespan(app):
+            pass
+
+    database.initialize.assert_awaited_once()
+    database.dispose.assert_awaited_once()
@@ -0,0 +1,82 @@
+import asyncio
+import pytest
+import time
+
+from src.utils.cache_utils import SingleFlight, TTLCache
+
+
+def test_ttl_cache_hit_and_miss():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.stats() == {"size": 1, "hits": 1, "misses": 1, "hit_rate": 0.5}
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_ttl_cache_expires_entries():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1, ttl=0.01)
+    time.sleep(0.02)
+
+    assert cache.get("a", default="missing") == "missing"
+    assert len(cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_single_flight_shares_in_flight_keys():
+    flights = SingleFlight()
+    led, joined = flights.claim(["a", "b"])
+    assert led == ["a", "b"] and joined == {}
+
+    led, joined = flights.claim(["b", "c", "c"])
+    assert led == ["c"] and list(joined) == ["b"]
+    assert flights.shared == 1
+    assert len(flights.in_flight(["a", "d"])) == 1
+
+    flights.finish({"a": 1, "b": 2, "c": 3})
+    assert await joined["b"] == 2
+    assert len(flights) == 0
+
+
+@pytest.mark.asyncio
+async def test_single_flight_shares_errors():
+    flights = SingleFlight()
+    flights.claim(["a"])
+    _, joined = flights.claim(["a"])
+
+    flights.fail(["a"], asyncio.CancelledError())
+
+    with pytest.raises(RuntimeError):
+        await joined["a"]
+    assert len(flights) == 0
+
+
+def test_ttl_cache_evicts_by_size():
+    cache = TTLCache(maxsize=10, ttl=60, maxbytes=10)
+    cache.set("a", b"aaaa", size=4)
+    cache.set("b", b"bbbb", size=4)
+    cache.set("c", b"cccc", size=4)
+
+    assert cache.get("a") is None
+    assert cache.nbytes == 8
+
+    # A value larger than the whole cache is not stored, nor kept stale
+    cache.set("b", b"b" * 11, size=11)
+    assert cache.get("b") is None
+    assert cache.nbytes == 4
+
+    cache.clear()
+    assert cache.nbytes == 0
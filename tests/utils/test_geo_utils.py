@@ -1,47 +1,152 @@
+import json
 import pytest
+import shapely
 
-from src.api.v1.schemas.geo_schemas import FeatureSchema
-from src.utils.geo_utils import coordinates_to_wkt, extract_info_geojson
+from shapely.geometry import shape
 
+from src.utils.geo_utils import (
+    cluster_geometries,
+    geojson_feature,
+    geojson_to_geometries,
+    geometries_to_ewkb,
+    geometry_fingerprint,
+    geometry_fingerprints,
+    normalized_wkb,
+)
 
-def test_coordinates_to_wkt_single_polygon():
-    coords = [[(1.0, 2.0), (3.0, 4.0), (5.0, 6.0), (1.0, 2.0)]]
-    result = coordinates_to_wkt(coords)
-    expected = "POLYGON ((1.0 2.0, 3.0 4.0, 5.0 6.0, 1.0 2.0))"
-    assert result == expected
 
+def test_normalized_wkb_ignores_ring_start_and_orientation():
+    polygon = {"type": "Polygon", "coordinates": [[[0, 0], [1, 0], [1, 1], [0, 0]]]}
+    rotated = {"type": "Polygon", "coordinates": [[[1, 1], [0, 0], [1, 0], [1, 1]]]}
+    reversed_ = {"type": "Polygon", "coordinates": [[[0, 0], [1, 1], [1, 0], [0, 0]]]}
 
-def test_coordinates_to_wkt_empty_coordinates():
-    with pytest.raises(IndexError):
-        coordinates_to_wkt([])
+    assert (
+        normalized_wkb(polygon) == normalized_wkb(rotated) == normalized_wkb(reversed_)
+    )
 
 
-def test_extract_info_geojson_with_name():
-    feature = FeatureSchema(
-        type="Feature",
-        properties={"name": "Test Feature"},
-        geometry={
-            "type": "Polygon",
-            "coordinates": [[(1.0, 2.0), (3.0, 4.0), (1.0, 2.0)]],
-        },
-    )
-    name, geom, ewkt_polygon = extract_info_geojson(feature)
-    assert name == "Test Feature"
-    assert geom == {
+def test_normalized_wkb_with_grid_size():
+    polygon = {"type": "Polygon", "coordinates": [[[0, 0], [1, 0], [1, 1], [0, 0]]]}
+    nearby = {
         "type": "Polygon",
-        "coordinates": [[[1.0, 2.0], [3.0, 4.0], [1.0, 2.0]]],
+        "coordinates": [[[0, 0], [1.0000001, 0], [1, 1], [0, 0]]],
     }
-    assert ewkt_polygon == "POLYGON ((1.0 2.0, 3.0 4.0, 1.0 2.0))"
 
+    assert normalized_wkb(polygon) != normalized_wkb(nearby)
+    assert normalized_wkb(polygon, 1e-6) == normalized_wkb(nearby, 1e-6)
 
-def test_extract_info_geojson_without_name():
-    feature = FeatureSchema(
-        type="Feature",
-        properties={},
-        geometry={
-            "type": "Polygon",
-            "coordinates": [[(1.0, 2.0), (3.0, 4.0), (1.0, 2.0)]],
+
+def test_geometry_fingerprint_matches_wkb_geometry():
+    polygon = {"type": "Polygon", "coordinates": [[[0, 0], [1, 0], [1, 1], [0, 0]]]}
+    from_wkb = shapely.from_wkb(shapely.to_wkb(shape(polygon)))
+
+    assert len(geometry_fingerprint(polygon)) == 64
+    assert geometry_fingerprint(polygon) == geometry_fingerprint(from_wkb)
+
+
+def test_geometry_fingerprints():
+    polygons = [
+        {"type": "Polygon", "coordinates": [[[0, 0], [1, 0], [1, 1], [0, 0]]]},
+        {"type": "Polygon", "coordinates": [[[1, 1], [0, 0], [1, 0], [1, 1]]]},
+        {"type": "Polygon", "coordinates": [[[0, 0], [2, 0], [2, 2], [0, 0]]]},
+    ]
+    fingerprints = geometry_fingerprints(geojson_to_geometries(polygons))
+
+    assert fingerprints == [geometry_fingerprint(polygon) for polygon in polygons]
+    assert fingerprints[0] == fingerprints[1] != fingerprints[2]
+    assert geometry_fingerprints(geojson_to_geometries([])) == []
+
+
+def test_geojson_feature():
+    row = {
+        "id": 1,
+        "name": "Test Feature",
+        "geom": '{"type":"Polygon","coordinates":[[[1,2],[3,4],[1,2]]]}',
+        "image_url": None,
+        "image_date": None,
+    }
+    assert json.loads(geojson_feature(row)) == {
+        "type": "Feature",
+        "id": 1,
+        "geometry": {"type": "Polygon", "coordinates": [[[1, 2], [3, 4], [1, 2]]]},
+        "properties": {"name": "Test Feature", "image_url": None, "image_date": None},
+    }
+
+
+def test_geojson_to_geometries():
+    outer = [[0.0, 0.0], [4.0, 0.0], [4.0, 4.0], [0.0, 4.0], [0.0, 0.0]]
+    hole = [[1.0, 1.0], [2.0, 1.0], [2.0, 2.0], [1.0, 1.0]]
+    triangle = [[5.0, 5.0], [6.0, 5.0], [5.0, 6.0], [5.0, 5.0]]
+    geometries = [
+        {"type": "Polygon", "coordinates": [outer, hole]},
+        {"type": "MultiPolygon", "coordinates": [[outer, hole], [triangle]]},
+        {"type": "Polygon", "coordinates": [[[*point, 1.0] for point in triangle]]},
+    ]
+
+    result = geojson_to_geometries(geometries)
+
+    assert list(result) == [
+        shape(geometries[0]),
+        shape(geometries[1]),
+        shape({"type": "Polygon", "coordinates": [triangle]}),
+    ]
+    assert len(result[0].interiors) == 1
+
+
+def test_geojson_to_geometries_unsupported_type():
+    with pytest.raises(ValueError):
+        geojson_to_geometries([{"type": "Point", "coordinates": [0.0, 0.0]}])
+
+
+@pytest.mark.parametrize(
+    "geometry",
+    [
+        {
+            "type": "MultiPolygon",
+            "coordinates": [[[[0, 0], [1, 0], [1, 1], [0, 0]]], []],
         },
+        {"type": "MultiPolygon", "coordinates": []},
+        {"type": "Polygon", "coordinates": []},
+        {"type": "Polygon", "coordinates": [[[0, 0], [1, 0], [1, 1], [0, 0]], []]},
+        {"type": "Polygon", "coordinates": [[[0, 0], [1, 0], [0, 0]]]},
+        {"type": "Polygon", "coordinates": [[[0, 0], [1], [1, 1], [0, 0]]]},
+        {"type": "Polygon", "coordinates": [[[0], [1], [1], [0]]]},
+    ],
+)
+def test_geojson_to_geometries_empty_parts(geometry):
+    # shapely would crash the process on these, instead of raising
+    with pytest.raises(ValueError):
+        geojson_to_geometries([geometry])
+
+
+def test_geometries_to_ewkb():
+    polygon = shape(
+        {
+            "type": "Polygon",
+            "coordinates": [
+                [[0.1 + 0.2, 51.9], [1.0, 0.0], [0.0, 1.0], [0.1 + 0.2, 51.9]]
+            ],
+        }
     )
-    name, geom, ewkt_polygon = extract_info_geojson(feature)
-    assert name == "Unknown"
+
+    [ewkb] = geometries_to_ewkb(geojson_to_geometries([polygon.__geo_interface__]))
+
+    decoded = shapely.from_wkb(ewkb)
+    assert shapely.get_srid(decoded) == 4326
+    assert decoded.equals_exact(polygon, tolerance=0)
+    assert geometries_to_ewkb(geojson_to_geometries([])) == []
+
+
+def test_cluster_geometries():
+    geometries = shapely.box(
+        [0.0, 0.02, 1.0, 0.04, 5.0],
+        [0.0] * 4 + [5.0],
+        [0.01, 0.03, 1.01, 0.05, 6.0],
+        [0.01] * 4 + [6.0],
+    )
+
+    # Chained through the second box, the first and fourth boxes share a cluster
+    assert cluster_geometries(geometries, 0.015, 0.5) == [[0, 1, 3], [2], [4]]
+    # Clusters wider than the max extent are split
+    assert cluster_geometries(geometries, 0.015, 0.03) == [[0], [1], [3], [2], [4]]
+    assert cluster_geometries(geometries[:0], 0.015, 0.5) == []
@@ -0,0 +1,45 @@
+import shapely
+
+from src.utils.index_utils import GeometryIndex
+
+
+def test_geometry_index_query():
+    index = GeometryIndex()
+    index.replace(
+        [
+            (5, shapely.box(0, 0, 1, 1), {"id": 5}),
+            (2, shapely.box(0.5, 0.5, 2, 2), {"id": 2}),
+            (9, shapely.box(10, 10, 11, 11), {"id": 9}),
+        ]
+    )
+    assert index.ready and len(index) == 3
+
+    indexes, row_ids = index.query(
+        [shapely.box(10, 10, 10.5, 10.5), shapely.box(0.9, 0.9, 1.5, 1.5)]
+    )
+    assert indexes.tolist() == [0, 1, 1]
+    assert row_ids.tolist() == [9, 2, 5]
+    assert index.rows(row_ids.tolist()) == [{"id": 9}, {"id": 2}, {"id": 5}]
+
+    # Inside the bounding box of the polygon, but outside the polygon itself
+    triangle = shapely.Polygon([(20, 20), (21, 20), (20, 21)])
+    index.upsert([(7, triangle, {"id": 7})])
+    corner = shapely.box(20.8, 20.8, 20.9, 20.9)
+    assert index.query(corner)[1].tolist() == []
+    assert index.query(corner, predicate=None)[1].tolist() == [7]
+
+
+def test_geometry_index_upsert_and_remove():
+    index = GeometryIndex()
+    assert not index.ready
+    assert index.query(shapely.box(0, 0, 1, 1))[1].tolist() == []
+
+    index.upsert([(1, shapely.box(0, 0, 1, 1), {"id": 1, "name": "a"})])
+    index.upsert([(1, shapely.box(5, 5, 6, 6), {"id": 1, "name": "b"})])
+    assert index.query(shapely.box(0, 0, 1, 1))[1].tolist() == []
+    assert index.query(shapely.box(5, 5, 6, 6))[1].tolist() == [1]
+    assert index.rows([1]) == [{"id": 1, "name": "b"}]
+
+    index.remove([1, 2])
+    assert len(index) == 0
+    assert index.query(shapely.box(5, 5, 6, 6))[1].tolist() == []
@@ -0,0 +1,75 @@
+import asyncio
+import pytest
+
+from src.utils.metrics_utils import (
+    MetricsRegistry,
+    add_stage_time,
+    stage,
+    stage_timings,
+)
+
+
+def test_counter_renders_samples_per_labels():
+    registry = MetricsRegistry()
+    counter = registry.counter("lookups_total", "Lookups.", ("cache",))
+    counter.inc(cache="tiles")
+    counter.inc(2, cache="tiles")
+    counter.set(5, cache='say "hi"\n')
+
+    assert registry.render() == (
+        "# HELP lookups_total Lookups.\n"
+        "# TYPE lookups_total counter\n"
+        'lookups_total{cache="say \\"hi\\"\\n"} 5.0\n'
+        'lookups_total{cache="tiles"} 3.0\n'
+    )
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("latency_seconds", "Latency.", buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 2.0):
+        histogram.observe(value)
+
+    assert registry.render().splitlines()[2:] == [
+        'latency_seconds_bucket{le="0.1"} 1',
+        'latency_seconds_bucket{le="1.0"} 3',
+        'latency_seconds_bucket{le="+Inf"} 4',
+        "latency_seconds_sum 3.05",
+        "latency_seconds_count 4",
+    ]
+
+
+def test_registry_rejects_duplicate_names():
+    registry = MetricsRegistry()
+    registry.gauge("connections", "Connections.")
+
+    with pytest.raises(ValueError):
+        registry.counter("connections", "Connections.")
+
+
+def test_stages_are_only_timed_within_stage_timings():
+    add_stage_time("db", 1.0)
+    with stage("db"):
+        pass
+
+    with stage_timings() as timings:
+        add_stage_time("db", 1.0)
+        add_stage_time("db", 0.5)
+        with stage("stac"):
+            pass
+
+    assert timings["db"] == 1.5
+    assert timings["stac"] >= 0
+
+
+@pytest.mark.asyncio
+async def test_nested_and_concurrent_stages_are_counted_once():
+    async def search():
+        with stage("stac"):
+            await asyncio.sleep(0.05)
+
+    with stage_timings() as timings:
+        with stage("stac"):
+            await asyncio.gather(search(), search(), search())
+
+    assert 0.05 <= timings["stac"] < 0.1
@@ -0,0 +1,13 @@
+import pytest
+
+from src.utils.pagination_utils import decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(42)) == 42
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", "", encode_cursor(1)[:-2] + "!!"])
+def test_decode_cursor_invalid(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
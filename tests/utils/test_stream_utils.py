@@ -0,0 +1,102 @@
+import json
+import pytest
+
+from src.utils.stream_utils import FeatureStreamParser, read_feature_batches
+
+
+def _features(count):
+    return [
+        {
+            "type": "Feature",
+            "properties": {"name": f"Field {index}"},
+            "geometry": {
+                "type": "Polygon",
+                "coordinates": [[[index, 0], [index + 1, 0], [index, 1], [index, 0]]],
+            },
+        }
+        for index in range(count)
+    ]
+
+
+def _parse(data, chunk_size):
+    parser = FeatureStreamParser(max_value_size=1024)
+    features = []
+    for offset in range(0, len(data), chunk_size):
+        features += parser.feed(data[offset : offset + chunk_size])
+    parser.close()
+    return features
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 4096])
+def test_feature_stream_parser_feature_collection(chunk_size):
+    features = _features(3)
+    collection = {"type": "FeatureCollection", "features": features, "bbox": [0, 0]}
+
+    data = json.dumps(collection, indent=2).encode()
+    assert _parse(data, chunk_size) == features
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 4096])
+def test_feature_stream_parser_ndjson(chunk_size):
+    features = _features(3)
+
+    data = "".join(f"{json.dumps(feature)}\n" for feature in features).encode()
+    assert _parse(data, chunk_size) == features
+
+
+def test_feature_stream_parser_returns_features_as_received():
+    parser = FeatureStreamParser(max_value_size=1024)
+    feature = json.dumps(_features(1)[0])
+
+    assert parser.feed(b'{"type": "FeatureCollection", "features": [') == []
+    assert parser.feed(f"{feature},".encode()) == _features(1)
+    assert parser.feed(f"{feature}".encode()) == []
+    assert parser.feed(b"]}") == _features(1)
+
+
+def test_feature_stream_parser_splits_utf8_characters():
+    feature = _features(1)[0]
+    feature["properties"]["name"] = "Zürich"
+
+    assert _parse(json.dumps(feature, ensure_ascii=False).encode(), 1) == [feature]
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        b"[]",
+        b'{"type": "Point", "coordinates": [0, 0]}',
+        b'{"type": "FeatureCollection", "features": [1]}',
+        b'{"type": "FeatureCollection", "features": [',
+        b'{"type": "Feature", 1: 2}',
+    ],
+)
+def test_feature_stream_parser_invalid(data):
+    with pytest.raises(ValueError):
+        _parse(data, 4096)
+
+
+def test_feature_stream_parser_bounds_buffered_value():
+    parser = FeatureStreamParser(max_value_size=64)
+    parser.feed(b'{"type": "FeatureCollection", "features": [')
+
+    with pytest.raises(ValueError, match="larger than 64"):
+        parser.feed(json.dumps(_features(1)[0]).encode())
+
+
+@pytest.mark.asyncio
+async def test_read_feature_batches():
+    features = _features(5)
+    data = json.dumps({"type": "FeatureCollection", "features": features}).encode()
+
+    async def _chunks():
+        for offset in range(0, len(data), 10):
+            yield data[offset : offset + 10]
+
+    batches = [
+        batch
+        async for batch in read_feature_batches(
+            _chunks(), batch_size=2, max_value_size=1024
+        )
+    ]
+    assert batches == [features[:2], features[2:4], features[4:]]
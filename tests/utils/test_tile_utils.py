@@ -0,0 +1,41 @@
+import pytest
+
+from src.utils.tile_utils import (
+    bounds_intersect,
+    is_valid_tile,
+    tile_bounds,
+    zoom_tolerance,
+)
+
+
+def test_tile_bounds_world():
+    assert tile_bounds(0, 0, 0) == pytest.approx(
+        (-180.0, -85.0511287798066, 180.0, 85.0511287798066)
+    )
+
+
+def test_tile_bounds_with_buffer():
+    min_lon, min_lat, max_lon, max_lat = tile_bounds(10, 524, 338)
+    assert (min_lon, max_lon) == pytest.approx((4.21875, 4.5703125))
+    assert min_lat < 51.92 < max_lat
+
+    buffered = tile_bounds(10, 524, 338, buffer=0.5)
+    assert buffered[0] < min_lon and buffered[2] > max_lon
+    assert buffered[1] < min_lat and buffered[3] > max_lat
+
+
+def test_is_valid_tile():
+    assert is_valid_tile(0, 0, 0)
+    assert is_valid_tile(10, 1023, 1023)
+    assert not is_valid_tile(10, 1024, 0)
+    assert not is_valid_tile(-1, 0, 0)
+
+
+def test_bounds_intersect():
+    assert bounds_intersect((0, 0, 1, 1), (1, 1, 2, 2))
+    assert not bounds_intersect((0, 0, 1, 1), (1.5, 0, 2, 1))
+
+
+def test_zoom_tolerance():
+    assert zoom_tolerance(0) == pytest.approx(360 / 256)
+    assert zoom_tolerance(10) == pytest.approx(zoom_tolerance(9) / 2)